@@ -0,0 +1,60 @@
+"""
+Compares the per-record cost of (de)serializing a batch of small records using the
+batch API against a plain loop over ``serialize()`` / ``deserialize()``.
+"""
+
+from __future__ import annotations
+
+from collections.abc import Callable
+from timeit import repeat
+from typing import Any
+
+from asphalt.serialization.api import Serializer
+from asphalt.serialization.serializers.cbor import CBORSerializer
+from asphalt.serialization.serializers.json import JSONSerializer
+from asphalt.serialization.serializers.msgpack import MsgpackSerializer
+
+NUMBER = 20
+RECORDS: list[Any] = [
+    {"id": i, "name": f"item {i}", "price": i * 0.25, "tags": ["a", "b"]}
+    for i in range(10000)
+]
+SERIALIZERS: dict[str, Serializer] = {
+    "cbor": CBORSerializer(),
+    "cbor (cached)": CBORSerializer(cache_codecs=True),
+    "json": JSONSerializer(),
+    "msgpack": MsgpackSerializer(),
+}
+
+
+def measure(func: Callable[[], Any]) -> float:
+    best = min(repeat(func, number=NUMBER, repeat=5))
+    return best / NUMBER / len(RECORDS) * 1e9
+
+
+def main() -> None:
+    print(
+        f"{'serializer':<15}{'encode ns (loop/many/batch)':>34}  "
+        f"{'decode ns (loop/many/batch)':>34}"
+    )
+    for name, serializer in SERIALIZERS.items():
+        payloads = serializer.serialize_many(RECORDS)
+        batch = serializer.serialize_batch(RECORDS)
+        encode = [
+            measure(lambda: [serializer.serialize(record) for record in RECORDS]),
+            measure(lambda: serializer.serialize_many(RECORDS)),
+            measure(lambda: serializer.serialize_batch(RECORDS)),
+        ]
+        decode = [
+            measure(lambda: [serializer.deserialize(payload) for payload in payloads]),
+            measure(lambda: serializer.deserialize_many(payloads)),
+            measure(lambda: serializer.deserialize_batch(batch)),
+        ]
+        print(
+            f"{name:<15}{' / '.join(f'{value:>8.0f}' for value in encode):>34}  "
+            f"{' / '.join(f'{value:>8.0f}' for value in decode):>34}"
+        )
+
+
+if __name__ == "__main__":
+    main()
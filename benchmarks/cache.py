@@ -0,0 +1,67 @@
+"""
+Compares the cost of serializing the same objects repeatedly with and without the
+``cache`` backend, both for immutable objects (cached by their contents) and for
+versioned objects (cached by their identity and version).
+"""
+
+from __future__ import annotations
+
+from collections.abc import Callable
+from dataclasses import dataclass
+from timeit import repeat
+from typing import Any
+
+from asphalt.serialization.api import CustomizableSerializer, Serializer
+from asphalt.serialization.serializers.cache import CachingSerializer
+
+NUMBER = 1000
+BACKENDS = ["cbor", "json", "msgpack"]
+
+
+@dataclass(frozen=True)
+class Rate:
+    currency: str
+    value: float
+
+
+class Snapshot:
+    def __init__(self, settings: dict[str, Any]):
+        self.settings = settings
+        self.version = 1
+
+    def __getstate__(self) -> dict[str, Any]:
+        return self.settings
+
+    def __setstate__(self, state: dict[str, Any]) -> None:
+        self.settings = state
+
+
+def create_objects() -> dict[str, Any]:
+    return {
+        "frozen": tuple(Rate(f"C{i:02}", i * 0.37) for i in range(50)),
+        "versioned": Snapshot(
+            {f"key{i}": {"enabled": i % 2 == 0, "limit": i} for i in range(200)}
+        ),
+    }
+
+
+def measure(func: Callable[[], Any]) -> float:
+    return min(repeat(func, number=NUMBER, repeat=5)) / NUMBER * 1e6
+
+
+def main() -> None:
+    print(f"{'backend':<10}{'object':<12}{'µs (plain/cached)':>22}")
+    for backend in BACKENDS:
+        cached = CachingSerializer(backend, version_attribute="version")
+        plain: Serializer = cached.serializer
+        assert isinstance(plain, CustomizableSerializer)
+        plain.register_custom_type(Rate, compiled=True)
+        plain.register_custom_type(Snapshot)
+        for name, obj in create_objects().items():
+            plain_time = measure(lambda: plain.serialize(obj))
+            cached_time = measure(lambda: cached.serialize(obj))
+            print(f"{backend:<10}{name:<12}{plain_time:>10.1f} / {cached_time:<10.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+"""
+Compares the per-message cost of CBOR (de)serialization with and without cached
+encoder/decoder instances, using payloads smaller than 1 KiB.
+"""
+
+from __future__ import annotations
+
+from timeit import repeat
+from typing import Any
+
+from asphalt.serialization.serializers.cbor import CBORSerializer
+
+NUMBER = 20000
+PAYLOADS: dict[str, Any] = {
+    "int": 123456,
+    "small dict": {"id": 1, "name": "widget", "price": 4.95, "tags": ["a", "b"]},
+    "record list": [
+        {"id": i, "name": f"item {i}", "active": i % 2 == 0} for i in range(20)
+    ],
+}
+
+
+def measure(serializer: CBORSerializer, obj: Any) -> tuple[float, float]:
+    payload = serializer.serialize(obj)
+    encode = min(repeat(lambda: serializer.serialize(obj), number=NUMBER, repeat=5))
+    decode = min(
+        repeat(lambda: serializer.deserialize(payload), number=NUMBER, repeat=5)
+    )
+    return encode / NUMBER * 1e6, decode / NUMBER * 1e6
+
+
+def main() -> None:
+    plain = CBORSerializer()
+    cached = CBORSerializer(cache_codecs=True)
+    print(
+        f"{'payload':<14}{'size':>6}  {'encode µs (plain/cached)':>26}  "
+        f"{'decode µs (plain/cached)':>26}"
+    )
+    for name, obj in PAYLOADS.items():
+        size = len(plain.serialize(obj))
+        plain_enc, plain_dec = measure(plain, obj)
+        cached_enc, cached_dec = measure(cached, obj)
+        print(
+            f"{name:<14}{size:>6}  {plain_enc:>12.2f} / {cached_enc:<11.2f}  "
+            f"{plain_dec:>12.2f} / {cached_dec:<11.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
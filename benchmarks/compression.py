@@ -0,0 +1,74 @@
+"""
+Compares the payload sizes and (de)serialization times of the compression codecs
+(at a few levels) on small and large msgpack payloads, including zstd with a trained
+dictionary.
+"""
+
+from __future__ import annotations
+
+from collections.abc import Callable
+from timeit import repeat
+from typing import Any
+
+import zstandard
+
+from asphalt.serialization.api import Serializer
+from asphalt.serialization.serializers.compression import CompressingSerializer
+from asphalt.serialization.serializers.msgpack import MsgpackSerializer
+
+NUMBER = 200
+
+
+def make_record(i: int) -> dict[str, Any]:
+    return {
+        "id": i,
+        "name": f"user-{i}",
+        "email": f"user-{i}@example.org",
+        "roles": ["reader", "writer"] if i % 3 else ["reader"],
+        "active": bool(i % 2),
+    }
+
+
+def create_serializers() -> dict[str, Serializer]:
+    backend = MsgpackSerializer()
+    samples = [backend.serialize(make_record(i)) for i in range(10000, 12000)]
+    dictionary = zstandard.train_dictionary(8192, samples).as_bytes()
+    serializers: dict[str, Serializer] = {"none": backend}
+    for codec, levels in [("zlib", [1, 6, 9]), ("lzma", [0, 6]), ("zstd", [1, 3, 9])]:
+        for level in levels:
+            serializers[f"{codec}-{level}"] = CompressingSerializer(
+                "msgpack", codec=codec, level=level, threshold=0
+            )
+
+    serializers["zstd-3+dict"] = CompressingSerializer(
+        "msgpack", codec="zstd", threshold=0, dictionary=dictionary
+    )
+    return serializers
+
+
+def measure(func: Callable[[], Any]) -> float:
+    return min(repeat(func, number=NUMBER, repeat=5)) / NUMBER * 1e6
+
+
+def main() -> None:
+    payloads = {
+        "small": make_record(1),
+        "large": [make_record(i) for i in range(1000)],
+    }
+    print(
+        f"{'payload':<8}{'codec':<13}{'bytes':>8}  {'serialize µs':>13}  "
+        f"{'deserialize µs':>15}"
+    )
+    for name, obj in payloads.items():
+        for codec, serializer in create_serializers().items():
+            payload = serializer.serialize(obj)
+            encode = measure(lambda: serializer.serialize(obj))
+            decode = measure(lambda: serializer.deserialize(payload))
+            print(
+                f"{name:<8}{codec:<13}{len(payload):>8}  {encode:>13.1f}  "
+                f"{decode:>15.1f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""
+Compares the cost of (de)serializing lists of dataclasses with the type information
+embedded in the payload (the default) and without it, using type-directed decoding
+(``deserialize(payload, into=...)``).
+"""
+
+from __future__ import annotations
+
+from collections.abc import Callable
+from dataclasses import dataclass
+from timeit import repeat
+from typing import Any, List
+
+from asphalt.serialization.api import CustomizableSerializer
+from asphalt.serialization.serializers.cbor import CBORSerializer
+from asphalt.serialization.serializers.json import JSONSerializer
+from asphalt.serialization.serializers.msgpack import MsgpackSerializer
+
+NUMBER = 100
+COUNTS = [1, 10, 100]
+
+
+@dataclass
+class Item:
+    sku: str
+    quantity: int
+    price: float
+
+
+def create_serializers() -> dict[str, Callable[[], CustomizableSerializer]]:
+    return {
+        "cbor": CBORSerializer,
+        "json": JSONSerializer,
+        "msgpack": MsgpackSerializer,
+    }
+
+
+def measure(func: Callable[[], Any]) -> float:
+    return min(repeat(func, number=NUMBER, repeat=5)) / NUMBER * 1e6
+
+
+def main() -> None:
+    print(
+        f"{'serializer':<10}{'count':>6}  {'bytes (wrapped/into)':>22}  "
+        f"{'decode µs (wrapped/into)':>26}"
+    )
+    for name, factory in create_serializers().items():
+        wrapped = factory()
+        wrapped.register_custom_type(Item, compiled=True)
+        unwrapped = factory()
+        unwrapped.register_custom_type(Item, compiled=True, wrap_state=False)
+        for count in COUNTS:
+            obj = [Item(f"sku-{i}", i, i * 1.5) for i in range(count)]
+            wrapped_payload = wrapped.serialize(obj)
+            unwrapped_payload = unwrapped.serialize(obj)
+            wrapped_dec = measure(lambda: wrapped.deserialize(wrapped_payload))
+            unwrapped_dec = measure(
+                lambda: unwrapped.deserialize(unwrapped_payload, into=List[Item])
+            )
+            print(
+                f"{name:<10}{count:>6}  {len(wrapped_payload):>10} / "
+                f"{len(unwrapped_payload):<9}  "
+                f"{wrapped_dec:>12.1f} / {unwrapped_dec:<11.1f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+"""
+Measures how long it takes to import the modules of this library.
+
+Each module is imported in a fresh interpreter started with ``python -X importtime``,
+and the cumulative import time reported for it is compared against its budget. The
+script also checks that importing the module does not import any of the libraries whose
+import is deferred until they're needed (like the serialization libraries used by the
+backends). The exit code is 1 if any module exceeds its budget or imports a deferred
+library, so this can be used to guard the startup time::
+
+    $ python benchmarks/import_time.py --repeat 10
+"""
+
+from __future__ import annotations
+
+import argparse
+import subprocess
+import sys
+from statistics import median
+
+#: import time budgets (in milliseconds), with plenty of headroom for slow machines
+BUDGETS = {
+    "asphalt.serialization.api": 80,
+    "asphalt.serialization.component": 300,
+    "asphalt.serialization.metrics": 80,
+    "asphalt.serialization.serializers.auto": 80,
+    "asphalt.serialization.serializers.cache": 80,
+    "asphalt.serialization.serializers.cbor": 80,
+    "asphalt.serialization.serializers.compression": 100,
+    "asphalt.serialization.serializers.json": 100,
+    "asphalt.serialization.serializers.msgpack": 80,
+    "asphalt.serialization.serializers.offload": 200,
+    "asphalt.serialization.serializers.pickle": 80,
+    "asphalt.serialization.serializers.yaml": 80,
+}
+
+#: libraries that must not be imported by the modules themselves
+DEFERRED_MODULES = [
+    "asphalt.core",
+    "cbor2",
+    "msgpack",
+    "orjson",
+    "ruamel.yaml",
+    "yaml",
+    "zstandard",
+]
+
+#: exceptions to the above (the component needs asphalt.core for its base class)
+ALLOWED_MODULES = {"asphalt.serialization.component": ["asphalt.core"]}
+
+CHECK_SCRIPT = """\
+import sys
+import {module}
+print(",".join(name for name in {deferred!r} if name in sys.modules))
+"""
+
+
+def measure_import(module: str) -> tuple[float, list[str]]:
+    allowed = ALLOWED_MODULES.get(module, [])
+    deferred = [name for name in DEFERRED_MODULES if name not in allowed]
+    script = CHECK_SCRIPT.format(module=module, deferred=deferred)
+    process = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", script],
+        capture_output=True,
+        check=True,
+        text=True,
+    )
+    imported = [name for name in process.stdout.strip().split(",") if name]
+    for line in process.stderr.splitlines():
+        # Lines look like: "import time:   self [us] | cumulative | imported package"
+        fields = line.split("|")
+        if len(fields) == 3 and fields[2].strip() == module:
+            return int(fields[1]) / 1000, imported
+
+    raise RuntimeError(f"no import time reported for {module}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument(
+        "--modules", nargs="+", choices=list(BUDGETS), default=list(BUDGETS)
+    )
+    parser.add_argument(
+        "--repeat",
+        type=int,
+        default=5,
+        help="number of times to import each module (the median is reported)",
+    )
+    args = parser.parse_args()
+
+    failed = False
+    print(f"{'module':<48}{'ms':>8}{'budget':>8}  status")
+    for module in args.modules:
+        measurements = [measure_import(module) for _ in range(args.repeat)]
+        elapsed = median(elapsed for elapsed, _ in measurements)
+        imported = measurements[0][1]
+        budget = BUDGETS[module]
+        if imported:
+            status = f"FAIL (imported {', '.join(imported)})"
+        elif elapsed > budget:
+            status = "FAIL (over budget)"
+        else:
+            status = "ok"
+
+        failed |= status != "ok"
+        print(f"{module:<48}{elapsed:>8.1f}{budget:>8}  {status}")
+
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+"""
+Compares the stdlib and orjson engines of the JSON serializer, with and without custom
+types.
+"""
+
+from __future__ import annotations
+
+from collections.abc import Callable
+from timeit import repeat
+from typing import Any
+
+from asphalt.serialization.serializers.json import JSONSerializer
+
+NUMBER = 1000
+ENGINES = ["stdlib", "orjson"]
+
+
+class Event:
+    def __init__(self, id: int, name: str, tags: list[str]):
+        self.id = id
+        self.name = name
+        self.tags = tags
+
+
+def create_payloads() -> dict[str, Any]:
+    return {
+        "small dict": {"id": 1, "name": "åäö", "active": True, "score": 5.06},
+        "records": [
+            {"id": i, "name": f"user-{i}", "tags": ["a", "b", "c"], "score": i / 3}
+            for i in range(100)
+        ],
+        "custom types": [Event(i, f"event-{i}", ["x", "y"]) for i in range(100)],
+    }
+
+
+def measure(func: Callable[[], Any]) -> float:
+    return min(repeat(func, number=NUMBER, repeat=5)) / NUMBER * 1e6
+
+
+def main() -> None:
+    serializers = {}
+    for engine in ENGINES:
+        serializers[engine] = JSONSerializer(engine=engine)
+        serializers[engine].register_custom_type(Event)
+
+    print(f"{'payload':<14}{'engine':>8}  {'serialize µs':>13}  {'deserialize µs':>15}")
+    for name, obj in create_payloads().items():
+        for engine, serializer in serializers.items():
+            payload = serializer.serialize(obj)
+            encode = measure(lambda: serializer.serialize(obj))
+            decode = measure(lambda: serializer.deserialize(payload))
+            print(f"{name:<14}{engine:>8}  {encode:>13.1f}  {decode:>15.1f}")
+
+
+if __name__ == "__main__":
+    main()
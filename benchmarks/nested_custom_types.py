@@ -0,0 +1,80 @@
+"""
+Compares the cost of (de)serializing nested custom type objects with the marshalled
+state encoded separately (the default) and inline, at increasing nesting depths.
+"""
+
+from __future__ import annotations
+
+from collections.abc import Callable
+from timeit import repeat
+from typing import Any
+
+from asphalt.serialization.api import CustomizableSerializer
+from asphalt.serialization.serializers.cbor import CBORSerializer, CBORTypeCodec
+from asphalt.serialization.serializers.msgpack import (
+    MsgpackSerializer,
+    MsgpackTypeCodec,
+)
+
+NUMBER = 200
+DEPTHS = [1, 4, 16, 64]
+
+
+class Node:
+    def __init__(self, value: int, children: list[Node]):
+        self.value = value
+        self.children = children
+
+
+def make_tree(depth: int) -> Node:
+    node = Node(0, [])
+    for i in range(1, depth):
+        node = Node(i, [node, Node(-i, [])])
+
+    return node
+
+
+def create_serializers() -> dict[str, tuple[CustomizableSerializer, ...]]:
+    serializers: dict[str, tuple[CustomizableSerializer, ...]] = {
+        "cbor": (
+            CBORSerializer(),
+            CBORSerializer(custom_type_codec=CBORTypeCodec(inline_state=True)),
+        ),
+        "msgpack": (
+            MsgpackSerializer(),
+            MsgpackSerializer(custom_type_codec=MsgpackTypeCodec(inline_state=True)),
+        ),
+    }
+    for pair in serializers.values():
+        for serializer in pair:
+            serializer.register_custom_type(Node)
+
+    return serializers
+
+
+def measure(func: Callable[[], Any]) -> float:
+    return min(repeat(func, number=NUMBER, repeat=5)) / NUMBER * 1e6
+
+
+def main() -> None:
+    print(
+        f"{'serializer':<10}{'depth':>6}  {'encode µs (wrapped/inline)':>28}  "
+        f"{'decode µs (wrapped/inline)':>28}"
+    )
+    for name, (wrapped, inline) in create_serializers().items():
+        for depth in DEPTHS:
+            obj = make_tree(depth)
+            wrapped_payload = wrapped.serialize(obj)
+            inline_payload = inline.serialize(obj)
+            wrapped_enc = measure(lambda: wrapped.serialize(obj))
+            inline_enc = measure(lambda: inline.serialize(obj))
+            wrapped_dec = measure(lambda: wrapped.deserialize(wrapped_payload))
+            inline_dec = measure(lambda: inline.deserialize(inline_payload))
+            print(
+                f"{name:<10}{depth:>6}  {wrapped_enc:>13.1f} / {inline_enc:<12.1f}  "
+                f"{wrapped_dec:>13.1f} / {inline_dec:<12.1f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
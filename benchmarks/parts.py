@@ -0,0 +1,41 @@
+"""
+Compares serializing objects containing large binary fields into a single payload
+(``serialize()``) and into a list of buffers (``serialize_parts()``) with the msgpack
+and CBOR serializers. The difference comes from the binary fields not being copied
+into the payload in the latter case.
+"""
+
+from __future__ import annotations
+
+from collections.abc import Callable
+from timeit import repeat
+from typing import Any
+
+from asphalt.serialization.api import Serializer
+from asphalt.serialization.serializers.cbor import CBORSerializer
+from asphalt.serialization.serializers.msgpack import MsgpackSerializer
+
+NUMBER = 100
+SIZES = [1024, 1024**2, 16 * 1024**2]
+
+
+def measure(func: Callable[[], Any]) -> float:
+    return min(repeat(func, number=NUMBER, repeat=5)) / NUMBER * 1e6
+
+
+def main() -> None:
+    serializers: dict[str, Serializer] = {
+        "msgpack": MsgpackSerializer(buffer_threshold=1024),
+        "cbor": CBORSerializer(buffer_threshold=1024, cache_codecs=True),
+    }
+    print(f"{'size':>10}  {'backend':<10}{'serialize µs':>13}  {'parts µs':>10}")
+    for size in SIZES:
+        obj = {"id": 1, "name": "blob", "chunks": [bytes(size), bytes(size)]}
+        for name, serializer in serializers.items():
+            whole = measure(lambda: serializer.serialize(obj))
+            parts = measure(lambda: serializer.serialize_parts(obj))
+            print(f"{size:>10}  {name:<10}{whole:>13.1f}  {parts:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,48 @@
+"""
+Compares serializing and deserializing objects containing large buffers with the pickle
+serializer, with the buffers pickled in-band (``serialize()``) and out-of-band
+(``serialize_parts()``), and the cost of the restricted mode.
+"""
+
+from __future__ import annotations
+
+from collections.abc import Callable
+from pickle import PickleBuffer
+from timeit import repeat
+from typing import Any
+
+from asphalt.serialization.serializers.pickle import PickleSerializer
+
+NUMBER = 100
+SIZES = [1024, 1024**2, 16 * 1024**2]
+
+
+def measure(func: Callable[[], Any]) -> float:
+    return min(repeat(func, number=NUMBER, repeat=5)) / NUMBER * 1e6
+
+
+def main() -> None:
+    serializer = PickleSerializer(buffer_threshold=1024)
+    restricted = PickleSerializer(restricted=True, buffer_threshold=1024)
+    print(f"{'size':>10}  {'mode':<12}{'serialize µs':>13}  {'deserialize µs':>15}")
+    for size in SIZES:
+        data = bytearray(size)
+        obj = {"id": 1, "name": "blob", "data": PickleBuffer(data)}
+        inband_obj = {"id": 1, "name": "blob", "data": data}
+
+        payload = serializer.serialize(inband_obj)
+        encode = measure(lambda: serializer.serialize(inband_obj))
+        decode = measure(lambda: serializer.deserialize(payload))
+        print(f"{size:>10}  {'in-band':<12}{encode:>13.1f}  {decode:>15.1f}")
+
+        parts = serializer.serialize_parts(obj)
+        encode = measure(lambda: serializer.serialize_parts(obj))
+        decode = measure(lambda: serializer.deserialize_parts(parts))
+        print(f"{size:>10}  {'out-of-band':<12}{encode:>13.1f}  {decode:>15.1f}")
+
+        decode = measure(lambda: restricted.deserialize_parts(parts))
+        print(f"{size:>10}  {'restricted':<12}{'':>13}  {decode:>15.1f}")
+
+
+if __name__ == "__main__":
+    main()
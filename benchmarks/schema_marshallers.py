@@ -0,0 +1,86 @@
+"""
+Compares the cost of (de)serializing deeply nested dataclass graphs with the default
+hook-based marshallers (one hook call per object) and with schema-based marshallers
+(one hook call per outermost object).
+"""
+
+from __future__ import annotations
+
+from collections.abc import Callable
+from dataclasses import dataclass, field
+from timeit import repeat
+from typing import Any, List, Optional
+
+from asphalt.serialization.api import CustomizableSerializer
+from asphalt.serialization.serializers.cbor import CBORSerializer
+from asphalt.serialization.serializers.json import JSONSerializer
+from asphalt.serialization.serializers.msgpack import MsgpackSerializer
+
+NUMBER = 100
+DEPTHS = [2, 8, 32]
+
+
+@dataclass
+class Item:
+    sku: str
+    quantity: int
+    price: float
+
+
+# The typing module's generics are used so that get_type_hints() works on Python 3.8
+@dataclass
+class Order:
+    id: int
+    items: List[Item] = field(default_factory=list)  # noqa: UP006
+    parent: Optional[Order] = None  # noqa: UP007
+
+
+def make_graph(depth: int) -> Order:
+    order = None
+    for i in range(depth):
+        items = [Item(f"sku-{i}-{j}", j, j * 1.5) for j in range(5)]
+        order = Order(i, items, order)
+
+    assert order is not None
+    return order
+
+
+def create_serializers() -> dict[str, Callable[[], CustomizableSerializer]]:
+    return {
+        "cbor": CBORSerializer,
+        "json": JSONSerializer,
+        "msgpack": MsgpackSerializer,
+    }
+
+
+def measure(func: Callable[[], Any]) -> float:
+    return min(repeat(func, number=NUMBER, repeat=5)) / NUMBER * 1e6
+
+
+def main() -> None:
+    print(
+        f"{'serializer':<10}{'depth':>6}  {'encode µs (hooks/schema)':>26}  "
+        f"{'decode µs (hooks/schema)':>26}"
+    )
+    for name, factory in create_serializers().items():
+        hooks = factory()
+        hooks.register_custom_type(Order)
+        hooks.register_custom_type(Item)
+        schema = factory()
+        schema.register_custom_type(Order, schema=True)
+        for depth in DEPTHS:
+            obj = make_graph(depth)
+            hooks_payload = hooks.serialize(obj)
+            schema_payload = schema.serialize(obj)
+            hooks_enc = measure(lambda: hooks.serialize(obj))
+            schema_enc = measure(lambda: schema.serialize(obj))
+            hooks_dec = measure(lambda: hooks.deserialize(hooks_payload))
+            schema_dec = measure(lambda: schema.deserialize(schema_payload))
+            print(
+                f"{name:<10}{depth:>6}  {hooks_enc:>12.1f} / {schema_enc:<11.1f}  "
+                f"{hooks_dec:>12.1f} / {schema_dec:<11.1f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
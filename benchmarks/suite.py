@@ -0,0 +1,226 @@
+"""
+Runs a benchmark suite over all the serializer backends and a set of payload shapes.
+
+For each backend/payload combination, this reports the serialization and
+deserialization throughput (operations per second), the size of the serialized payload
+and the peak memory allocated during a single operation (as traced by
+:mod:`tracemalloc`). Combinations where the backend cannot handle the payload (like
+binary data with JSON) are reported as unsupported.
+
+The results can be saved as JSON with ``--output``, and a saved result file can be
+compared against with ``--compare``, so that the throughput of two commits can be
+compared::
+
+    $ git checkout main
+    $ python benchmarks/suite.py --output main.json
+    $ git checkout my-branch
+    $ python benchmarks/suite.py --compare main.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import platform
+import subprocess
+import sys
+import tracemalloc
+from collections.abc import Callable
+from timeit import Timer
+from typing import Any
+
+from asphalt.serialization.api import CustomizableSerializer, Serializer
+from asphalt.serialization.serializers.cbor import CBORSerializer
+from asphalt.serialization.serializers.json import JSONSerializer
+from asphalt.serialization.serializers.msgpack import MsgpackSerializer
+from asphalt.serialization.serializers.pickle import PickleSerializer
+from asphalt.serialization.serializers.yaml import YAMLSerializer
+
+
+class Node:
+    def __init__(self, name: str, value: float, children: list[Node]):
+        self.name = name
+        self.value = value
+        self.children = children
+
+
+def make_small_dict() -> Any:
+    return {"id": 1, "name": "widget", "price": 4.95, "tags": ["a", "b"]}
+
+
+def make_wide_list() -> Any:
+    return [{"id": i, "name": f"item {i}", "active": i % 2 == 0} for i in range(5000)]
+
+
+def make_deep_nesting() -> Any:
+    obj: Any = {"leaf": [1, 2.5, "x"]}
+    for i in range(100):
+        obj = {"level": i, "child": [obj]}
+
+    return obj
+
+
+def make_binary_blob() -> Any:
+    return {"name": "blob", "data": bytes(range(256)) * 4096}
+
+
+def make_custom_types() -> Any:
+    def make_tree(depth: int) -> Node:
+        children = [make_tree(depth - 1) for _ in range(3)] if depth else []
+        return Node(f"node {depth}", depth * 0.5, children)
+
+    return make_tree(6)
+
+
+PAYLOADS: dict[str, Callable[[], Any]] = {
+    "small_dict": make_small_dict,
+    "wide_list": make_wide_list,
+    "deep_nesting": make_deep_nesting,
+    "binary_blob": make_binary_blob,
+    "custom_types": make_custom_types,
+}
+
+BACKENDS: dict[str, Callable[[], Serializer]] = {
+    "cbor": CBORSerializer,
+    "json": JSONSerializer,
+    "json_orjson": lambda: JSONSerializer(engine="orjson"),
+    "msgpack": MsgpackSerializer,
+    "pickle": PickleSerializer,
+    "yaml": YAMLSerializer,
+    "yaml_pyyaml": lambda: YAMLSerializer(engine="pyyaml"),
+}
+
+
+def create_serializer(backend: str) -> Serializer:
+    serializer = BACKENDS[backend]()
+    if isinstance(serializer, CustomizableSerializer):
+        serializer.register_custom_type(Node)
+
+    return serializer
+
+
+def measure_throughput(func: Callable[[], Any], min_time: float) -> float:
+    timer = Timer(func)
+    number, _ = timer.autorange()
+    number = max(1, int(number * min_time / 0.2))
+    best = min(timer.repeat(repeat=3, number=number))
+    return number / best
+
+
+def measure_allocations(func: Callable[[], Any]) -> int:
+    tracemalloc.start()
+    try:
+        func()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def run_benchmark(backend: str, payload_name: str, min_time: float) -> dict[str, Any]:
+    serializer = create_serializer(backend)
+    obj = PAYLOADS[payload_name]()
+    try:
+        payload = serializer.serialize(obj)
+        serializer.deserialize(payload)
+    except Exception as exc:
+        return {"error": f"{exc.__class__.__name__}: {exc}"}
+
+    def serialize() -> Any:
+        return serializer.serialize(obj)
+
+    def deserialize() -> Any:
+        return serializer.deserialize(payload)
+
+    return {
+        "serialize_ops": measure_throughput(serialize, min_time),
+        "deserialize_ops": measure_throughput(deserialize, min_time),
+        "bytes": len(payload),
+        "serialize_alloc": measure_allocations(serialize),
+        "deserialize_alloc": measure_allocations(deserialize),
+    }
+
+
+def get_commit() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            check=True,
+            text=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def format_ops(
+    result: dict[str, Any], baseline: dict[str, Any] | None, key: str
+) -> str:
+    value = result[key]
+    text = f"{value:.0f}" if value >= 100 else f"{value:.2f}"
+    if baseline and key in baseline:
+        text += f" ({(value / baseline[key] - 1) * 100:+.0f}%)"
+
+    return text
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument(
+        "--backends", nargs="+", choices=list(BACKENDS), default=list(BACKENDS)
+    )
+    parser.add_argument(
+        "--payloads", nargs="+", choices=list(PAYLOADS), default=list(PAYLOADS)
+    )
+    parser.add_argument(
+        "--min-time",
+        type=float,
+        default=0.2,
+        help="approximate minimum duration of each timing run, in seconds",
+    )
+    parser.add_argument("--output", help="save the results as JSON to this file")
+    parser.add_argument("--compare", help="compare against the results in this file")
+    args = parser.parse_args()
+
+    baseline: dict[str, Any] = {}
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)["results"]
+
+    print(
+        f"{'backend':<12}{'payload':<14}{'ser ops/s':>20}{'deser ops/s':>20}"
+        f"{'bytes/op':>10}{'ser alloc':>11}{'deser alloc':>12}"
+    )
+    results: dict[str, Any] = {}
+    for backend in args.backends:
+        for payload_name in args.payloads:
+            key = f"{backend}/{payload_name}"
+            result = results[key] = run_benchmark(backend, payload_name, args.min_time)
+            if "error" in result:
+                print(f"{backend:<12}{payload_name:<14}unsupported ({result['error']})")
+                continue
+
+            previous = baseline.get(key)
+            serialize_ops = format_ops(result, previous, "serialize_ops")
+            deserialize_ops = format_ops(result, previous, "deserialize_ops")
+            print(
+                f"{backend:<12}{payload_name:<14}{serialize_ops:>20}"
+                f"{deserialize_ops:>20}{result['bytes']:>10}"
+                f"{result['serialize_alloc']:>11}{result['deserialize_alloc']:>12}"
+            )
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(
+                {
+                    "commit": get_commit(),
+                    "python": sys.version.split()[0],
+                    "platform": platform.platform(),
+                    "results": results,
+                },
+                f,
+                indent=2,
+            )
+
+
+if __name__ == "__main__":
+    main()
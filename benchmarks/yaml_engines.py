@@ -0,0 +1,79 @@
+"""
+Compares the ruamel.yaml and PyYAML engines of the YAML serializer against the previous
+implementation (which serialized into a text buffer and encoded the result afterwards),
+for single documents and multi-document streams.
+"""
+
+from __future__ import annotations
+
+from collections.abc import Callable
+from io import BytesIO, StringIO
+from timeit import repeat
+from typing import Any
+
+from asphalt.serialization.serializers.yaml import YAMLSerializer
+
+NUMBER = 20
+ENGINES = ["ruamel", "pyyaml"]
+
+
+def create_payloads() -> dict[str, Any]:
+    return {
+        "small dict": {"id": 1, "name": "åäö", "active": True, "score": 5.06},
+        "config": {
+            f"service-{i}": {
+                "host": f"10.0.0.{i}",
+                "port": 8000 + i,
+                "tags": ["a", "b", "c"],
+                "limits": {"rps": i * 10, "burst": i * 20},
+            }
+            for i in range(50)
+        },
+        "records": [
+            {"id": i, "name": f"user-{i}", "tags": ["a", "b", "c"], "score": i / 3}
+            for i in range(100)
+        ],
+    }
+
+
+def measure(func: Callable[[], Any]) -> float:
+    return min(repeat(func, number=NUMBER, repeat=5)) / NUMBER * 1e6
+
+
+def main() -> None:
+    from ruamel.yaml import YAML
+
+    legacy_yaml = YAML(typ="safe")
+
+    def legacy_serialize(obj: Any) -> bytes:
+        buffer = StringIO()
+        legacy_yaml.dump(obj, buffer)
+        return buffer.getvalue().encode("utf-8")
+
+    serializers = {engine: YAMLSerializer(engine=engine) for engine in ENGINES}
+    print(f"{'payload':<12}{'engine':>8}  {'serialize µs':>13}  {'deserialize µs':>15}")
+    for name, obj in create_payloads().items():
+        payload = legacy_serialize(obj)
+        encode = measure(lambda: legacy_serialize(obj))
+        decode = measure(lambda: legacy_yaml.load(payload))
+        print(f"{name:<12}{'legacy':>8}  {encode:>13.1f}  {decode:>15.1f}")
+        for engine, serializer in serializers.items():
+            payload = serializer.serialize(obj)
+            encode = measure(lambda: serializer.serialize(obj))
+            decode = measure(lambda: serializer.deserialize(payload))
+            print(f"{name:<12}{engine:>8}  {encode:>13.1f}  {decode:>15.1f}")
+
+    docs = list(create_payloads()["records"])
+    print()
+    print(f"{'documents':<12}{'engine':>8}  {'dump_all µs':>13}  {'load_all µs':>15}")
+    for engine, serializer in serializers.items():
+        buffer = BytesIO()
+        serializer.dump_all(docs, buffer)
+        stream = buffer.getvalue()
+        encode = measure(lambda: serializer.dump_all(docs, BytesIO()))
+        decode = measure(lambda: list(serializer.load_all(BytesIO(stream))))
+        print(f"{len(docs):<12}{engine:>8}  {encode:>13.1f}  {decode:>15.1f}")
+
+
+if __name__ == "__main__":
+    main()
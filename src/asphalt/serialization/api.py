@@ -2,23 +2,94 @@ from __future__ import annotations
 
 import sys
 from abc import ABCMeta, abstractmethod
-from collections.abc import Callable
-from inspect import signature
-from typing import Any, Generic, TypeVar
-
-from asphalt.core import qualified_name
-
-from .marshalling import default_marshaller, default_unmarshaller
+from collections.abc import Callable, Iterable, Iterator, Mapping, Sequence
+from struct import Struct
+from typing import IO, TYPE_CHECKING, Any, Generic, TypeVar
+
+from .marshalling import (
+    _compile_loader,
+    _Converter,
+    _identity,
+    compile_marshallers,
+    compile_schema_marshallers,
+    default_marshaller,
+    default_unmarshaller,
+)
 
 if sys.version_info >= (3, 10):
     from typing import TypeAlias
 else:
     from typing_extensions import TypeAlias
 
+if TYPE_CHECKING:
+    from mmap import mmap
+
+    from anyio.abc import ByteReceiveStream, ByteSendStream
+
 T_Serializer = TypeVar("T_Serializer", bound="CustomizableSerializer")
 T_Type = TypeVar("T_Type")
 MarshallCallback: TypeAlias = "Callable[[Any], Any]"
 UnmarshallCallback: TypeAlias = "Callable[[Any, Any], None] | Callable[[Any], Any]"
+BytesLike: TypeAlias = "bytes | bytearray | memoryview | mmap"
+
+#: the length prefix preceding each serialized object in a batch payload
+BATCH_LENGTH_PREFIX = Struct(">I")
+
+
+def split_batch(payload: BytesLike) -> Iterator[memoryview]:
+    """
+    Split a payload produced by :meth:`Serializer.serialize_batch` into the serialized
+    payloads of the individual objects.
+
+    :param payload: the batch payload
+    :return: an iterator yielding views to the payloads of the individual objects
+    :raises ValueError: if the batch payload is truncated
+
+    """
+    prefix_size = BATCH_LENGTH_PREFIX.size
+    unpack_length = BATCH_LENGTH_PREFIX.unpack_from
+    view = memoryview(payload)
+    total_size = len(view)
+    offset = 0
+    while offset < total_size:
+        if offset + prefix_size > total_size:
+            raise ValueError("truncated batch payload")
+
+        (length,) = unpack_length(view, offset)
+        offset += prefix_size
+        end = offset + length
+        if end > total_size:
+            raise ValueError("truncated batch payload")
+
+        yield view[offset:end]
+        offset = end
+
+
+def write_into(out: bytearray | memoryview, payload: bytes | memoryview) -> int:
+    """
+    Append the payload to a :class:`bytearray`, or write it at the start of a writable
+    :class:`memoryview`.
+
+    This is meant for implementing :meth:`Serializer.serialize_into`.
+
+    :param out: the buffer to write to
+    :param payload: the serialized payload
+    :return: the number of bytes written
+    :raises ValueError: if the payload does not fit in the memoryview
+
+    """
+    size = len(payload)
+    if isinstance(out, bytearray):
+        out += payload
+    elif size > out.nbytes:
+        raise ValueError(
+            f"the buffer is too small ({out.nbytes} bytes) for the payload "
+            f"({size} bytes)"
+        )
+    else:
+        out[:size] = payload
+
+    return size
 
 
 class Serializer(metaclass=ABCMeta):
@@ -36,6 +107,19 @@ class Serializer(metaclass=ABCMeta):
 
     A subclass may support a wider range of types, along with hooks to provide
     serialization support for custom types.
+
+    The deserialization methods accept any bytes-like object (such as
+    :class:`bytearray`, :class:`memoryview` or :class:`mmap.mmap`) as the payload, and
+    avoid copying it where the underlying library allows.
+
+    The streaming methods (:meth:`dump`, :meth:`load`, :meth:`dump_async` and
+    :meth:`load_async`) fall back to :meth:`serialize` and :meth:`deserialize`, but
+    subclasses should override them if the underlying library can stream natively.
+    The same goes for :meth:`serialize_into` and the batch methods
+    (:meth:`serialize_many`, :meth:`deserialize_many`, :meth:`serialize_batch` and
+    :meth:`deserialize_batch`) which subclasses can override to reuse the same encoder
+    or decoder for the whole batch, and :meth:`serialize_parts` which subclasses can
+    override to return large binary fields as separate buffers without copying them.
     """
 
     __slots__ = ()
@@ -45,9 +129,160 @@ class Serializer(metaclass=ABCMeta):
         """Serialize a Python object into bytes."""
 
     @abstractmethod
-    def deserialize(self, payload: bytes) -> Any:
+    def deserialize(self, payload: BytesLike) -> Any:
         """Deserialize bytes into a Python object."""
 
+    def serialize_into(self, obj: Any, out: bytearray | memoryview) -> int:
+        """
+        Serialize a Python object into a caller-owned buffer.
+
+        If ``out`` is a :class:`bytearray`, the serialized payload is appended to it.
+        If it is a writable :class:`memoryview` of bytes, the payload is written at its
+        start.
+
+        :param obj: the object to serialize
+        :param out: the buffer to write the payload to
+        :return: the number of bytes written
+        :raises ValueError: if the payload does not fit in the memoryview
+
+        """
+        return write_into(out, self.serialize(obj))
+
+    def serialize_many(self, objs: Iterable[Any]) -> list[bytes]:
+        """
+        Serialize each of the given Python objects into bytes.
+
+        :param objs: the objects to serialize
+        :return: a list of serialized payloads, in the same order as ``objs``
+
+        """
+        serialize = self.serialize
+        return [serialize(obj) for obj in objs]
+
+    def deserialize_many(self, payloads: Iterable[BytesLike]) -> list[Any]:
+        """
+        Deserialize each of the given payloads into a Python object.
+
+        :param payloads: the payloads to deserialize
+        :return: a list of deserialized objects, in the same order as ``payloads``
+
+        """
+        deserialize = self.deserialize
+        return [deserialize(payload) for payload in payloads]
+
+    def serialize_batch(self, objs: Iterable[Any]) -> bytes:
+        """
+        Serialize the given Python objects into a single payload.
+
+        Each serialized object is preceded by its length as a 32-bit unsigned big
+        endian integer (:data:`BATCH_LENGTH_PREFIX`).
+
+        :param objs: the objects to serialize
+        :return: the batch payload
+
+        """
+        pack_length = BATCH_LENGTH_PREFIX.pack
+        return b"".join(
+            pack_length(len(payload)) + payload for payload in self.serialize_many(objs)
+        )
+
+    def deserialize_batch(self, payload: BytesLike) -> list[Any]:
+        """
+        Deserialize a payload produced by :meth:`serialize_batch`.
+
+        :param payload: the batch payload
+        :return: a list of deserialized objects
+        :raises ValueError: if the batch payload is truncated
+
+        """
+        return self.deserialize_many(split_batch(payload))
+
+    def serialize_parts(self, obj: Any) -> list[bytes | bytearray | memoryview]:
+        """
+        Serialize a Python object into a list of buffers.
+
+        The buffers can be written with a single scatter/gather call (like
+        :meth:`socket.socket.sendmsg` or :func:`os.writev`). Serializers that support
+        this natively return large binary fields (:class:`bytes` and the like) of the
+        object as separate buffers which refer to the original objects, rather than
+        copying them into the payload, so they must not be modified until the buffers
+        have been sent.
+
+        Unless otherwise noted by the serializer, the buffers concatenated together are
+        identical to the payload produced by :meth:`serialize`, so the receiving side
+        can also pass them to :meth:`deserialize` once it has joined them.
+
+        The default implementation returns the output of :meth:`serialize` as the only
+        buffer.
+
+        :param obj: the object to serialize
+        :return: a list of bytes-like objects
+
+        """
+        return [self.serialize(obj)]
+
+    def deserialize_parts(self, parts: Sequence[Any]) -> Any:
+        """
+        Deserialize a Python object from a list of buffers produced by
+        :meth:`serialize_parts`.
+
+        :param parts: a sequence of bytes-like objects
+        :return: the deserialized object
+
+        """
+        if len(parts) == 1:
+            return self.deserialize(parts[0])
+
+        return self.deserialize(b"".join(parts))
+
+    def dump(self, obj: Any, fp: IO[bytes]) -> None:
+        """
+        Serialize a Python object into a binary file-like object.
+
+        :param obj: the object to serialize
+        :param fp: a file-like object opened in binary mode
+
+        """
+        fp.write(self.serialize(obj))
+
+    def load(self, fp: IO[bytes]) -> Any:
+        """
+        Deserialize a Python object from a binary file-like object.
+
+        The default implementation reads the file until its end, so the file must not
+        contain anything past the serialized object. Serializers that override this
+        may read only the one object, leaving the file positioned at the start of the
+        next one.
+
+        :param fp: a file-like object opened in binary mode
+        :return: the deserialized object
+
+        """
+        return self.deserialize(fp.read())
+
+    async def dump_async(self, obj: Any, stream: ByteSendStream) -> None:
+        """
+        Serialize a Python object into an asynchronous byte stream.
+
+        :param obj: the object to serialize
+        :param stream: an AnyIO compatible byte stream
+
+        """
+        await stream.send(self.serialize(obj))
+
+    async def load_async(self, stream: ByteReceiveStream) -> Any:
+        """
+        Deserialize a Python object from an asynchronous byte stream.
+
+        The stream is read until it is closed by the sending side.
+
+        :param stream: an AnyIO compatible byte stream
+        :return: the deserialized object
+
+        """
+        chunks = [chunk async for chunk in stream]
+        return self.deserialize(b"".join(chunks))
+
     @property
     @abstractmethod
     def mimetype(self) -> str:
@@ -60,20 +295,120 @@ class CustomizableSerializer(Serializer):
     serializer so that the serializer can be extended to (de)serialize a broader array
     of classes.
 
-    :ivar marshallers: a mapping of class -> (typename, marshaller callback)
+    Custom types can be given integer type IDs (explicitly, or via
+    :meth:`register_type_ids`) which are then written to the serialized data instead of
+    the type names, making the payloads more compact. Payloads containing type names
+    can still be deserialized.
+
+    Custom types registered with ``wrap_state=False`` are serialized without the
+    wrapper that identifies their type, so they're deserialized as their plain
+    marshalled state. If the receiving side knows the expected type, it can pass it
+    as ``into`` to :meth:`deserialize` (or :meth:`unmarshal_into`) to restore the
+    objects anyway. This makes it possible to leave out the wrappers entirely when
+    both sides agree on the types of the payloads.
+
+    :ivar marshallers: a mapping of class -> (type ID or typename, marshaller callback)
     :vartype marshallers: Dict[str, Callable]
-    :ivar unmarshallers: a mapping of class -> (typename, unmarshaller callback)
+    :ivar unmarshallers: a mapping of type ID or typename -> (class, unmarshaller
+        callback)
     :vartype unmarshallers: Dict[str, Callable]
+    :ivar type_ids: a mapping of typename -> type ID
+    :vartype type_ids: Dict[str, int]
     """
 
-    __slots__ = ("custom_type_codec", "marshallers", "unmarshallers")
+    __slots__ = (
+        "custom_type_codec",
+        "marshallers",
+        "unmarshallers",
+        "type_ids",
+        "_loaders",
+        "_registrations",
+    )
 
     def __init__(self: T_Serializer, custom_type_codec: CustomTypeCodec[T_Serializer]):
-        self.custom_type_codec: CustomTypeCodec[T_Serializer] = custom_type_codec
-        self.marshallers: dict[type, tuple[str, MarshallCallback, bool]] = {}
+        self.custom_type_codec: CustomTypeCodec[Any] = custom_type_codec
+        self.marshallers: dict[type, tuple[str | int, MarshallCallback, bool]] = {}
         self.unmarshallers: dict[
-            str, tuple[type[object] | None, UnmarshallCallback]
+            str | int, tuple[type[object] | None, UnmarshallCallback]
         ] = {}
+        self.type_ids: dict[str, int] = {}
+        self._loaders: dict[Any, Callable[[Any], Any]] = {}
+        self._registrations = 0
+
+    @abstractmethod
+    def deserialize(self, payload: BytesLike, into: Any = None) -> Any:
+        """
+        Deserialize bytes into a Python object.
+
+        :param payload: a bytes-like object to deserialize
+        :param into: if given, the deserialized object is converted to this type with
+            :meth:`unmarshal_into`
+        :return: the deserialized object
+
+        """
+
+    def unmarshal_into(self, obj: Any, into: Any) -> Any:
+        """
+        Convert a deserialized object to the given type.
+
+        The target type can be a registered custom type, a dataclass, or a list, tuple,
+        set, dict (values only) or optional value of these (like ``list[Point]``),
+        nested to any depth. Registered custom types are restored from their
+        marshalled state using their unmarshallers, and other dataclasses are restored
+        field by field, based on their type annotations (as with ``schema=True`` in
+        :meth:`register_custom_type`). Objects that are already instances of the
+        target class, and values of any other types, are returned as is.
+
+        The conversion is compiled into a specialized function on the first call for
+        each target type, and reused on later calls.
+
+        :param obj: a deserialized object
+        :param into: the type to convert the object to
+        :return: the converted object
+
+        """
+        try:
+            load = self._loaders[into]
+        except KeyError:
+            load = self._loaders[into] = _compile_loader(into, self._resolve_loader)
+
+        return load(obj)
+
+    def _resolve_loader(self, cls: type) -> _Converter | None:
+        entry = self.marshallers.get(cls)
+        if entry is not None:
+            typename: str | int = entry[0]
+        else:
+            from asphalt.core import qualified_name
+
+            typename = qualified_name(cls)
+
+        try:
+            target_cls, unmarshaller = self.unmarshallers[typename]
+        except KeyError:
+            return None
+
+        callback: Any = unmarshaller
+        if target_cls is None:
+
+            def load(state: Any) -> Any:
+                if isinstance(state, cls):
+                    return state
+
+                return callback(state)
+
+        else:
+            target: type[object] = target_cls
+
+            def load(state: Any) -> Any:
+                if isinstance(state, cls):
+                    return state
+
+                instance = target.__new__(target)
+                callback(instance, state)
+                return instance
+
+        return _identity, load
 
     def register_custom_type(
         self: T_Serializer,
@@ -83,6 +418,9 @@ class CustomizableSerializer(Serializer):
         *,
         typename: str | None = None,
         wrap_state: bool = True,
+        compiled: bool = False,
+        schema: bool = False,
+        type_id: int | None = None,
     ) -> None:
         """
         Register a marshaller and/or unmarshaller for the given class.
@@ -108,22 +446,116 @@ class CustomizableSerializer(Serializer):
         :param wrap_state: ``True`` to wrap the marshalled state before serialization so
             that it can be recognized later for unmarshalling, ``False`` to serialize it
             as is
+        :param compiled: ``True`` to replace the default marshaller and unmarshaller
+            with ones specialized for the class (see
+            :func:`~asphalt.serialization.marshalling.compile_marshallers`)
+        :param schema: ``True`` to replace the default marshaller and unmarshaller
+            with ones generated from the type annotations of the class, which also
+            convert nested dataclasses (see
+            :func:`~asphalt.serialization.marshalling.compile_schema_marshallers`)
+        :param type_id: a unique, non-negative integer to identify the type with in
+            the serialized data (defaults to the ID given to the type name via
+            :meth:`register_type_ids`, if any)
+        :raises ValueError: if the type ID is invalid or already in use by another
+            type
 
         """
-        typename = typename or qualified_name(cls)
+        if not typename:
+            from asphalt.core import qualified_name
+
+            typename = qualified_name(cls)
+
+        if type_id is not None:
+            self._add_type_id(typename, type_id)
+        else:
+            type_id = self.type_ids.get(typename)
+
+        if compiled or schema:
+            compiled_marshaller: MarshallCallback
+            compiled_unmarshaller: UnmarshallCallback
+            if schema:
+                compiled_marshaller, compiled_unmarshaller = compile_schema_marshallers(
+                    cls
+                )
+            else:
+                compiled_marshaller, compiled_unmarshaller = compile_marshallers(cls)
+
+            if marshaller is default_marshaller:
+                marshaller = compiled_marshaller
+            if unmarshaller is default_unmarshaller:
+                unmarshaller = compiled_unmarshaller
 
         if marshaller:
-            self.marshallers[cls] = typename, marshaller, wrap_state
+            type_key = typename if type_id is None else type_id
+            self.marshallers[cls] = type_key, marshaller, wrap_state
             self.custom_type_codec.register_object_encoder_hook(self)
 
         if unmarshaller and self.custom_type_codec is not None:
+            from inspect import signature
+
             target_cls: type | None = cls
             if len(signature(unmarshaller).parameters) == 1:
                 target_cls = None
 
             self.unmarshallers[typename] = target_cls, unmarshaller
+            if type_id is not None:
+                self.unmarshallers[type_id] = target_cls, unmarshaller
+
             self.custom_type_codec.register_object_decoder_hook(self)
 
+        self._loaders.clear()
+        self._registrations += 1
+
+    def register_type_ids(self: T_Serializer, type_ids: Mapping[str, int]) -> None:
+        """
+        Assign integer type IDs to type names.
+
+        The IDs are applied to both the already registered custom types and the ones
+        registered later. This can be used to load the type IDs from a manifest shared
+        by all the parties exchanging serialized data.
+
+        :param type_ids: a mapping of typename -> type ID
+        :raises ValueError: if a type ID is invalid or already in use by another type
+
+        """
+        for typename, type_id in type_ids.items():
+            self._add_type_id(typename, type_id)
+
+        for cls, (type_key, marshaller, wrap_state) in list(self.marshallers.items()):
+            if isinstance(type_key, str) and type_key in type_ids:
+                self.marshallers[cls] = type_ids[type_key], marshaller, wrap_state
+
+        for typename, type_id in type_ids.items():
+            if typename in self.unmarshallers:
+                self.unmarshallers[type_id] = self.unmarshallers[typename]
+
+        if self.marshallers:
+            self.custom_type_codec.register_object_encoder_hook(self)
+
+        if self.unmarshallers:
+            self.custom_type_codec.register_object_decoder_hook(self)
+
+        self._loaders.clear()
+        self._registrations += 1
+
+    def _add_type_id(self, typename: str, type_id: int) -> None:
+        if isinstance(type_id, bool) or not isinstance(type_id, int) or type_id < 0:
+            raise ValueError(f"type ID must be a non-negative integer, not {type_id!r}")
+
+        existing_type_id = self.type_ids.get(typename)
+        if existing_type_id is not None and existing_type_id != type_id:
+            raise ValueError(
+                f'type "{typename}" already has the type ID {existing_type_id}'
+            )
+
+        for other_typename, other_type_id in self.type_ids.items():
+            if other_type_id == type_id and other_typename != typename:
+                raise ValueError(
+                    f'type ID {type_id} is already in use by type "{other_typename}"'
+                )
+
+        self.type_ids[typename] = type_id
+
 
 class CustomTypeCodec(Generic[T_Serializer]):
     """Interface for customizing how custom types are encoded and decoded."""
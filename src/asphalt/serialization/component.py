@@ -1,18 +1,39 @@
 from __future__ import annotations
 
 import logging
-from typing import Any
+from typing import TYPE_CHECKING, Any
 
-from asphalt.core import Component, Context, PluginContainer
+from asphalt.core import Component, Context, PluginContainer, resolve_reference
 
 from .api import CustomizableSerializer, Serializer
+from .metrics import InMemoryMetrics, InstrumentedSerializer, MetricsSink
+
+if TYPE_CHECKING:
+    serializer_types: PluginContainer
 
-serializer_types: PluginContainer = PluginContainer(
-    "asphalt.serialization.serializers", Serializer
-)
 logger = logging.getLogger(__name__)
 
 
+def _load_serializer_types() -> PluginContainer:
+    # The entry points are scanned when the container is first needed, rather than
+    # when this module is imported
+    global serializer_types
+    try:
+        return serializer_types
+    except NameError:
+        serializer_types = PluginContainer(
+            "asphalt.serialization.serializers", Serializer
+        )
+        return serializer_types
+
+
+def __getattr__(name: str) -> Any:
+    if name == "serializer_types":
+        return _load_serializer_types()
+
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
 class SerializationComponent(Component):
     """
     Creates a serializer resource.
@@ -24,10 +45,22 @@ class SerializationComponent(Component):
       implements it)
     * its actual type
 
+    If metrics are enabled, the serializer is wrapped in an
+    :class:`~asphalt.serialization.metrics.InstrumentedSerializer` which is published
+    as :class:`~asphalt.serialization.api.Serializer` and
+    :class:`~asphalt.serialization.metrics.InstrumentedSerializer` instead, while the
+    wrapped serializer is still published as its actual type (and
+    :class:`~asphalt.serialization.api.CustomizableSerializer`) for registering custom
+    types. The metrics sink is published as
+    :class:`~asphalt.serialization.metrics.MetricsSink` and its actual type.
+
     :param backend: the name of the serializer backend
     :param resource_name: the name of the serializer resource
     :param options: a dictionary of keyword arguments passed to the serializer backend
         class
+    :param metrics: a metrics sink (or a ``module:varname`` reference to one) to report
+        serialization metrics to, or ``True`` to aggregate them in an
+        :class:`~asphalt.serialization.metrics.InMemoryMetrics`
     """
 
     def __init__(
@@ -35,16 +68,38 @@ class SerializationComponent(Component):
         backend: str,
         resource_name: str = "default",
         options: dict[str, Any] | None = None,
+        metrics: MetricsSink | str | bool = False,
     ):
         options = options or {}
         self.resource_name = resource_name
-        self.serializer: Serializer = serializer_types.create_object(backend, **options)
+        self.serializer: Serializer = _load_serializer_types().create_object(
+            backend, **options
+        )
+        self.metrics: MetricsSink | None = None
+        if metrics is True:
+            self.metrics = InMemoryMetrics()
+        elif metrics:
+            self.metrics = resolve_reference(metrics)
 
     async def start(self, ctx: Context) -> None:
         types: list[type] = [Serializer, type(self.serializer)]
         if isinstance(self.serializer, CustomizableSerializer):
             types.append(CustomizableSerializer)
 
+        if self.metrics is not None:
+            instrumented = InstrumentedSerializer(self.serializer, self.metrics)
+            ctx.add_resource(
+                instrumented,
+                self.resource_name,
+                types=[Serializer, InstrumentedSerializer],
+            )
+            ctx.add_resource(
+                self.metrics,
+                self.resource_name,
+                types=[MetricsSink, type(self.metrics)],
+            )
+            types.remove(Serializer)
+
         ctx.add_resource(self.serializer, self.resource_name, types=types)
         logger.info(
             "Configured serializer (%s; type=%s)",
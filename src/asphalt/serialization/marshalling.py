@@ -1,8 +1,18 @@
 from __future__ import annotations
 
-from typing import Any
-
-from asphalt.core import qualified_name
+import types
+from dataclasses import fields, is_dataclass
+from operator import attrgetter
+from typing import (
+    Any,
+    Callable,
+    Optional,
+    Tuple,
+    Union,
+    get_args,
+    get_origin,
+    get_type_hints,
+)
 
 
 def default_marshaller(obj: Any) -> Any:
@@ -22,6 +32,8 @@ def default_marshaller(obj: Any) -> Any:
     try:
         return obj.__dict__
     except AttributeError:
+        from asphalt.core import qualified_name
+
         raise TypeError(
             f"{qualified_name(obj.__class__)!r} has no __dict__ attribute and does not "
             f"implement __getstate__()"
@@ -46,7 +58,309 @@ def default_unmarshaller(instance: Any, state: Any) -> None:
         try:
             instance.__dict__.update(state)
         except AttributeError:
+            from asphalt.core import qualified_name
+
             raise TypeError(
                 f"{qualified_name(instance.__class__)!r} has no __dict__ attribute and "
                 f"does not implement __setstate__()"
             ) from None
+
+
+def _get_field_names(cls: type) -> list[str]:
+    if is_dataclass(cls):
+        return [field.name for field in fields(cls)]
+
+    attrs_attributes = getattr(cls, "__attrs_attrs__", None)
+    if attrs_attributes is not None:
+        return [attribute.name for attribute in attrs_attributes]
+
+    names: list[str] = []
+    for base in reversed(cls.__mro__[:-1]):
+        slots = base.__dict__.get("__slots__")
+        if slots is None:
+            from asphalt.core import qualified_name
+
+            raise TypeError(
+                f"cannot compile marshallers for {qualified_name(cls)!r}: it is not a "
+                f"dataclass or an attrs class, and not all of its classes define "
+                f"__slots__"
+            )
+
+        for name in (slots,) if isinstance(slots, str) else slots:
+            if name in ("__dict__", "__weakref__"):
+                continue
+            elif name.startswith("__") and not name.endswith("__"):
+                name = f"_{base.__name__.lstrip('_')}{name}"
+
+            if name not in names:
+                names.append(name)
+
+    return names
+
+
+def compile_marshallers(
+    cls: type,
+) -> tuple[Callable[[Any], Any], Callable[[Any, Any], None]]:
+    """
+    Create a marshaller and an unmarshaller specialized for the given class.
+
+    The class must be a dataclass, an attrs class or a class that (along with all its
+    superclasses) defines ``__slots__``. The field names are looked up once, and the
+    marshalled state is a tuple of the field values in a fixed order, which is more
+    compact than a dict and does not require inspecting each object.
+
+    The unmarshaller sets the attributes using :meth:`object.__setattr__`, so it also
+    works with frozen dataclasses and attrs classes.
+
+    .. note:: The generated callbacks cannot be pickled, so they cannot be used with
+        process pools in :class:`~.serializers.offload.OffloadingSerializer`.
+
+    :param cls: the class to create the marshaller and unmarshaller for
+    :return: a tuple of (marshaller, unmarshaller)
+    :raises TypeError: if the fields of the class cannot be determined
+
+    """
+    names = _get_field_names(cls)
+    marshaller: Callable[[Any], Any]
+    if len(names) == 1:
+        get_value = attrgetter(names[0])
+
+        def marshaller(obj: Any) -> Any:
+            return (get_value(obj),)
+
+    elif names:
+        marshaller = attrgetter(*names)
+    else:
+
+        def marshaller(obj: Any) -> Any:
+            return ()
+
+    variables = [f"v{index}" for index in range(len(names))]
+    lines = [
+        "def unmarshaller(instance, state):",
+        f"    [{', '.join(variables)}] = state",
+    ]
+    lines += [
+        f"    setattr(instance, {name!r}, {variable})"
+        for name, variable in zip(names, variables)
+    ]
+    namespace: dict[str, Any] = {"setattr": object.__setattr__}
+    exec("\n".join(lines), namespace)
+    return marshaller, namespace["unmarshaller"]
+
+
+# Evaluated at runtime, so these must use the typing generics on Python 3.8
+_Converter = Tuple[Callable[[Any], Any], Callable[[Any], Any]]
+_Resolver = Callable[[type], Optional[_Converter]]
+_union_types: tuple[Any, ...] = (Union,)
+if hasattr(types, "UnionType"):
+    _union_types += (types.UnionType,)
+
+
+class _SchemaPlan:
+    __slots__ = "dump", "load"
+
+    dump: Callable[[Any], Any]
+    load: Callable[[Any], Any]
+
+
+def _compile_converter(
+    annotation: Any, plans: dict[type, _SchemaPlan], resolve: _Resolver | None = None
+) -> _Converter | None:
+    # Returns None if values of this type can be passed through as is. The resolver, if
+    # given, gets the first chance to provide a converter for each class.
+    if resolve is not None and isinstance(annotation, type):
+        converter = resolve(annotation)
+        if converter is not None:
+            return converter
+
+    if isinstance(annotation, type) and is_dataclass(annotation):
+        plan = _compile_plan(annotation, plans, resolve)
+        return (lambda value: plan.dump(value)), (lambda state: plan.load(state))
+
+    if (
+        isinstance(annotation, type)
+        and issubclass(annotation, dict)
+        and hasattr(annotation, "__total__")
+    ):
+        # TypedDict
+        hints = get_type_hints(annotation)
+        converters: dict[str, _Converter] = {}
+        for key, hint in hints.items():
+            converter = _compile_converter(hint, plans, resolve)
+            if converter is not None:
+                converters[key] = converter
+
+        if not converters:
+            return None
+
+        def dump_typeddict(value: dict[str, Any]) -> dict[str, Any]:
+            result = dict(value)
+            for key, (dump, _load) in converters.items():
+                if key in result:
+                    result[key] = dump(result[key])
+
+            return result
+
+        def load_typeddict(state: dict[str, Any]) -> dict[str, Any]:
+            for key, (_dump, load) in converters.items():
+                if key in state:
+                    state[key] = load(state[key])
+
+            return state
+
+        return dump_typeddict, load_typeddict
+
+    origin = get_origin(annotation)
+    args = get_args(annotation)
+    if origin in _union_types:
+        non_none_args = [arg for arg in args if arg is not type(None)]
+        if len(non_none_args) != 1:
+            return None
+
+        converter = _compile_converter(non_none_args[0], plans, resolve)
+        if converter is None:
+            return None
+
+        dump, load = converter
+        return (
+            lambda value: None if value is None else dump(value),
+            lambda state: None if state is None else load(state),
+        )
+    elif origin is list:
+        converter = _compile_converter(args[0], plans, resolve) if args else None
+        if converter is None:
+            return None
+
+        dump, load = converter
+        return (
+            lambda value: [dump(item) for item in value],
+            lambda state: [load(item) for item in state],
+        )
+    elif origin in (set, frozenset) or (origin is tuple and args[1:] == (...,)):
+        # These are always converted, as they're decoded as lists
+        container_type = origin
+        converter = _compile_converter(args[0], plans, resolve) if args else None
+        if converter is None:
+            return list, container_type
+
+        dump, load = converter
+        return (
+            lambda value: [dump(item) for item in value],
+            lambda state: container_type(load(item) for item in state),
+        )
+    elif origin is tuple and args and args != ((),):
+        item_converters = [
+            _compile_converter(arg, plans, resolve) or (_identity, _identity)
+            for arg in args
+        ]
+        return (
+            lambda value: [
+                dump(item) for (dump, _load), item in zip(item_converters, value)
+            ],
+            lambda state: tuple(
+                load(item) for (_dump, load), item in zip(item_converters, state)
+            ),
+        )
+    elif origin is dict:
+        converter = _compile_converter(args[1], plans, resolve) if args else None
+        if converter is None:
+            return None
+
+        dump, load = converter
+        return (
+            lambda value: {key: dump(item) for key, item in value.items()},
+            lambda state: {key: load(item) for key, item in state.items()},
+        )
+
+    return None
+
+
+def _identity(value: Any) -> Any:
+    return value
+
+
+def _compile_plan(
+    cls: type, plans: dict[type, _SchemaPlan], resolve: _Resolver | None = None
+) -> _SchemaPlan:
+    # The plan is cached before compiling the field converters, so that classes that
+    # refer to themselves (directly or indirectly) get the same plan object
+    plan = plans.get(cls)
+    if plan is not None:
+        return plan
+
+    plan = plans[cls] = _SchemaPlan()
+    hints = get_type_hints(cls)
+    namespace: dict[str, Any] = {"cls": cls, "setattr": object.__setattr__}
+    dump_items: list[str] = []
+    load_lines: list[str] = []
+    for index, field in enumerate(fields(cls)):
+        converter = _compile_converter(hints.get(field.name, Any), plans, resolve)
+        if converter is None:
+            dump_items.append(f"obj.{field.name}")
+            load_lines.append(f"    setattr(instance, {field.name!r}, state[{index}])")
+        else:
+            namespace[f"dump_{index}"], namespace[f"load_{index}"] = converter
+            dump_items.append(f"dump_{index}(obj.{field.name})")
+            load_lines.append(
+                f"    setattr(instance, {field.name!r}, load_{index}(state[{index}]))"
+            )
+
+    lines = [
+        "def dump(obj):",
+        f"    return [{', '.join(dump_items)}]",
+        "def load(state):",
+        "    instance = cls.__new__(cls)",
+        *load_lines,
+        "    return instance",
+    ]
+    exec("\n".join(lines), namespace)
+    plan.dump = namespace["dump"]
+    plan.load = namespace["load"]
+    return plan
+
+
+def compile_schema_marshallers(
+    cls: type,
+) -> tuple[Callable[[Any], Any], Callable[[Any], Any]]:
+    """
+    Create a marshaller and an unmarshaller for a dataclass, based on its type
+    annotations.
+
+    Like with :func:`compile_marshallers`, the marshalled state is a list of the field
+    values. Additionally, the values of fields annotated as dataclasses or
+    :class:`~typing.TypedDict` types (or lists, tuples, sets or dicts of them, or
+    optional values of these types) are converted to primitives recursively, in the
+    same pass. This means that the serializer only needs to call its custom type hooks
+    for the outermost object, and the nested objects are handled by the (usually C
+    accelerated) encoder and decoder as plain lists and dicts.
+
+    The values of fields with other annotations are passed to the serializer as is.
+
+    .. note:: The field values must match their annotations, as they're converted
+        based on the annotations rather than on their actual types.
+
+    :param cls: a dataclass
+    :return: a tuple of (marshaller, unmarshaller), where the unmarshaller takes the
+        state as its only argument and returns a new instance
+    :raises TypeError: if ``cls`` is not a dataclass
+
+    """
+    if not isinstance(cls, type) or not is_dataclass(cls):
+        from asphalt.core import qualified_name
+
+        raise TypeError(
+            f"cannot compile schema marshallers for {qualified_name(cls)!r}: it is "
+            f"not a dataclass"
+        )
+
+    plan = _compile_plan(cls, {})
+    return plan.dump, plan.load
+
+
+def _compile_loader(
+    annotation: Any, resolve: _Resolver | None = None
+) -> Callable[[Any], Any]:
+    # Returns a function that converts decoded data into the given type
+    converter = _compile_converter(annotation, {}, resolve)
+    return _identity if converter is None else converter[1]
@@ -0,0 +1,383 @@
+from __future__ import annotations
+
+from abc import ABCMeta, abstractmethod
+from bisect import bisect_left
+from collections.abc import Callable, Iterable, Sequence
+from functools import wraps
+from threading import Lock
+from time import perf_counter
+from typing import IO, TYPE_CHECKING, Any
+
+from .api import BytesLike, CustomizableSerializer, Serializer
+
+if TYPE_CHECKING:
+    from anyio.abc import ByteReceiveStream, ByteSendStream
+
+#: default upper bounds (in seconds) of the latency histogram buckets (1 µs - ~1 s)
+DEFAULT_LATENCY_BUCKETS = tuple(1e-6 * 2**exponent for exponent in range(21))
+
+#: default upper bounds (in bytes) of the payload size histogram buckets (16 B - 16 MiB)
+DEFAULT_SIZE_BUCKETS = tuple(2**exponent for exponent in range(4, 25))
+
+
+class MetricsSink(metaclass=ABCMeta):
+    """
+    Interface for receiving measurements from :class:`InstrumentedSerializer`.
+
+    The methods are called synchronously, in the thread that did the
+    (de)serialization, so they should be quick and thread safe.
+    """
+
+    __slots__ = ()
+
+    @abstractmethod
+    def record_call(self, operation: str, duration: float, size: int) -> None:
+        """
+        Record a call to a serializer method.
+
+        :param operation: name of the serializer method (``serialize``,
+            ``deserialize``, ``serialize_many`` etc.)
+        :param duration: time spent in the call (in seconds)
+        :param size: total size of the serialized payload(s) (in bytes), or -1 if not
+            known (like when serializing into a stream)
+
+        """
+
+    @abstractmethod
+    def record_custom_type(
+        self, operation: str, typename: str | int, duration: float
+    ) -> None:
+        """
+        Record a call to the marshaller or unmarshaller of a custom type.
+
+        :param operation: ``marshal`` or ``unmarshal``
+        :param typename: registered name (or type ID) of the custom type
+        :param duration: time spent in the marshaller or unmarshaller (in seconds)
+
+        """
+
+
+class Histogram:
+    """
+    Counts values falling into buckets with fixed upper bounds.
+
+    :ivar int count: number of recorded values
+    :ivar float total: sum of the recorded values
+    :ivar list[int] counts: number of values in each bucket (the last one is for values
+        larger than the last upper bound)
+
+    :param bounds: the (inclusive) upper bounds of the buckets, in ascending order
+    """
+
+    __slots__ = "bounds", "counts", "count", "total"
+
+    def __init__(self, bounds: Sequence[float]):
+        self.bounds = tuple(bounds)
+        self.counts = [0] * (len(self.bounds) + 1)
+        self.count = 0
+        self.total: float = 0
+
+    def add(self, value: float) -> None:
+        """Record a value."""
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.count += 1
+        self.total += value
+
+    def quantile(self, q: float) -> float:
+        """
+        Estimate a quantile of the recorded values.
+
+        :param q: the quantile (between 0 and 1)
+        :return: the upper bound of the bucket containing the quantile (or
+            ``math.inf`` if it's in the last bucket, or 0 if there are no values)
+
+        """
+        if not self.count:
+            return 0
+
+        threshold = q * self.count
+        cumulative = 0
+        for bound, count in zip(self.bounds, self.counts):
+            cumulative += count
+            if cumulative >= threshold:
+                return bound
+
+        return float("inf")
+
+
+class InMemoryMetrics(MetricsSink):
+    """
+    Aggregates measurements in memory.
+
+    :ivar dict[str, Histogram] latencies: histograms of call durations (in seconds),
+        keyed by the operation
+    :ivar dict[str, Histogram] sizes: histograms of payload sizes (in bytes), keyed by
+        the operation
+    :ivar custom_types: a dict of ``(operation, typename)`` tuples to lists of
+        ``[call count, total duration]``
+
+    :param latency_buckets: upper bounds of the latency histogram buckets
+    :param size_buckets: upper bounds of the payload size histogram buckets
+    """
+
+    __slots__ = (
+        "latency_buckets",
+        "size_buckets",
+        "latencies",
+        "sizes",
+        "custom_types",
+        "_lock",
+    )
+
+    def __init__(
+        self,
+        latency_buckets: Sequence[float] = DEFAULT_LATENCY_BUCKETS,
+        size_buckets: Sequence[float] = DEFAULT_SIZE_BUCKETS,
+    ):
+        self.latency_buckets = tuple(latency_buckets)
+        self.size_buckets = tuple(size_buckets)
+        self.latencies: dict[str, Histogram] = {}
+        self.sizes: dict[str, Histogram] = {}
+        self.custom_types: dict[tuple[str, str | int], list[Any]] = {}
+        self._lock = Lock()
+
+    def record_call(self, operation: str, duration: float, size: int) -> None:
+        with self._lock:
+            try:
+                latencies = self.latencies[operation]
+            except KeyError:
+                latencies = self.latencies[operation] = Histogram(self.latency_buckets)
+
+            latencies.add(duration)
+            if size >= 0:
+                try:
+                    sizes = self.sizes[operation]
+                except KeyError:
+                    sizes = self.sizes[operation] = Histogram(self.size_buckets)
+
+                sizes.add(size)
+
+    def record_custom_type(
+        self, operation: str, typename: str | int, duration: float
+    ) -> None:
+        with self._lock:
+            try:
+                stats = self.custom_types[(operation, typename)]
+            except KeyError:
+                self.custom_types[(operation, typename)] = [1, duration]
+            else:
+                stats[0] += 1
+                stats[1] += duration
+
+    def snapshot(self) -> dict[str, Any]:
+        """
+        Return a summary of the measurements so far.
+
+        :return: a dict with the keys ``calls`` (call count, total/p50/p99 duration and
+            total bytes per operation) and ``custom_types`` (call count and total
+            duration per operation and custom type)
+
+        """
+        with self._lock:
+            calls: dict[str, dict[str, Any]] = {}
+            for operation, latencies in self.latencies.items():
+                sizes = self.sizes.get(operation)
+                calls[operation] = {
+                    "count": latencies.count,
+                    "total_time": latencies.total,
+                    "p50": latencies.quantile(0.5),
+                    "p99": latencies.quantile(0.99),
+                    "total_bytes": int(sizes.total) if sizes else 0,
+                }
+
+            custom_types = {
+                f"{operation}:{typename}": {"count": count, "total_time": total}
+                for (operation, typename), (count, total) in self.custom_types.items()
+            }
+
+        return {"calls": calls, "custom_types": custom_types}
+
+    def reset(self) -> None:
+        """Discard all measurements."""
+        with self._lock:
+            self.latencies.clear()
+            self.sizes.clear()
+            self.custom_types.clear()
+
+
+class _TimedMarshallers(dict):  # type: ignore[type-arg]
+    # Wraps the marshallers as they're added, while lookups stay as fast as before
+    __slots__ = "sink"
+
+    def __init__(self, sink: MetricsSink, marshallers: dict[Any, Any]):
+        super().__init__()
+        self.sink = sink
+        for key, value in marshallers.items():
+            self[key] = value
+
+    def __setitem__(self, key: Any, value: Any) -> None:
+        typename, marshaller, wrap_state = value
+        if not hasattr(marshaller, "__wrapped__"):
+            marshaller = _time_callback(marshaller, self.sink, "marshal", typename)
+
+        super().__setitem__(key, (typename, marshaller, wrap_state))
+
+
+class _TimedUnmarshallers(dict):  # type: ignore[type-arg]
+    __slots__ = "sink"
+
+    def __init__(self, sink: MetricsSink, unmarshallers: dict[Any, Any]):
+        super().__init__()
+        self.sink = sink
+        for key, value in unmarshallers.items():
+            self[key] = value
+
+    def __setitem__(self, key: Any, value: Any) -> None:
+        cls, unmarshaller = value
+        if not hasattr(unmarshaller, "__wrapped__"):
+            unmarshaller = _time_callback(unmarshaller, self.sink, "unmarshal", key)
+
+        super().__setitem__(key, (cls, unmarshaller))
+
+
+def _time_callback(
+    callback: Callable[..., Any], sink: MetricsSink, operation: str, typename: Any
+) -> Callable[..., Any]:
+    # The signature of the callback is kept visible (via __wrapped__), as the number of
+    # parameters of an unmarshaller determines how it's called
+    record = sink.record_custom_type
+
+    @wraps(callback)
+    def timed_callback(*args: Any) -> Any:
+        start = perf_counter()
+        try:
+            return callback(*args)
+        finally:
+            record(operation, typename, perf_counter() - start)
+
+    return timed_callback
+
+
+class InstrumentedSerializer(Serializer):
+    """
+    Wraps another serializer, reporting the duration and payload sizes of all calls to
+    a metrics sink.
+
+    If the wrapped serializer is a :class:`~.api.CustomizableSerializer`, the
+    marshallers and unmarshallers of its custom types (including the ones registered
+    later) are also timed, and reported separately per type. Custom types should be
+    registered on :attr:`serializer`.
+
+    Instrumentation is opt-in: serializers that are not wrapped have no overhead from
+    it.
+
+    :param serializer: the serializer to wrap
+    :param sink: the metrics sink to report to
+    """
+
+    __slots__ = "serializer", "sink"
+
+    def __init__(self, serializer: Serializer, sink: MetricsSink):
+        self.serializer = serializer
+        self.sink = sink
+        if isinstance(serializer, CustomizableSerializer):
+            serializer.marshallers = _TimedMarshallers(sink, serializer.marshallers)
+            serializer.unmarshallers = _TimedUnmarshallers(
+                sink, serializer.unmarshallers
+            )
+            serializer._loaders.clear()
+
+            # Some codecs (like the YAML one) bind the marshallers and unmarshallers
+            # when they're registered, so the timed ones need to be bound again
+            codec = serializer.custom_type_codec
+            if codec is not None:
+                if serializer.marshallers:
+                    codec.register_object_encoder_hook(serializer)
+
+                if serializer.unmarshallers:
+                    codec.register_object_decoder_hook(serializer)
+
+    def serialize(self, obj: Any) -> bytes:
+        start = perf_counter()
+        payload = self.serializer.serialize(obj)
+        self.sink.record_call("serialize", perf_counter() - start, len(payload))
+        return payload
+
+    def deserialize(self, payload: BytesLike) -> Any:
+        start = perf_counter()
+        obj = self.serializer.deserialize(payload)
+        self.sink.record_call("deserialize", perf_counter() - start, len(payload))
+        return obj
+
+    def serialize_into(self, obj: Any, out: bytearray | memoryview) -> int:
+        start = perf_counter()
+        size = self.serializer.serialize_into(obj, out)
+        self.sink.record_call("serialize_into", perf_counter() - start, size)
+        return size
+
+    def serialize_many(self, objs: Iterable[Any]) -> list[bytes]:
+        start = perf_counter()
+        payloads = self.serializer.serialize_many(objs)
+        size = sum(len(payload) for payload in payloads)
+        self.sink.record_call("serialize_many", perf_counter() - start, size)
+        return payloads
+
+    def deserialize_many(self, payloads: Iterable[BytesLike]) -> list[Any]:
+        payloads = list(payloads)
+        start = perf_counter()
+        objs = self.serializer.deserialize_many(payloads)
+        size = sum(len(payload) for payload in payloads)
+        self.sink.record_call("deserialize_many", perf_counter() - start, size)
+        return objs
+
+    def serialize_batch(self, objs: Iterable[Any]) -> bytes:
+        start = perf_counter()
+        payload = self.serializer.serialize_batch(objs)
+        self.sink.record_call("serialize_batch", perf_counter() - start, len(payload))
+        return payload
+
+    def deserialize_batch(self, payload: BytesLike) -> list[Any]:
+        start = perf_counter()
+        objs = self.serializer.deserialize_batch(payload)
+        self.sink.record_call("deserialize_batch", perf_counter() - start, len(payload))
+        return objs
+
+    def serialize_parts(self, obj: Any) -> list[bytes | bytearray | memoryview]:
+        start = perf_counter()
+        parts = self.serializer.serialize_parts(obj)
+        size = sum(memoryview(part).nbytes for part in parts)
+        self.sink.record_call("serialize_parts", perf_counter() - start, size)
+        return parts
+
+    def deserialize_parts(self, parts: Sequence[Any]) -> Any:
+        start = perf_counter()
+        obj = self.serializer.deserialize_parts(parts)
+        size = sum(memoryview(part).nbytes for part in parts)
+        self.sink.record_call("deserialize_parts", perf_counter() - start, size)
+        return obj
+
+    def dump(self, obj: Any, fp: IO[bytes]) -> None:
+        start = perf_counter()
+        self.serializer.dump(obj, fp)
+        self.sink.record_call("dump", perf_counter() - start, -1)
+
+    def load(self, fp: IO[bytes]) -> Any:
+        start = perf_counter()
+        obj = self.serializer.load(fp)
+        self.sink.record_call("load", perf_counter() - start, -1)
+        return obj
+
+    async def dump_async(self, obj: Any, stream: ByteSendStream) -> None:
+        start = perf_counter()
+        await self.serializer.dump_async(obj, stream)
+        self.sink.record_call("dump_async", perf_counter() - start, -1)
+
+    async def load_async(self, stream: ByteReceiveStream) -> Any:
+        start = perf_counter()
+        obj = await self.serializer.load_async(stream)
+        self.sink.record_call("load_async", perf_counter() - start, -1)
+        return obj
+
+    @property
+    def mimetype(self) -> str:
+        return self.serializer.mimetype
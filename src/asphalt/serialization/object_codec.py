@@ -3,9 +3,7 @@ from __future__ import annotations
 from collections.abc import Callable
 from typing import Any, Generic
 
-from asphalt.core import qualified_name
-
-from .api import CustomTypeCodec, T_Serializer
+from .api import CustomTypeCodec, MarshallCallback, T_Serializer
 
 
 class DefaultCustomTypeCodec(Generic[T_Serializer], CustomTypeCodec[T_Serializer]):
@@ -13,31 +11,83 @@ class DefaultCustomTypeCodec(Generic[T_Serializer], CustomTypeCodec[T_Serializer
     Provides default wrappers for implementing
     :class:`~asphalt.serialization.api.CustomTypeCodec`.
 
+    With ``resolve_subclasses=True``, objects whose exact class has not been registered
+    are marshalled using the marshaller of the nearest registered class in their method
+    resolution order. The result of this lookup is cached per class (up to
+    ``marshaller_cache_size`` classes), and the cache is cleared whenever a new
+    marshaller is registered.
+
     :ivar CustomizableSerializer serializer: the associated serializer
 
     :param type_key: dict key for the type name
     :param state_key: dict key for the marshalled state
+    :param resolve_subclasses: ``True`` to marshal instances of subclasses of registered
+        classes using the marshallers of the latter
+    :param marshaller_cache_size: maximum number of classes to cache the resolved
+        marshallers for
     """
 
     serializer: T_Serializer
 
-    def __init__(self, type_key: str = "__type__", state_key: str = "state"):
+    def __init__(
+        self,
+        type_key: str = "__type__",
+        state_key: str = "state",
+        resolve_subclasses: bool = False,
+        marshaller_cache_size: int = 1024,
+    ):
         self.type_key = type_key
         self.state_key = state_key
-        self.wrap_callback: Callable[[str, Any], Any] = self.wrap_state_dict
-        self.unwrap_callback: Callable[[Any], tuple[str, Any] | tuple[None, None]] = (
-            self.unwrap_state_dict
-        )
+        self.resolve_subclasses = resolve_subclasses
+        self.marshaller_cache_size = marshaller_cache_size
+        self._marshaller_cache: dict[
+            type, tuple[str | int, MarshallCallback, bool]
+        ] = {}
+        self.wrap_callback: Callable[[str | int, Any], Any] = self.wrap_state_dict
+        self.unwrap_callback: Callable[
+            [Any], tuple[str | int, Any] | tuple[None, None]
+        ] = self.unwrap_state_dict
+
+    def register_object_encoder_hook(self, serializer: T_Serializer) -> None:
+        self.serializer = serializer
+        self._marshaller_cache.clear()
+
+    def get_marshaller(self, cls: type) -> tuple[str | int, MarshallCallback, bool]:
+        """
+        Look up the marshaller for the given class.
 
-    def default_encoder(self, obj: Any) -> Any:
-        obj_type = obj.__class__
-        try:
-            typename, marshaller, wrap_state = self.serializer.marshallers[obj_type]
-        except KeyError:
-            raise LookupError(
-                f'no marshaller found for type "{qualified_name(obj_type)}"'
-            ) from None
+        :param cls: the class of the object to be marshalled
+        :return: a tuple of (type ID or typename, marshaller callback, wrap_state)
+        :raises LookupError: if no marshaller has been registered for the class (or
+            any of its superclasses, if ``resolve_subclasses`` is enabled)
+
+        """
+        if self.resolve_subclasses:
+            try:
+                return self._marshaller_cache[cls]
+            except KeyError:
+                pass
+
+            marshallers = self.serializer.marshallers
+            for base in cls.__mro__:
+                if base in marshallers:
+                    if len(self._marshaller_cache) >= self.marshaller_cache_size:
+                        self._marshaller_cache.clear()
+
+                    self._marshaller_cache[cls] = marshallers[base]
+                    return marshallers[base]
+        else:
+            try:
+                return self.serializer.marshallers[cls]
+            except KeyError:
+                pass
 
+        from asphalt.core import qualified_name
+
+        raise LookupError(f'no marshaller found for type "{qualified_name(cls)}"')
+
+    def default_encoder(self, obj: Any) -> Any:
+        typename, marshaller, wrap_state = self.get_marshaller(obj.__class__)
         state = marshaller(obj)
         return self.wrap_callback(typename, state) if wrap_state else state
 
@@ -47,6 +97,18 @@ class DefaultCustomTypeCodec(Generic[T_Serializer], CustomTypeCodec[T_Serializer
         if typename is None:
             return obj
 
+        return self.unmarshal(typename, marshalled_state)
+
+    def unmarshal(self, typename: str | int, marshalled_state: Any) -> Any:
+        """
+        Restore an object of a custom type from its marshalled state.
+
+        :param typename: type ID or registered name of the custom type
+        :param marshalled_state: the marshalled state of the object
+        :return: the unmarshalled object
+        :raises LookupError: if no unmarshaller has been registered for the type
+
+        """
         try:
             cls, unmarshaller = self.serializer.unmarshallers[typename]
         except KeyError:
@@ -59,7 +121,7 @@ class DefaultCustomTypeCodec(Generic[T_Serializer], CustomTypeCodec[T_Serializer
         else:
             return unmarshaller(marshalled_state)  # type: ignore[call-arg]
 
-    def wrap_state_dict(self, typename: str, state: Any) -> dict[str, Any]:
+    def wrap_state_dict(self, typename: str | int, state: Any) -> dict[str, Any]:
         """
         Wrap the marshalled state in a dictionary.
 
@@ -67,7 +129,7 @@ class DefaultCustomTypeCodec(Generic[T_Serializer], CustomTypeCodec[T_Serializer
         ``state_key`` options. The former holds the type name and the latter holds the
         marshalled state.
 
-        :param typename: registered name of the custom type
+        :param typename: type ID or registered name of the custom type
         :param state: the marshalled state of the object
         :return: an object serializable by the serializer
 
@@ -76,7 +138,7 @@ class DefaultCustomTypeCodec(Generic[T_Serializer], CustomTypeCodec[T_Serializer
 
     def unwrap_state_dict(
         self, obj: dict[str, Any]
-    ) -> tuple[str, Any] | tuple[None, None]:
+    ) -> tuple[str | int, Any] | tuple[None, None]:
         """
         Unwrap a marshalled state previously wrapped using :meth:`wrap_state_dict`.
 
@@ -0,0 +1,209 @@
+from __future__ import annotations
+
+import logging
+from collections.abc import Iterable, Sequence
+from copy import deepcopy
+from time import perf_counter
+from typing import IO, TYPE_CHECKING, Any
+
+from ..api import BytesLike, CustomizableSerializer, Serializer
+
+if TYPE_CHECKING:
+    from anyio.abc import ByteReceiveStream, ByteSendStream
+
+logger = logging.getLogger(__name__)
+
+#: backends that are never picked unless explicitly listed as candidates, as they are
+#: unsafe to use with untrusted data
+UNSAFE_BACKENDS = frozenset(["pickle"])
+
+#: backends that wrap another backend, and are only considered if explicitly listed as
+#: candidates (with options naming the backend to wrap)
+WRAPPER_BACKENDS = frozenset(["auto", "cache", "compress", "offload"])
+
+
+def _time_per_call(func: Any, min_time: float) -> float:
+    # Calls the function repeatedly for at least min_time seconds, doubling the number
+    # of calls in each round, and returns the fastest per-call time seen
+    number = 1
+    elapsed_total = 0.0
+    best = float("inf")
+    while True:
+        start = perf_counter()
+        for _ in range(number):
+            func()
+
+        elapsed = perf_counter() - start
+        best = min(best, elapsed / number)
+        elapsed_total += elapsed
+        if elapsed_total >= min_time:
+            return best
+
+        number *= 2
+
+
+class AutoSerializer(Serializer):
+    """
+    Picks the fastest serializer backend that can round-trip a sample object.
+
+    When created, this serializer instantiates each candidate backend, serializes and
+    deserializes the sample with it, and measures the time taken. Backends that fail
+    to serialize the sample, or which return an object not equal to the sample, are
+    rejected. All calls are then delegated to the backend with the lowest combined
+    serialization and deserialization time (:attr:`serializer`). The choice and the
+    measurements are logged, and are available as :attr:`backend` and
+    :attr:`measurements`.
+
+    By default, the candidates are all the backends registered as entry points which
+    can be created without options, except the ones in :data:`UNSAFE_BACKENDS` and
+    :data:`WRAPPER_BACKENDS`.
+
+    Custom types should be registered on :attr:`serializer`, but any custom types
+    present in the sample must be given as ``custom_types`` so they can be registered
+    on all candidates. They must also implement ``__eq__()``.
+
+    :ivar str backend: name of the chosen backend
+    :ivar measurements: a dict of backend names to either a dict of ``serialize`` and
+        ``deserialize`` (seconds per call) and ``size`` (payload size in bytes), or an
+        error message explaining why the backend was rejected
+
+    :param sample: a representative object (or a ``module:varname`` reference to one)
+    :param candidates: names of the backends to consider
+    :param options: a dict of backend names to keyword arguments passed to the
+        corresponding backend classes
+    :param custom_types: classes (or ``module:varname`` references to them) to register
+        on the candidates with the default marshaller and unmarshaller
+    :param min_time: minimum time (in seconds) to spend measuring each operation on
+        each backend
+    :raises ValueError: if none of the candidates can round-trip the sample
+    """
+
+    __slots__ = "serializer", "backend", "measurements"
+
+    def __init__(
+        self,
+        sample: Any,
+        candidates: Iterable[str] | None = None,
+        options: dict[str, dict[str, Any]] | None = None,
+        custom_types: Iterable[type | str] = (),
+        min_time: float = 0.05,
+    ):
+        from asphalt.core import qualified_name, resolve_reference
+
+        from ..component import serializer_types
+
+        sample = resolve_reference(sample)
+        options = options or {}
+        types = [resolve_reference(cls) for cls in custom_types]
+        if candidates is None:
+            excluded = UNSAFE_BACKENDS | WRAPPER_BACKENDS
+            candidates = [
+                name for name in serializer_types.names if name not in excluded
+            ]
+
+        self.measurements: dict[str, dict[str, float] | str] = {}
+        best_time = float("inf")
+        best: tuple[str, Serializer] | None = None
+        for name in candidates:
+            try:
+                serializer_class = serializer_types.resolve(name)
+                if isinstance(serializer_class, type) and issubclass(
+                    serializer_class, AutoSerializer
+                ):
+                    continue
+
+                serializer = serializer_types.create_object(
+                    serializer_class, **deepcopy(options.get(name, {}))
+                )
+                if isinstance(serializer, CustomizableSerializer):
+                    for cls in types:
+                        serializer.register_custom_type(cls)
+
+                payload = serializer.serialize(sample)
+                if serializer.deserialize(payload) != sample:
+                    self.measurements[name] = "the sample did not round-trip correctly"
+                    continue
+
+                serialize_time = _time_per_call(
+                    lambda: serializer.serialize(sample), min_time
+                )
+                deserialize_time = _time_per_call(
+                    lambda: serializer.deserialize(payload), min_time
+                )
+            except Exception as exc:
+                self.measurements[name] = f"{qualified_name(exc)}: {exc}"
+                continue
+
+            self.measurements[name] = {
+                "serialize": serialize_time,
+                "deserialize": deserialize_time,
+                "size": len(payload),
+            }
+            if serialize_time + deserialize_time < best_time:
+                best_time = serialize_time + deserialize_time
+                best = name, serializer
+
+        if best is None:
+            raise ValueError(
+                f"none of the candidate backends could round-trip the sample: "
+                f"{self.measurements}"
+            )
+
+        self.backend, self.serializer = best
+        for name, measurement in self.measurements.items():
+            if isinstance(measurement, dict):
+                logger.info(
+                    "Serializer backend %s: serialize %.1f µs, deserialize %.1f µs, "
+                    "%d bytes",
+                    name,
+                    measurement["serialize"] * 1e6,
+                    measurement["deserialize"] * 1e6,
+                    measurement["size"],
+                )
+            else:
+                logger.info("Serializer backend %s rejected: %s", name, measurement)
+
+        logger.info("Selected the %s serializer backend", self.backend)
+
+    def serialize(self, obj: Any) -> bytes:
+        return self.serializer.serialize(obj)
+
+    def deserialize(self, payload: BytesLike) -> Any:
+        return self.serializer.deserialize(payload)
+
+    def serialize_into(self, obj: Any, out: bytearray | memoryview) -> int:
+        return self.serializer.serialize_into(obj, out)
+
+    def serialize_many(self, objs: Iterable[Any]) -> list[bytes]:
+        return self.serializer.serialize_many(objs)
+
+    def deserialize_many(self, payloads: Iterable[BytesLike]) -> list[Any]:
+        return self.serializer.deserialize_many(payloads)
+
+    def serialize_batch(self, objs: Iterable[Any]) -> bytes:
+        return self.serializer.serialize_batch(objs)
+
+    def deserialize_batch(self, payload: BytesLike) -> list[Any]:
+        return self.serializer.deserialize_batch(payload)
+
+    def serialize_parts(self, obj: Any) -> list[bytes | bytearray | memoryview]:
+        return self.serializer.serialize_parts(obj)
+
+    def deserialize_parts(self, parts: Sequence[Any]) -> Any:
+        return self.serializer.deserialize_parts(parts)
+
+    def dump(self, obj: Any, fp: IO[bytes]) -> None:
+        self.serializer.dump(obj, fp)
+
+    def load(self, fp: IO[bytes]) -> Any:
+        return self.serializer.load(fp)
+
+    async def dump_async(self, obj: Any, stream: ByteSendStream) -> None:
+        await self.serializer.dump_async(obj, stream)
+
+    async def load_async(self, stream: ByteReceiveStream) -> Any:
+        return await self.serializer.load_async(stream)
+
+    @property
+    def mimetype(self) -> str:
+        return self.serializer.mimetype
@@ -0,0 +1,312 @@
+from __future__ import annotations
+
+from collections import OrderedDict
+from collections.abc import Callable
+from copy import deepcopy
+from dataclasses import fields, is_dataclass
+from enum import Enum
+from hashlib import blake2b
+from sys import getsizeof
+from threading import Lock
+from typing import Any
+
+from ..api import BytesLike, CustomizableSerializer, Serializer
+
+#: returned by getattr() for objects that have no version attribute
+_UNCACHEABLE = object()
+
+#: field names of frozen dataclasses (``None`` for other classes), keyed by class
+_frozen_fields: dict[type, tuple[str, ...] | None] = {}
+
+
+def _get_frozen_fields(cls: type) -> tuple[str, ...] | None:
+    try:
+        return _frozen_fields[cls]
+    except KeyError:
+        names = None
+        params = getattr(cls, "__dataclass_params__", None)
+        if params is not None and params.frozen and is_dataclass(cls):
+            names = tuple(field.name for field in fields(cls))
+
+        _frozen_fields[cls] = names
+        return names
+
+
+def _measure(obj: Any, update: Callable[[bytes], object] | None = None) -> int:
+    # Returns the approximate memory size of an object (as reported by sys.getsizeof(),
+    # including the objects it contains), or -1 if the object is, or contains, something
+    # that may be mutable. If given, update() is fed a representation of the object that
+    # is equal only for objects that serialize identically. The classes are made part of
+    # it, as equal values of different types (like 1 and 1.0, or 0.0 and -0.0) don't
+    # serialize identically.
+    cls = obj.__class__
+    size = getsizeof(obj)
+    if cls is str:
+        if update is not None:
+            data = obj.encode("utf-8", "surrogatepass")
+            update(b"s%d:" % len(data))
+            update(data)
+    elif cls is bytes:
+        if update is not None:
+            update(b"b%d:" % len(obj))
+            update(obj)
+    elif obj is None:
+        if update is not None:
+            update(b"n")
+    elif cls is int:
+        if update is not None:
+            update(b"i%d;" % obj)
+    elif cls is bool:
+        if update is not None:
+            update(b"T" if obj else b"F")
+    elif cls is float:
+        if update is not None:
+            update(b"f%s;" % obj.hex().encode("ascii"))
+    elif cls is tuple:
+        if update is not None:
+            update(b"t%d:" % len(obj))
+
+        for item in obj:
+            item_size = _measure(item, update)
+            if item_size < 0:
+                return -1
+
+            size += item_size
+    elif cls is frozenset:
+        # The items are digested separately, as their iteration order may differ
+        # between equal sets
+        digests = []
+        for item in obj:
+            if update is None:
+                item_size = _measure(item)
+            else:
+                hasher = blake2b(digest_size=16)
+                item_size = _measure(item, hasher.update)
+                digests.append(hasher.digest())
+
+            if item_size < 0:
+                return -1
+
+            size += item_size
+
+        if update is not None:
+            update(b"z%d:" % len(digests))
+            update(b"".join(sorted(digests)))
+    elif isinstance(obj, Enum):
+        if update is not None:
+            _update_class(update, cls)
+            update(b"%d:%s" % (len(obj.name), obj.name.encode("utf-8")))
+    else:
+        names = _get_frozen_fields(cls)
+        if names is None:
+            return -1
+
+        if update is not None:
+            _update_class(update, cls)
+
+        for name in names:
+            field_size = _measure(getattr(obj, name), update)
+            if field_size < 0:
+                return -1
+
+            size += field_size
+
+    return size
+
+
+def _update_class(update: Callable[[bytes], object], cls: type) -> None:
+    # The identity of the class is included, in case another one has the same name
+    name = f"{cls.__module__}:{cls.__qualname__}:{id(cls)}".encode()
+    update(b"c%d:" % len(name))
+    update(name)
+
+
+class CachingSerializer(Serializer):
+    """
+    Wraps another serializer, caching the results of :meth:`serialize` and
+    :meth:`deserialize`.
+
+    This is meant for applications that repeatedly serialize the same objects (or
+    deserialize the same payloads), such as configuration snapshots or reference data
+    sent to many recipients.
+
+    Serialized payloads are cached for:
+
+    * objects that have the attribute named by ``version_attribute`` (if set), by the
+      identity of the object and the value of that attribute (the object must then
+      change the value of the attribute whenever it's modified, and it's kept alive
+      until its cache entry is evicted)
+    * immutable objects, by a digest of their contents: strings, bytes, numbers,
+      ``None``, enum members, and tuples, frozensets and frozen dataclasses consisting
+      of these
+
+    Deserialized objects are cached by the digest of the payload, if they're immutable
+    (as defined above), as the cached object is returned to every caller.
+
+    Entries are evicted in least recently used order when their total size exceeds
+    ``max_size``. The size of a serialize entry is the length of the payload, and the
+    size of a deserialize entry is the memory size of the object (as reported by
+    :func:`sys.getsizeof`, including the objects it contains). Objects kept alive for
+    identity based entries are not counted.
+
+    The cache is cleared whenever custom types or type IDs are registered on the wrapped
+    serializer, as the payloads may change as a result. Custom types should be
+    registered on :attr:`serializer`.
+
+    Finding the cache key for an object by its contents requires walking through it,
+    which may take longer than serializing it in the first place, if the serializer is
+    fast and the object contains no custom types.
+
+    :ivar int size: total size of the cache entries (in bytes)
+    :ivar int serialize_hits: number of :meth:`serialize` calls served from the cache
+    :ivar int serialize_misses: number of cacheable objects not found in the cache
+    :ivar int deserialize_hits: number of :meth:`deserialize` calls served from the
+        cache
+    :ivar int deserialize_misses: number of payloads not found in the cache
+
+    :param backend: the name of the wrapped serializer backend, a ``module:varname``
+        reference to its class, or the class itself
+    :param options: keyword arguments passed to the wrapped serializer backend class
+    :param max_size: maximum total size of the cache entries (in bytes)
+    :param version_attribute: name of the attribute holding the version of an object,
+        for caching mutable objects by their identity
+    :param cache_deserialize: ``False`` to only cache the results of :meth:`serialize`
+    """
+
+    __slots__ = (
+        "serializer",
+        "options",
+        "max_size",
+        "version_attribute",
+        "cache_deserialize",
+        "size",
+        "serialize_hits",
+        "serialize_misses",
+        "deserialize_hits",
+        "deserialize_misses",
+        "_entries",
+        "_lock",
+        "_customizable",
+        "_registrations",
+    )
+
+    def __init__(
+        self,
+        backend: str | type[Serializer],
+        options: dict[str, Any] | None = None,
+        max_size: int = 16777216,
+        version_attribute: str | None = None,
+        cache_deserialize: bool = True,
+    ):
+        from ..component import serializer_types
+
+        self.options: dict[str, Any] = deepcopy(options or {})
+        self.serializer: Serializer = serializer_types.create_object(
+            backend, **deepcopy(self.options)
+        )
+        self.max_size = max_size
+        self.version_attribute = version_attribute
+        self.cache_deserialize = cache_deserialize
+        self.size = 0
+        self.serialize_hits = self.serialize_misses = 0
+        self.deserialize_hits = self.deserialize_misses = 0
+
+        # key -> (cached value, size, object kept alive for an identity based key)
+        self._entries: OrderedDict[Any, tuple[Any, int, Any]] = OrderedDict()
+        self._lock = Lock()
+        self._customizable: CustomizableSerializer | None = None
+        self._registrations = 0
+        if isinstance(self.serializer, CustomizableSerializer):
+            self._customizable = self.serializer
+            self._registrations = self.serializer._registrations
+
+    def clear(self) -> None:
+        """Remove all entries from the cache."""
+        with self._lock:
+            self._entries.clear()
+            self.size = 0
+
+    def _check_registrations(self) -> None:
+        customizable = self._customizable
+        if (
+            customizable is not None
+            and customizable._registrations != self._registrations
+        ):
+            with self._lock:
+                self._registrations = customizable._registrations
+                self._entries.clear()
+                self.size = 0
+
+    def _store(self, key: Any, value: Any, size: int, pinned: Any) -> None:
+        if size > self.max_size:
+            return
+
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self.size -= previous[1]
+
+            self._entries[key] = value, size, pinned
+            self.size += size
+            while self.size > self.max_size:
+                _key, (_value, evicted_size, _pinned) = self._entries.popitem(
+                    last=False
+                )
+                self.size -= evicted_size
+
+    def serialize(self, obj: Any) -> bytes:
+        self._check_registrations()
+        version = (
+            getattr(obj, self.version_attribute, _UNCACHEABLE)
+            if self.version_attribute
+            else _UNCACHEABLE
+        )
+        if version is not _UNCACHEABLE:
+            key: Any = "identity", id(obj), version
+            pinned = obj
+        else:
+            hasher = blake2b(digest_size=16)
+            if _measure(obj, hasher.update) < 0:
+                return self.serializer.serialize(obj)
+
+            key = "content", hasher.digest()
+            pinned = None
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[2] is pinned:
+                self._entries.move_to_end(key)
+                self.serialize_hits += 1
+                return entry[0]  # type: ignore[no-any-return]
+
+            self.serialize_misses += 1
+
+        payload = self.serializer.serialize(obj)
+        self._store(key, payload, len(payload), pinned)
+        return payload
+
+    def deserialize(self, payload: BytesLike) -> Any:
+        if not self.cache_deserialize:
+            return self.serializer.deserialize(payload)
+
+        self._check_registrations()
+        key = "payload", blake2b(payload, digest_size=16).digest()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.deserialize_hits += 1
+                return entry[0]
+
+            self.deserialize_misses += 1
+
+        obj = self.serializer.deserialize(payload)
+        size = _measure(obj)
+        if size >= 0:
+            self._store(key, obj, size, None)
+
+        return obj
+
+    @property
+    def mimetype(self) -> str:
+        return self.serializer.mimetype
@@ -1,13 +1,36 @@
 from __future__ import annotations
 
-from typing import Any
+from collections.abc import Iterable, Iterator
+from io import SEEK_END, BytesIO
+from threading import local
+from typing import IO, TYPE_CHECKING, Any, cast
 
-import cbor2
-from asphalt.core import qualified_name, resolve_reference
-
-from ..api import CustomizableSerializer
+from ..api import BATCH_LENGTH_PREFIX, BytesLike, CustomizableSerializer, write_into
 from ..object_codec import DefaultCustomTypeCodec
 
+if TYPE_CHECKING:
+    import cbor2
+
+
+_reusable_codecs: bool | None = None
+
+
+def _import_cbor2() -> None:
+    # cbor2 is imported when the first serializer is created, rather than when this
+    # module is imported
+    global cbor2, _reusable_codecs
+    import cbor2
+
+    # Before cbor2 5.8, encoders and decoders kept the shared values of the previous
+    # top-level objects around, so they can't be reused for another object there
+    if _reusable_codecs is None:
+        encoder = cbor2.CBOREncoder(BytesIO(), value_sharing=True)
+        value: list[Any] = []
+        encoder.encode(value)
+        encoder.encode(value)
+        buffer = cast(BytesIO, encoder.fp)
+        _reusable_codecs = buffer.getvalue() == b"\xd8\x1c\x80" * 2
+
 
 class CBORTypeCodec(DefaultCustomTypeCodec["CBORSerializer"]):
     """
@@ -16,18 +39,35 @@ class CBORTypeCodec(DefaultCustomTypeCodec["CBORSerializer"]):
     Wraps marshalled state in either CBORTag objects (the default) or dicts (with
     ``type_tag=None``).
 
+    By default, the marshalled state is encoded separately and embedded in the tag as a
+    byte string. With ``inline_state=True``, the state is instead encoded inline, in
+    the same pass as the rest of the data, under the ``inline_type_tag`` tag. This
+    avoids encoding nested custom type objects repeatedly, but does not support
+    circular references via custom type objects. Both formats are always accepted when
+    decoding.
+
     :param type_tag: CBOR tag number to use, or ``None`` to use JSON compatible
         dict-based wrapping
+    :param inline_state: ``True`` to encode the marshalled state inline
+    :param inline_type_tag: CBOR tag number to use for inline encoded state
 
     .. note:: Custom wrapping hooks are ignored when CBORTags are used.
     """
 
-    def __init__(self, type_tag: int | None = 4554, **kwargs: Any):
+    def __init__(
+        self,
+        type_tag: int | None = 4554,
+        inline_state: bool = False,
+        inline_type_tag: int = 4555,
+        **kwargs: Any,
+    ):
         super().__init__(**kwargs)
         self.type_tag = type_tag
+        self.inline_state = inline_state
+        self.inline_type_tag = inline_type_tag
 
     def register_object_encoder_hook(self, serializer: CBORSerializer) -> None:
-        self.serializer = serializer
+        super().register_object_encoder_hook(serializer)
         if self.type_tag:
             serializer.encoder_options["default"] = cbor2.shareable_encoder(
                 self.cbor_tag_encoder
@@ -35,6 +75,8 @@ class CBORTypeCodec(DefaultCustomTypeCodec["CBORSerializer"]):
         else:
             serializer.encoder_options["default"] = self.cbor_default_encoder
 
+        serializer.reset_codecs()
+
     def register_object_decoder_hook(self, serializer: CBORSerializer) -> None:
         self.serializer = serializer
         if self.type_tag:
@@ -42,18 +84,16 @@ class CBORTypeCodec(DefaultCustomTypeCodec["CBORSerializer"]):
         else:
             serializer.decoder_options["object_hook"] = self.cbor_default_decoder
 
-    def cbor_tag_encoder(self, encoder: cbor2.CBOREncoder, obj: Any) -> Any:
-        try:
-            typename, marshaller, wrap_state = self.serializer.marshallers[
-                obj.__class__
-            ]
-        except KeyError:
-            raise LookupError(
-                f'no marshaller found for type "{qualified_name(type(obj))}"'
-            ) from None
+        serializer.reset_codecs()
 
+    def cbor_tag_encoder(self, encoder: cbor2.CBOREncoder, obj: Any) -> Any:
+        typename, marshaller, wrap_state = self.get_marshaller(obj.__class__)
         marshalled_state = marshaller(obj)
-        if wrap_state:
+        if wrap_state and self.inline_state:
+            encoder.encode(
+                cbor2.CBORTag(self.inline_type_tag, [typename, marshalled_state])
+            )
+        elif wrap_state:
             serialized_state = encoder.encode_to_bytes(marshalled_state)
             wrapped_state = [typename, serialized_state]
             encoder.encode(cbor2.CBORTag(self.type_tag, wrapped_state))
@@ -61,7 +101,10 @@ class CBORTypeCodec(DefaultCustomTypeCodec["CBORSerializer"]):
             encoder.encode(marshalled_state)
 
     def cbor_tag_decoder(self, decoder: cbor2.CBORDecoder, tag: cbor2.CBORTag) -> Any:
-        if tag.tag != self.type_tag:
+        if tag.tag == self.inline_type_tag:
+            typename, marshalled_state = tag.value
+            return self.unmarshal(typename, marshalled_state)
+        elif tag.tag != self.type_tag:
             return tag
 
         typename, serialized_state = tag.value
@@ -102,18 +145,40 @@ class CBORSerializer(CustomizableSerializer):
 
     .. seealso:: `cbor2 documentation <https://pypi.io/project/cbor2/>`_
 
+    With ``cache_codecs=True``, each thread keeps a pre-configured
+    :class:`~cbor2.CBOREncoder` (writing to a reusable buffer) and
+    :class:`~cbor2.CBORDecoder` around instead of creating new ones on every call.
+    This saves the setup cost for every message, which is significant for small
+    payloads. If you modify ``encoder_options`` or ``decoder_options`` after the
+    serializer has been used, you need to call :meth:`reset_codecs` for the changes to
+    take effect. With cbor2 versions older than 5.8, whose encoders and decoders can't
+    be reused for another object, this option has no effect.
+
+    :meth:`serialize_parts` returns the :class:`bytes` and :class:`bytearray` objects
+    at least ``buffer_threshold`` bytes in size, found directly or within (possibly
+    nested) dicts and lists, as separate buffers, and the rest of the payload in the
+    buffers between them. This is not supported with the ``canonical``,
+    ``value_sharing`` or ``string_referencing`` encoder options, in which case the
+    whole payload is returned as a single buffer.
+
     :param encoder_options: keyword arguments passed to
         :func:`cbor2.dumps() <cbor2.encoder.dumps>`
     :param decoder_options: keyword arguments passed to
         :func:`cbor2.loads() <cbor2.decoder.loads>`
     :param custom_type_codec: wrapper to use to wrap custom types after marshalling, or
         ``None`` to return marshalled objects as-is
+    :param cache_codecs: ``True`` to reuse per-thread encoder and decoder instances
+    :param buffer_threshold: minimum size (in bytes) of the binary objects to be
+        returned as separate buffers by :meth:`serialize_parts`
     """
 
     __slots__ = (
         "encoder_options",
         "decoder_options",
         "custom_type_codec",
+        "cache_codecs",
+        "buffer_threshold",
+        "_codecs",
         "marshallers",
         "unmarshallers",
     )
@@ -123,17 +188,377 @@ class CBORSerializer(CustomizableSerializer):
         encoder_options: dict[str, Any] | None = None,
         decoder_options: dict[str, Any] | None = None,
         custom_type_codec: CBORTypeCodec | str | None = None,
+        cache_codecs: bool = False,
+        buffer_threshold: int = 65536,
     ) -> None:
+        from asphalt.core import resolve_reference
+
+        _import_cbor2()
         super().__init__(resolve_reference(custom_type_codec) or CBORTypeCodec())
         self.encoder_options: dict[str, Any] = encoder_options or {}
         self.decoder_options: dict[str, Any] = decoder_options or {}
+        self.cache_codecs = cache_codecs
+        self.buffer_threshold = buffer_threshold
+        self._codecs = local()
+
+    def reset_codecs(self) -> None:
+        """
+        Discard the cached encoders and decoders of all threads.
+
+        New ones will be created using the current options when needed.
+
+        """
+        self._codecs = local()
 
     def serialize(self, obj: Any) -> bytes:
-        return cbor2.dumps(obj, **self.encoder_options)  # type: ignore[no-any-return]
+        if not self.cache_codecs:
+            return cbor2.dumps(obj, **self.encoder_options)  # type: ignore[no-any-return]
 
-    def deserialize(self, payload: bytes) -> Any:
-        return cbor2.loads(payload, **self.decoder_options)
+        encoder = self._acquire_encoder()
+        buffer = cast(BytesIO, encoder.fp)
+        try:
+            encoder.encode(obj)
+            payload = buffer.getvalue()
+        finally:
+            buffer.seek(0)
+            buffer.truncate()
+
+        self._release_encoder(encoder)
+        return payload
+
+    def deserialize(self, payload: BytesLike, into: Any = None) -> Any:
+        # cbor2 accepts any buffer, despite what its annotations say
+        if not self.cache_codecs:
+            obj = cbor2.loads(payload, **self.decoder_options)  # type: ignore[arg-type]
+        else:
+            decoder = self._acquire_decoder()
+            obj = decoder.decode_from_bytes(payload)  # type: ignore[arg-type]
+            self._release_decoder(decoder)
+
+        return obj if into is None else self.unmarshal_into(obj, into)
+
+    def serialize_into(self, obj: Any, out: bytearray | memoryview) -> int:
+        encoder = self._acquire_encoder()
+        buffer = cast(BytesIO, encoder.fp)
+        try:
+            encoder.encode(obj)
+            with buffer.getbuffer() as view:
+                size = write_into(out, view)
+        finally:
+            buffer.seek(0)
+            buffer.truncate()
+
+        self._release_encoder(encoder)
+        return size
+
+    def serialize_many(self, objs: Iterable[Any]) -> list[bytes]:
+        encoder = self._acquire_encoder()
+        buffer = cast(BytesIO, encoder.fp)
+        payloads: list[bytes] = []
+        try:
+            for obj in objs:
+                encoder.encode(obj)
+                payloads.append(buffer.getvalue())
+                buffer.seek(0)
+                buffer.truncate()
+                encoder = self._next_encoder(encoder)
+        finally:
+            buffer.seek(0)
+            buffer.truncate()
+
+        self._release_encoder(encoder)
+        return payloads
+
+    def serialize_batch(self, objs: Iterable[Any]) -> bytes:
+        # Room is left for the length prefix of each object, and the prefixes are
+        # filled in once the whole batch has been encoded into the buffer
+        encoder = self._acquire_encoder()
+        buffer = cast(BytesIO, encoder.fp)
+        prefix_size = BATCH_LENGTH_PREFIX.size
+        placeholder = bytes(prefix_size)
+        offsets: list[tuple[int, int]] = []
+        try:
+            for obj in objs:
+                start = buffer.tell()
+                buffer.write(placeholder)
+                encoder.encode(obj)
+                offsets.append((start, buffer.tell() - start - prefix_size))
+                encoder = self._next_encoder(encoder)
+
+            with buffer.getbuffer() as view:
+                for start, length in offsets:
+                    BATCH_LENGTH_PREFIX.pack_into(view, start, length)
+
+            payload = buffer.getvalue()
+        finally:
+            buffer.seek(0)
+            buffer.truncate()
+
+        self._release_encoder(encoder)
+        return payload
+
+    def serialize_parts(self, obj: Any) -> list[bytes | bytearray | memoryview]:
+        # These options make the encoding of an item depend on what was encoded
+        # before it, which the encoder can't keep track of across the separate calls
+        options = self.encoder_options
+        if (
+            options.get("canonical")
+            or options.get("value_sharing")
+            or options.get("string_referencing")
+        ):
+            return super().serialize_parts(obj)
+
+        encoder = self._acquire_encoder()
+        buffer = cast(BytesIO, encoder.fp)
+        threshold = self.buffer_threshold
+        parts: list[bytes | bytearray | memoryview] = []
+
+        # Containers are walked through here (encoding only their headers) so that the
+        # large byte strings in them can be left out of the encoder's buffer. Those
+        # already being walked through are passed to the encoder as-is, so that it
+        # raises the same error for the reference cycle as serialize() does.
+        active: set[int] = set()
+
+        def walk(obj: Any) -> None:
+            cls = obj.__class__
+            if cls is dict or cls is list or cls is tuple:
+                obj_id = id(obj)
+                if obj_id in active:
+                    encoder.encode(obj)
+                    return
+
+                active.add(obj_id)
+                if cls is dict:
+                    encoder.encode_length(5, len(obj))
+                    for key, value in obj.items():
+                        encoder.encode(key)
+                        walk(value)
+                else:
+                    encoder.encode_length(4, len(obj))
+                    for item in obj:
+                        walk(item)
+
+                active.remove(obj_id)
+            elif (cls is bytes or cls is bytearray) and len(obj) >= threshold:
+                encoder.encode_length(2, len(obj))
+                parts.append(buffer.getvalue())
+                buffer.seek(0)
+                buffer.truncate()
+                parts.append(obj)
+            else:
+                encoder.encode(obj)
+
+        try:
+            walk(obj)
+            if buffer.tell() or not parts:
+                parts.append(buffer.getvalue())
+        finally:
+            buffer.seek(0)
+            buffer.truncate()
+
+        self._release_encoder(encoder)
+        return parts
+
+    def deserialize_many(self, payloads: Iterable[BytesLike]) -> list[Any]:
+        decoder = self._acquire_decoder()
+        objs: list[Any] = []
+        for payload in payloads:
+            objs.append(decoder.decode_from_bytes(payload))  # type: ignore[arg-type]
+            decoder = self._next_decoder(decoder)
+
+        self._release_decoder(decoder)
+        return objs
+
+    # The codecs are detached from the thread local while in use so that reentrant
+    # calls get codecs of their own, and they're only put back if the operation
+    # succeeded, as a failure could leave them in an inconsistent state
+    def _acquire_encoder(self) -> cbor2.CBOREncoder:
+        encoder: cbor2.CBOREncoder | None = self._codecs.__dict__.pop("encoder", None)
+        if encoder is None:
+            encoder = cbor2.CBOREncoder(BytesIO(), **self.encoder_options)
+
+        return encoder
+
+    def _release_encoder(self, encoder: cbor2.CBOREncoder) -> None:
+        if self.cache_codecs and _reusable_codecs:
+            self._codecs.encoder = encoder
+
+    def _next_encoder(self, encoder: cbor2.CBOREncoder) -> cbor2.CBOREncoder:
+        # Returns the encoder to use for the next top-level object in the same buffer
+        if _reusable_codecs:
+            return encoder
+
+        return cbor2.CBOREncoder(encoder.fp, **self.encoder_options)
+
+    def _acquire_decoder(self) -> cbor2.CBORDecoder:
+        decoder: cbor2.CBORDecoder | None = self._codecs.__dict__.pop("decoder", None)
+        if decoder is None:
+            decoder = cbor2.CBORDecoder(BytesIO(), **self.decoder_options)
+
+        return decoder
+
+    def _release_decoder(self, decoder: cbor2.CBORDecoder) -> None:
+        if self.cache_codecs and _reusable_codecs:
+            self._codecs.decoder = decoder
+
+    def _next_decoder(self, decoder: cbor2.CBORDecoder) -> cbor2.CBORDecoder:
+        if _reusable_codecs:
+            return decoder
+
+        return cbor2.CBORDecoder(decoder.fp, **self.decoder_options)
+
+    def dump(self, obj: Any, fp: IO[bytes]) -> None:
+        cbor2.dump(obj, fp, **self.encoder_options)
+
+    def load(self, fp: IO[bytes]) -> Any:
+        return cbor2.load(fp, **self.decoder_options)
 
     @property
     def mimetype(self) -> str:
         return "application/cbor"
+
+
+class CBORIncrementalDecoder:
+    """
+    Decodes CBOR objects from a byte stream that arrives in arbitrary chunks.
+
+    Feed the received chunks to :meth:`feed` and iterate over the decoder to get the
+    objects that have been completely received so far. Any incomplete trailing data is
+    kept until more data arrives. Custom types are unmarshalled using the codec of the
+    given serializer.
+
+    The chunks are appended to a single internal buffer which the decoder reads
+    directly. Consumed data is discarded once the buffer has been fully read, or
+    when the consumed part grows larger than ``compact_threshold`` bytes.
+
+    As :class:`cbor2.CBORDecoder` cannot suspend decoding, the received data is first
+    scanned for the item boundaries, and an object is only decoded once it has been
+    received completely. The scanner keeps its position and nesting state between
+    calls to :meth:`feed`, so every byte is scanned only once.
+
+    :param serializer: the serializer whose decoder options to use
+    :param compact_threshold: number of consumed bytes after which they're discarded
+        from the buffer even if unconsumed data remains
+    """
+
+    __slots__ = (
+        "_serializer",
+        "_buffer",
+        "_decoder",
+        "_scan_position",
+        "_pending",
+        "compact_threshold",
+    )
+
+    def __init__(self, serializer: CBORSerializer, compact_threshold: int = 65536):
+        self._serializer = serializer
+        self._buffer = BytesIO()
+        self._decoder = cbor2.CBORDecoder(self._buffer, **serializer.decoder_options)
+        self._scan_position = 0
+        self._pending: list[int] = []
+        self.compact_threshold = compact_threshold
+
+    def feed(self, data: BytesLike) -> None:
+        """
+        Add more data to the internal buffer.
+
+        :param data: the next chunk of the byte stream
+
+        """
+        buffer = self._buffer
+        position = buffer.tell()
+        end = buffer.seek(0, SEEK_END)
+        if position == end:
+            buffer.seek(0)
+            buffer.truncate()
+            buffer.write(data)
+            buffer.seek(0)
+            self._scan_position = 0
+        elif position >= self.compact_threshold:
+            with buffer.getbuffer() as view:
+                self._buffer = BytesIO(view[position:])
+
+            self._buffer.seek(0, SEEK_END)
+            self._buffer.write(data)
+            self._buffer.seek(0)
+            self._decoder.fp = self._buffer
+            self._scan_position -= position
+        else:
+            buffer.write(data)
+            buffer.seek(position)
+
+    def _scan(self) -> bool:
+        # Advances the scan position past the next complete top-level item, if it has
+        # been received completely. The pending list holds the number of items still
+        # missing from each enclosing array, map or tag (-1 for indefinite length
+        # items, which are closed by a "break" byte).
+        pending = self._pending
+        position = self._scan_position
+        with self._buffer.getbuffer() as view:
+            end = len(view)
+            while position < end:
+                initial = view[position]
+                major = initial >> 5
+                info = initial & 0x1F
+                size = 1
+                if info < 24:
+                    length = info
+                elif info < 28:
+                    size += 1 << (info - 24)
+                    if position + size > end:
+                        break
+
+                    length = int.from_bytes(view[position + 1 : position + size], "big")
+                elif info == 31 and 2 <= major <= 5:
+                    length = -1
+                elif initial != 0xFF or not pending or pending[-1] >= 0:
+                    raise cbor2.CBORDecodeValueError(
+                        f"invalid initial byte in CBOR stream: 0x{initial:02x}"
+                    )
+
+                if initial == 0xFF:
+                    pending.pop()
+                elif major == 6:
+                    pending.append(1)
+                    position += size
+                    continue
+                elif length < 0 or ((major == 4 or major == 5) and length):
+                    pending.append(length * 2 if major == 5 and length > 0 else length)
+                    position += size
+                    continue
+                elif major == 2 or major == 3:
+                    size += length
+                    if position + size > end:
+                        break
+
+                position += size
+
+                # Count the completed item against the enclosing ones, and any of
+                # those that it completed against their own enclosing ones
+                while pending and pending[-1] > 0:
+                    pending[-1] -= 1
+                    if pending[-1]:
+                        break
+
+                    pending.pop()
+
+                if not pending:
+                    self._scan_position = position
+                    return True
+
+        self._scan_position = position
+        return False
+
+    def __iter__(self) -> Iterator[Any]:
+        return self
+
+    def __next__(self) -> Any:
+        if not self._scan():
+            raise StopIteration
+
+        # The next item is skipped even if decoding it fails
+        try:
+            return self._decoder.decode()
+        finally:
+            self._buffer.seek(self._scan_position)
+            self._decoder = self._serializer._next_decoder(self._decoder)
@@ -0,0 +1,207 @@
+from __future__ import annotations
+
+import lzma
+import zlib
+from collections.abc import Callable
+from copy import deepcopy
+from os import PathLike
+from pathlib import Path
+from threading import local
+from typing import TYPE_CHECKING, Any
+
+from ..api import BytesLike, Serializer
+
+if TYPE_CHECKING:
+    import zstandard
+
+#: header bytes identifying the compression codec used for a payload
+HEADER_UNCOMPRESSED = 0
+HEADER_ZLIB = 1
+HEADER_LZMA = 2
+HEADER_ZSTD = 3
+
+_codec_headers = {"zlib": HEADER_ZLIB, "lzma": HEADER_LZMA, "zstd": HEADER_ZSTD}
+
+
+class CompressingSerializer(Serializer):
+    """
+    Wraps another serializer, compressing the payloads produced by it.
+
+    Payloads of at least ``threshold`` bytes are compressed with the chosen codec,
+    unless this would not make them any smaller. Each payload starts with a header byte
+    which identifies the codec used for it (or that it was not compressed), so payloads
+    compressed with any of the supported codecs can be deserialized regardless of the
+    ``codec`` option.
+
+    The following codecs are supported:
+
+    * ``zlib`` (:mod:`zlib`)
+    * ``lzma`` (:mod:`lzma`)
+    * ``zstd`` (requires the zstandard_ library)
+
+    Compressing small payloads effectively requires a dictionary trained on typical
+    payloads (see :func:`zstandard.train_dictionary`) which is then given to this
+    serializer as ``dictionary``. Such payloads can only be deserialized with the same
+    dictionary.
+
+    Custom types should be registered on :attr:`serializer`.
+
+    The zstandard library can be installed with the ``zstd`` extra:
+
+    .. code-block:: shell
+
+        $ pip install asphalt-serialization[zstd]
+
+    .. _zstandard: https://github.com/indygreg/python-zstandard
+
+    :param backend: the name of the wrapped serializer backend, a ``module:varname``
+        reference to its class, or the class itself
+    :param options: keyword arguments passed to the wrapped serializer backend class
+    :param codec: the compression codec to use (``zlib``, ``lzma`` or ``zstd``)
+    :param threshold: minimum size (in bytes) of a payload for it to be compressed
+    :param level: compression level (or preset, for ``lzma``), or ``None`` to use the
+        default level of the codec
+    :param dictionary: a pre-trained zstd dictionary, or the path to a file containing
+        one (only with the ``zstd`` codec)
+    """
+
+    __slots__ = (
+        "serializer",
+        "options",
+        "codec",
+        "threshold",
+        "level",
+        "_header",
+        "_compress",
+        "_zstd_dictionary",
+        "_zstd_codecs",
+    )
+
+    def __init__(
+        self,
+        backend: str | type[Serializer],
+        options: dict[str, Any] | None = None,
+        codec: str = "zlib",
+        threshold: int = 1024,
+        level: int | None = None,
+        dictionary: bytes | str | PathLike[str] | None = None,
+    ):
+        try:
+            self._header = _codec_headers[codec]
+        except KeyError:
+            raise ValueError(
+                f'codec must be "zlib", "lzma" or "zstd", not {codec!r}'
+            ) from None
+
+        if dictionary is not None and codec != "zstd":
+            raise ValueError(f"a dictionary can only be used with zstd, not {codec}")
+
+        from ..component import serializer_types
+
+        self.options: dict[str, Any] = deepcopy(options or {})
+        self.serializer: Serializer = serializer_types.create_object(
+            backend, **deepcopy(self.options)
+        )
+        self.codec = codec
+        self.threshold = threshold
+        self.level = level
+        self._zstd_dictionary: zstandard.ZstdCompressionDict | None = None
+        self._zstd_codecs = local()
+        if dictionary is not None:
+            import zstandard
+
+            if not isinstance(dictionary, bytes):
+                dictionary = Path(dictionary).read_bytes()
+
+            self._zstd_dictionary = zstandard.ZstdCompressionDict(dictionary)
+
+        self._compress: Callable[[Any], bytes]
+        if codec == "zlib":
+            zlib_level = -1 if level is None else level
+            self._compress = lambda data: zlib.compress(data, zlib_level)
+        elif codec == "lzma":
+            self._compress = lambda data: lzma.compress(data, preset=level)
+        else:
+            import zstandard
+
+            self._compress = self._zstd_compress
+
+    def _zstd_compress(self, data: Any) -> bytes:
+        # zstd compressors and decompressors must not be shared between threads
+        codecs = self._zstd_codecs
+        try:
+            compressor = codecs.compressor
+        except AttributeError:
+            import zstandard
+
+            # The dictionary ID is left out, as both sides must use the same dictionary
+            # anyway
+            level = 3 if self.level is None else self.level
+            compressor = codecs.compressor = zstandard.ZstdCompressor(
+                level, dict_data=self._zstd_dictionary, write_dict_id=False
+            )
+
+        return compressor.compress(data)  # type: ignore[no-any-return]
+
+    def _zstd_decompress(self, data: Any) -> bytes:
+        codecs = self._zstd_codecs
+        try:
+            decompressor = codecs.decompressor
+        except AttributeError:
+            import zstandard
+
+            decompressor = codecs.decompressor = zstandard.ZstdDecompressor(
+                dict_data=self._zstd_dictionary
+            )
+
+        return decompressor.decompress(data)  # type: ignore[no-any-return]
+
+    def compress(self, payload: bytes) -> bytes:
+        """
+        Add the header to a payload, compressing it if it's large enough.
+
+        :param payload: a payload produced by the wrapped serializer
+        :return: the payload to be passed to :meth:`decompress`
+
+        """
+        if len(payload) >= self.threshold:
+            compressed = self._compress(payload)
+            if len(compressed) < len(payload):
+                return bytes((self._header,)) + compressed
+
+        return b"\x00" + payload
+
+    def decompress(self, payload: BytesLike) -> bytes | memoryview:
+        """
+        Remove the header from a payload, decompressing it if necessary.
+
+        :param payload: a payload produced by :meth:`compress`
+        :return: the payload to be passed to the wrapped serializer
+        :raises ValueError: if the payload is empty or its header byte is unknown
+
+        """
+        if not payload:
+            raise ValueError("the payload is empty")
+
+        view = memoryview(payload)
+        header = view[0]
+        if header == HEADER_UNCOMPRESSED:
+            return view[1:]
+        elif header == HEADER_ZLIB:
+            return zlib.decompress(view[1:])
+        elif header == HEADER_LZMA:
+            return lzma.decompress(view[1:])
+        elif header == HEADER_ZSTD:
+            return self._zstd_decompress(view[1:])
+        else:
+            raise ValueError(f"unknown compression header: {header:#x}")
+
+    def serialize(self, obj: Any) -> bytes:
+        return self.compress(self.serializer.serialize(obj))
+
+    def deserialize(self, payload: BytesLike) -> Any:
+        return self.serializer.deserialize(self.decompress(payload))
+
+    @property
+    def mimetype(self) -> str:
+        return "application/octet-stream"
@@ -1,28 +1,156 @@
 from __future__ import annotations
 
+import codecs
+import warnings
+from collections.abc import Callable, Iterable, Iterator
 from json.decoder import JSONDecoder
 from json.encoder import JSONEncoder
-from typing import Any
+from threading import local
+from typing import IO, TYPE_CHECKING, Any
 
-from asphalt.core import resolve_reference
-
-from ..api import CustomizableSerializer
+from ..api import BATCH_LENGTH_PREFIX, BytesLike, CustomizableSerializer
 from ..object_codec import DefaultCustomTypeCodec
 
+if TYPE_CHECKING:
+    import orjson
+    from anyio.abc import ByteSendStream
+
+#: minimum size of the chunks (in characters) written by the streaming methods
+STREAM_CHUNK_SIZE = 65536
+
+_orjson_input_types = bytes, bytearray, memoryview
+
+
+def _import_orjson() -> bool:
+    # orjson is imported when the first serializer using it is created, rather than
+    # when this module is imported
+    global orjson
+    try:
+        import orjson
+    except ImportError:
+        return False
+
+    return True
+
+
+def _create_orjson_encoder(
+    default: Callable[[Any], Any] | None, option: int, errors: local
+) -> Callable[[Any], bytes]:
+    # These flags make orjson pass objects to the default hook like the json module
+    option |= orjson.OPT_PASSTHROUGH_DATACLASS | orjson.OPT_PASSTHROUGH_DATETIME
+    dumps = orjson.dumps
+    if default is None:
+        return lambda obj: dumps(obj, option=option)
+
+    # orjson replaces any exception raised by the default hook with a generic one, so
+    # the original exception is stored on the side and raised instead
+    def call_default(obj: Any) -> Any:
+        try:
+            return default(obj)
+        except Exception as exc:
+            errors.exception = exc
+            raise
+
+    def encode(obj: Any) -> bytes:
+        try:
+            return dumps(obj, default=call_default, option=option)
+        except orjson.JSONEncodeError:
+            exception = errors.__dict__.pop("exception", None)
+            if exception is None:
+                raise
+
+            raise exception from None
+
+    return encode
+
+
+def _create_orjson_decoder(
+    object_hook: Callable[[dict[str, Any]], Any] | None,
+    object_pairs_hook: Callable[[list[tuple[str, Any]]], Any] | None,
+    type_key: str | None,
+) -> Callable[[Any], Any]:
+    loads = orjson.loads
+    marker = f'"{type_key}"'.encode("ascii") if type_key is not None else None
+    hook: Callable[[dict[str, Any]], Any] | None = object_hook
+    if object_pairs_hook is not None:
+
+        def hook(obj: dict[str, Any]) -> Any:
+            return object_pairs_hook(list(obj.items()))
+
+    def decode(payload: Any) -> Any:
+        if payload.__class__ not in _orjson_input_types:
+            payload = memoryview(payload)
+
+        obj = loads(payload)
+        if hook is not None and (obj.__class__ is dict or obj.__class__ is list):
+            # Walking through the decoded object is skipped if the payload cannot
+            # contain anything the hook would replace
+            if (
+                marker is None
+                or payload.__class__ is memoryview
+                or marker in payload
+                or b"\\u" in payload
+            ):
+                return _apply_object_hook(obj, hook, type_key)
+
+        return obj
+
+    return decode
+
+
+def _apply_object_hook(
+    obj: Any, hook: Callable[[dict[str, Any]], Any], type_key: str | None
+) -> Any:
+    # Mimics the json module by calling the hook on the innermost dicts first. If
+    # type_key is given, the hook is only called on dicts that may have wrapped state.
+    if obj.__class__ is dict:
+        for key, value in obj.items():
+            cls = value.__class__
+            if cls is dict or cls is list:
+                obj[key] = _apply_object_hook(value, hook, type_key)
+
+        if type_key is None or (len(obj) == 2 and type_key in obj):
+            return hook(obj)
+
+        return obj
+
+    for index, item in enumerate(obj):
+        cls = item.__class__
+        if cls is dict or cls is list:
+            obj[index] = _apply_object_hook(item, hook, type_key)
+
+    return obj
+
 
 class JSONTypeCodec(DefaultCustomTypeCodec["JSONSerializer"]):
     """Default state wrapper implementation for :class:`~.JSONSerializer`."""
 
     def register_object_encoder_hook(self, serializer: JSONSerializer) -> None:
-        self.serializer = serializer
+        super().register_object_encoder_hook(serializer)
         serializer.encoder_options["default"] = self.default_encoder
-        serializer._encoder = JSONEncoder(**serializer.encoder_options)
+        serializer._create_encoder()
 
     def register_object_decoder_hook(self, serializer: JSONSerializer) -> None:
         self.serializer = serializer
         serializer.decoder_options["object_hook"] = self.default_decoder
         serializer.decoder_options.pop("object_pairs_hook", None)
-        serializer._decoder = JSONDecoder(**serializer.decoder_options)
+        serializer._create_decoder()
+
+    def _plain_type_key(self) -> str | None:
+        # Returns the type key if the wrapped state can only be found in dicts with
+        # this key, and the key is written verbatim (without escape sequences) in the
+        # payload by the JSON encoder
+        type_key = self.type_key
+        if (
+            self.unwrap_callback == self.unwrap_state_dict
+            and type_key.isascii()
+            and type_key.isprintable()
+            and '"' not in type_key
+            and "\\" not in type_key
+        ):
+            return type_key
+
+        return None
 
 
 class JSONSerializer(CustomizableSerializer):
@@ -38,19 +166,52 @@ class JSONSerializer(CustomizableSerializer):
     * ``decoder_options['object_hook']``
     * ``decoder_options['object_pairs_hook']``
 
+    With ``engine="orjson"``, the (considerably faster) orjson_ library is used instead
+    of the :mod:`json` module. This engine produces UTF-8 encoded bytes directly, and
+    supports the following options:
+
+    * ``encoder_options['default']``
+    * ``encoder_options['option']`` (flags passed to :func:`orjson.dumps`)
+    * ``decoder_options['object_hook']``
+    * ``decoder_options['object_pairs_hook']``
+
+    The object hooks are run on the decoded object afterwards, as orjson has no decoder
+    hooks. Dataclasses and :class:`~datetime.datetime` objects are passed to the
+    ``default`` hook (like with the :mod:`json` module) rather than being serialized
+    natively by orjson. The output is otherwise not identical to that of the
+    :mod:`json` module. For example, it contains no whitespace by default, and dicts
+    with non-string keys cannot be serialized without the ``OPT_NON_STR_KEYS`` flag. If
+    orjson is not installed, a warning is emitted and the :mod:`json` module is used
+    instead. The library can be installed with the ``orjson`` extra:
+
+    .. code-block:: shell
+
+        $ pip install asphalt-serialization[orjson]
+
+    .. _orjson: https://github.com/ijl/orjson
+
+    :meth:`load` reads the file until its end, so it can only be used to read files
+    containing a single JSON document.
+
     :param encoder_options: keyword arguments passed to :class:`~json.JSONEncoder`
     :param decoder_options: keyword arguments passed to :class:`~json.JSONDecoder`
-    :param encoding: the text encoding to use for converting to and from bytes
+    :param encoding: the text encoding to use for converting to and from bytes (must be
+        UTF-8 with the orjson engine)
     :param custom_type_codec: wrapper to use to wrap custom types after marshalling
+    :param engine: the JSON implementation to use (``stdlib`` or ``orjson``)
     """
 
     __slots__ = (
         "encoder_options",
         "decoder_options",
         "encoding",
+        "engine",
         "custom_type_codec",
         "_encoder",
         "_decoder",
+        "_encode",
+        "_decode",
+        "_encode_errors",
         "_marshallers",
         "_unmarshallers",
     )
@@ -61,15 +222,33 @@ class JSONSerializer(CustomizableSerializer):
         decoder_options: dict[str, Any] | None = None,
         encoding: str = "utf-8",
         custom_type_codec: JSONTypeCodec | str | None = None,
+        engine: str = "stdlib",
     ):
+        from asphalt.core import resolve_reference
+
         super().__init__(resolve_reference(custom_type_codec) or JSONTypeCodec())
         self.encoding: str = encoding
+        if engine == "orjson":
+            if not _import_orjson():
+                warnings.warn(
+                    "orjson is not installed; falling back to the json module",
+                    RuntimeWarning,
+                    stacklevel=2,
+                )
+                engine = "stdlib"
+            elif codecs.lookup(encoding).name != "utf-8":
+                raise ValueError("the orjson engine only supports the UTF-8 encoding")
+        elif engine != "stdlib":
+            raise ValueError(f"unknown JSON engine: {engine!r}")
+
+        self.engine = engine
+        self._encode_errors = local()
 
         self.encoder_options: dict[str, Any] = encoder_options or {}
         self.encoder_options["default"] = resolve_reference(
             self.encoder_options.get("default")
         )
-        self._encoder = JSONEncoder(**self.encoder_options)
+        self._create_encoder()
 
         self.decoder_options: dict[str, Any] = decoder_options or {}
         self.decoder_options["object_hook"] = resolve_reference(
@@ -78,14 +257,128 @@ class JSONSerializer(CustomizableSerializer):
         self.decoder_options["object_pairs_hook"] = resolve_reference(
             self.decoder_options.get("object_pairs_hook")
         )
-        self._decoder = JSONDecoder(**self.decoder_options)
+        self._create_decoder()
+
+    def _create_encoder(self) -> None:
+        self._encoder: JSONEncoder | None
+        self._encode: Callable[[Any], bytes]
+        if self.engine == "stdlib":
+            encoder = self._encoder = JSONEncoder(**self.encoder_options)
+            encoding = self.encoding
+            self._encode = lambda obj: encoder.encode(obj).encode(encoding)
+            return
+
+        options = dict(self.encoder_options)
+        default = options.pop("default", None)
+        option = options.pop("option", None) or 0
+        if options:
+            raise ValueError(
+                f"unsupported encoder options for the orjson engine: "
+                f"{', '.join(sorted(options))}"
+            )
+
+        self._encoder = None
+        self._encode = _create_orjson_encoder(default, option, self._encode_errors)
+
+    def _create_decoder(self) -> None:
+        self._decoder: JSONDecoder | None
+        self._decode: Callable[[Any], Any]
+        if self.engine == "stdlib":
+            decoder = self._decoder = JSONDecoder(**self.decoder_options)
+            encoding = self.encoding
+            self._decode = lambda payload: decoder.decode(str(payload, encoding))
+            return
+
+        options = {
+            key: value
+            for key, value in self.decoder_options.items()
+            if value is not None
+        }
+        object_hook = options.pop("object_hook", None)
+        object_pairs_hook = options.pop("object_pairs_hook", None)
+        if options:
+            raise ValueError(
+                f"unsupported decoder options for the orjson engine: "
+                f"{', '.join(sorted(options))}"
+            )
+
+        type_key = None
+        codec = self.custom_type_codec
+        if isinstance(codec, JSONTypeCodec) and object_hook == codec.default_decoder:
+            type_key = codec._plain_type_key()
+
+        self._decoder = None
+        self._decode = _create_orjson_decoder(object_hook, object_pairs_hook, type_key)
 
     def serialize(self, obj: Any) -> bytes:
-        return self._encoder.encode(obj).encode(self.encoding)
+        return self._encode(obj)
+
+    def deserialize(self, payload: BytesLike, into: Any = None) -> Any:
+        if into is None:
+            return self._decode(payload)
+
+        return self.unmarshal_into(self._decode(payload), into)
+
+    def serialize_many(self, objs: Iterable[Any]) -> list[bytes]:
+        encode = self._encode
+        return [encode(obj) for obj in objs]
+
+    def serialize_batch(self, objs: Iterable[Any]) -> bytes:
+        encode = self._encode
+        pack_length = BATCH_LENGTH_PREFIX.pack
+        buffer = bytearray()
+        for obj in objs:
+            payload = encode(obj)
+            buffer += pack_length(len(payload))
+            buffer += payload
+
+        return bytes(buffer)
+
+    def deserialize_many(self, payloads: Iterable[BytesLike]) -> list[Any]:
+        decode = self._decode
+        return [decode(payload) for payload in payloads]
+
+    def iterencode(self, obj: Any) -> Iterator[bytes]:
+        """
+        Serialize a Python object into a sequence of byte chunks.
+
+        The fragments produced by :meth:`json.JSONEncoder.iterencode` are collected
+        into chunks of at least :data:`STREAM_CHUNK_SIZE` characters before encoding
+        them.
+
+        .. note:: This is slower than :meth:`serialize` because the C accelerated
+            encoder cannot be used for incremental encoding.
+
+        With the orjson engine, the whole document is yielded as a single chunk.
+
+        :param obj: the object to serialize
+        :return: an iterator yielding encoded chunks of the JSON document
+
+        """
+        if self._encoder is None:
+            yield self._encode(obj)
+            return
+
+        fragments: list[str] = []
+        size = 0
+        for fragment in self._encoder.iterencode(obj):
+            fragments.append(fragment)
+            size += len(fragment)
+            if size >= STREAM_CHUNK_SIZE:
+                yield "".join(fragments).encode(self.encoding)
+                fragments.clear()
+                size = 0
+
+        if fragments:
+            yield "".join(fragments).encode(self.encoding)
+
+    def dump(self, obj: Any, fp: IO[bytes]) -> None:
+        for chunk in self.iterencode(obj):
+            fp.write(chunk)
 
-    def deserialize(self, payload: bytes) -> Any:
-        text_payload = payload.decode(self.encoding)
-        return self._decoder.decode(text_payload)
+    async def dump_async(self, obj: Any, stream: ByteSendStream) -> None:
+        for chunk in self.iterencode(obj):
+            await stream.send(chunk)
 
     @property
     def mimetype(self) -> str:
@@ -1,13 +1,52 @@
 from __future__ import annotations
 
-from typing import Any
+from collections.abc import Iterable, Iterator
+from struct import Struct
+from threading import local
+from typing import IO, TYPE_CHECKING, Any
 
-from asphalt.core import resolve_reference
-from msgpack import ExtType, packb, unpackb
-
-from ..api import CustomizableSerializer
+from ..api import BATCH_LENGTH_PREFIX, BytesLike, CustomizableSerializer, write_into
 from ..object_codec import DefaultCustomTypeCodec
 
+if TYPE_CHECKING:
+    from anyio.abc import ByteReceiveStream
+    from msgpack import ExtType, Packer, Unpacker, unpackb
+
+#: struct formats of the msgpack unsigned integer types, keyed by their header bytes
+_type_id_formats = {
+    0xCC: Struct(">B"),
+    0xCD: Struct(">H"),
+    0xCE: Struct(">I"),
+    0xCF: Struct(">Q"),
+}
+
+_bin16_header = Struct(">BH")
+_bin32_header = Struct(">BI")
+
+
+def _bin_header(size: int) -> bytes:
+    # Same as the header the packer writes for a bin object of the given size
+    if size < 0x100:
+        return bytes((0xC4, size))
+    elif size < 0x10000:
+        return _bin16_header.pack(0xC5, size)
+    else:
+        return _bin32_header.pack(0xC6, size)
+
+
+def _import_msgpack() -> None:
+    # msgpack is imported when the first serializer is created, rather than when this
+    # module is imported
+    global ExtType, Packer, Unpacker, unpackb
+    from msgpack import ExtType, Packer, Unpacker, unpackb
+
+
+class _InlineTypeMarker:
+    __slots__ = "typename"
+
+    def __init__(self, typename: str | int):
+        self.typename = typename
+
 
 class MsgpackTypeCodec(DefaultCustomTypeCodec["MsgpackSerializer"]):
     """
@@ -16,44 +55,115 @@ class MsgpackTypeCodec(DefaultCustomTypeCodec["MsgpackSerializer"]):
     Wraps marshalled state in either msgpack's ExtType objects (the default) or dicts
     (with ``type_code=None``).
 
+    Custom types with type IDs are wrapped in ExtType objects with the type code
+    ``type_id_code``, containing the type ID (as a msgpack integer) followed by the
+    marshalled state.
+
+    With ``inline_state=True``, the marshalled state is not packed separately into the
+    ExtType. Instead, the object is packed as a two element array containing an
+    ExtType (with the type code ``inline_type_code``) holding the type name or ID,
+    followed by the marshalled state, in the same pass as the rest of the data. This
+    avoids packing nested custom type objects repeatedly, but requires every array to
+    be inspected on unpacking, so only codecs with ``inline_state=True`` can unpack such
+    data.
+
     :param type_code: msgpack type code to use, or ``None`` to use JSON compatible
         dict-based wrapping
+    :param type_id_code: msgpack type code to use for custom types with type IDs
+    :param inline_state: ``True`` to pack the marshalled state inline
+    :param inline_type_code: msgpack type code to use for marking inline packed state
     """
 
-    def __init__(self, type_code: int | None = 119, **kwargs: Any):
+    def __init__(
+        self,
+        type_code: int | None = 119,
+        type_id_code: int = 118,
+        inline_state: bool = False,
+        inline_type_code: int = 117,
+        **kwargs: Any,
+    ):
         super().__init__(**kwargs)
         self.type_code = type_code
+        self.type_id_code = type_id_code
+        self.inline_state = inline_state
+        self.inline_type_code = inline_type_code
+        self._inline_markers: dict[str | int, ExtType] = {}
 
         if type_code:
-            self.wrap_callback = self.wrap_state_ext_type
+            self.wrap_callback = (
+                self.wrap_state_inline if inline_state else self.wrap_state_ext_type
+            )
             self.unwrap_callback = self.unwrap_state_ext_type
 
     def register_object_encoder_hook(self, serializer: MsgpackSerializer) -> None:
-        self.serializer = serializer
+        super().register_object_encoder_hook(serializer)
         serializer.packer_options["default"] = self.default_encoder
+        serializer.reset_packers()
 
     def register_object_decoder_hook(self, serializer: MsgpackSerializer) -> None:
         self.serializer = serializer
         if self.type_code:
             serializer.unpacker_options["ext_hook"] = self.ext_hook
+            if self.inline_state:
+                serializer.unpacker_options["list_hook"] = self.list_hook
         else:
             serializer.unpacker_options["object_hook"] = self.default_decoder
 
     def ext_hook(self, code: int, data: bytes) -> Any:
         if code == self.type_code:
             return self.default_decoder(data)
+        elif code == self.type_id_code:
+            header = data[0]
+            if header < 0x80:
+                type_id, offset = header, 1
+            else:
+                try:
+                    type_id_format = _type_id_formats[header]
+                except KeyError:
+                    raise ValueError(
+                        f"invalid type ID header in ExtType data: {header:#x}"
+                    ) from None
+
+                type_id = type_id_format.unpack_from(data, 1)[0]
+                offset = type_id_format.size + 1
+
+            state = self.serializer.deserialize(memoryview(data)[offset:])
+            return self.unmarshal(type_id, state)
+        elif code == self.inline_type_code and self.inline_state:
+            return _InlineTypeMarker(unpackb(data, raw=False))
         else:
             return ExtType(code, data)
 
-    def wrap_state_ext_type(self, typename: str, state: Any) -> ExtType:
+    def list_hook(self, obj: list[Any]) -> Any:
+        if len(obj) == 2 and obj[0].__class__ is _InlineTypeMarker:
+            return self.unmarshal(obj[0].typename, obj[1])
+
+        return obj
+
+    def wrap_state_inline(self, typename: str | int, state: Any) -> list[Any]:
+        try:
+            marker = self._inline_markers[typename]
+        except KeyError:
+            marker = ExtType(self.inline_type_code, self.serializer.serialize(typename))
+            self._inline_markers[typename] = marker
+
+        return [marker, state]
+
+    def wrap_state_ext_type(self, typename: str | int, state: Any) -> ExtType:
+        if isinstance(typename, int):
+            serialize = self.serializer.serialize
+            return ExtType(self.type_id_code, serialize(typename) + serialize(state))
+
         data = typename.encode("utf-8") + b":" + self.serializer.serialize(state)
         return ExtType(self.type_code, data)
 
     def unwrap_state_ext_type(
         self, wrapped_state: bytes
-    ) -> tuple[str, Any] | tuple[None, None]:
-        typename, payload = wrapped_state.split(b":", 1)
-        return typename.decode("utf-8"), self.serializer.deserialize(payload)
+    ) -> tuple[str | int, Any] | tuple[None, None]:
+        separator = wrapped_state.index(b":")
+        view = memoryview(wrapped_state)
+        typename = str(view[:separator], "utf-8")
+        return typename, self.serializer.deserialize(view[separator + 1 :])
 
 
 class MsgpackSerializer(CustomizableSerializer):
@@ -76,16 +186,36 @@ class MsgpackSerializer(CustomizableSerializer):
 
     .. seealso:: `Msgpack web site <http://msgpack.org/>`_
 
-    :param packer_options: keyword arguments passed to :func:`msgpack.packb`
+    Each thread gets its own :class:`msgpack.Packer` (two if :meth:`serialize_into` is
+    used) which is reused for all serialization done by that thread. If you modify
+    ``packer_options`` after the serializer has been used, you need to call
+    :meth:`reset_packers` for the changes to take effect.
+
+    :meth:`serialize_parts` returns the :class:`bytes`, :class:`bytearray` and
+    (C-contiguous) :class:`memoryview` objects at least ``buffer_threshold`` bytes in
+    size, found directly or within (possibly nested) dicts and lists, as separate
+    buffers, and the rest of the payload in the buffers between them. This requires
+    ``use_bin_type=True``.
+
+    :meth:`load` reads ahead from the file. With a seekable file, the file position is
+    moved back to the end of the object afterwards, but from a non-seekable stream the
+    data read past the object is lost. Use :meth:`load_all` to read consecutive objects
+    from such a stream.
+
+    :param packer_options: keyword arguments passed to :class:`msgpack.Packer`
     :param unpacker_options: keyword arguments passed to :func:`msgpack.unpackb`
     :param custom_type_codec: wrapper to use to wrap custom types after marshalling, or
         ``None`` to return marshalled objects as-is
+    :param buffer_threshold: minimum size (in bytes) of the binary objects to be
+        returned as separate buffers by :meth:`serialize_parts`
     """
 
     __slots__ = (
         "packer_options",
         "unpacker_options",
         "custom_type_codec",
+        "buffer_threshold",
+        "_packers",
         "_marshallers",
         "_unmarshallers",
     )
@@ -95,19 +225,239 @@ class MsgpackSerializer(CustomizableSerializer):
         packer_options: dict[str, Any] | None = None,
         unpacker_options: dict[str, Any] | None = None,
         custom_type_codec: MsgpackTypeCodec | str | None = None,
+        buffer_threshold: int = 65536,
     ) -> None:
+        from asphalt.core import resolve_reference
+
+        _import_msgpack()
         super().__init__(resolve_reference(custom_type_codec) or MsgpackTypeCodec())
         self.packer_options: dict[str, Any] = packer_options or {}
         self.packer_options.setdefault("use_bin_type", True)
         self.unpacker_options: dict[str, Any] = unpacker_options or {}
         self.unpacker_options.setdefault("raw", False)
+        self.buffer_threshold = buffer_threshold
+        self._packers = local()
+
+    def reset_packers(self) -> None:
+        """
+        Discard the cached packers of all threads.
+
+        New packers will be created using the current ``packer_options`` when needed.
+
+        """
+        self._packers = local()
 
     def serialize(self, obj: Any) -> bytes:
-        return packb(obj, **self.packer_options)  # type: ignore[no-any-return]
+        # The packer is detached from the thread local while in use so that reentrant
+        # calls (from a "default" hook, for example) get a packer of their own
+        packers = self._packers
+        packer = packers.__dict__.pop("packer", None)
+        if packer is None:
+            packer = Packer(**self.packer_options)
+
+        try:
+            return packer.pack(obj)  # type: ignore[no-any-return]
+        finally:
+            packers.packer = packer
+
+    def deserialize(self, payload: BytesLike, into: Any = None) -> Any:
+        if into is None:
+            return unpackb(payload, **self.unpacker_options)
+
+        return self.unmarshal_into(unpackb(payload, **self.unpacker_options), into)
+
+    def serialize_into(self, obj: Any, out: bytearray | memoryview) -> int:
+        # This uses a separate packer which keeps the packed data in its internal
+        # buffer, so it can be copied to the output without creating a bytes object
+        packers = self._packers
+        packer = packers.__dict__.pop("buffering_packer", None)
+        if packer is None:
+            packer = Packer(**{**self.packer_options, "autoreset": False})
+
+        try:
+            packer.pack(obj)
+            with packer.getbuffer() as view:
+                return write_into(out, view)
+        finally:
+            packer.reset()
+            packers.buffering_packer = packer
+
+    def serialize_many(self, objs: Iterable[Any]) -> list[bytes]:
+        packers = self._packers
+        packer = packers.__dict__.pop("packer", None)
+        if packer is None:
+            packer = Packer(**self.packer_options)
+
+        try:
+            pack = packer.pack
+            return [pack(obj) for obj in objs]
+        finally:
+            packers.packer = packer
 
-    def deserialize(self, payload: bytes) -> Any:
-        return unpackb(payload, **self.unpacker_options)
+    def serialize_batch(self, objs: Iterable[Any]) -> bytes:
+        packers = self._packers
+        packer = packers.__dict__.pop("packer", None)
+        if packer is None:
+            packer = Packer(**self.packer_options)
+
+        pack = packer.pack
+        pack_length = BATCH_LENGTH_PREFIX.pack
+        buffer = bytearray()
+        try:
+            for obj in objs:
+                payload = pack(obj)
+                buffer += pack_length(len(payload))
+                buffer += payload
+        finally:
+            packers.packer = packer
+
+        return bytes(buffer)
+
+    def serialize_parts(self, obj: Any) -> list[bytes | bytearray | memoryview]:
+        options = self.packer_options
+        if not options["use_bin_type"]:
+            return super().serialize_parts(obj)
+
+        packers = self._packers
+        packer = packers.__dict__.pop("buffering_packer", None)
+        if packer is None:
+            packer = Packer(**{**options, "autoreset": False})
+
+        threshold = self.buffer_threshold
+        walk_tuples = not options.get("strict_types", False)
+        parts: list[bytes | bytearray | memoryview] = []
+
+        # Containers are walked through here (packing only their headers) so that the
+        # large binary objects in them can be left out of the packer's buffer. Those
+        # already being walked through are passed to the packer as-is, so that it
+        # raises the same error for the reference cycle as serialize() does.
+        active: set[int] = set()
+
+        def walk(obj: Any) -> None:
+            cls = obj.__class__
+            if cls is dict or cls is list or (cls is tuple and walk_tuples):
+                obj_id = id(obj)
+                if obj_id in active:
+                    packer.pack(obj)
+                    return
+
+                active.add(obj_id)
+                if cls is dict:
+                    packer.pack_map_header(len(obj))
+                    for key, value in obj.items():
+                        packer.pack(key)
+                        walk(value)
+                else:
+                    packer.pack_array_header(len(obj))
+                    for item in obj:
+                        walk(item)
+
+                active.remove(obj_id)
+            elif cls is bytes or cls is bytearray or cls is memoryview:
+                size = obj.nbytes if cls is memoryview else len(obj)
+                if size < threshold or (cls is memoryview and not obj.c_contiguous):
+                    packer.pack(obj)
+                    return
+
+                parts.append(packer.bytes() + _bin_header(size))
+                packer.reset()
+                parts.append(obj)
+            else:
+                packer.pack(obj)
+
+        try:
+            walk(obj)
+            tail = packer.bytes()
+            if tail or not parts:
+                parts.append(tail)
+        finally:
+            packer.reset()
+            packers.buffering_packer = packer
+
+        return parts
+
+    def deserialize_many(self, payloads: Iterable[BytesLike]) -> list[Any]:
+        options = self.unpacker_options
+        return [unpackb(payload, **options) for payload in payloads]
+
+    def _create_unpacker(self, fp: IO[bytes] | None = None, **kwargs: Any) -> Unpacker:
+        # Unlike unpackb(), Unpacker limits its buffer to 100 MiB by default, which is
+        # only kept for incremental decoding, where the data comes from another party
+        options = {"max_buffer_size": 0, **self.unpacker_options, **kwargs}
+        return Unpacker(fp, **options)
+
+    def load(self, fp: IO[bytes]) -> Any:
+        # The unpacker reads ahead, so the file position is moved back to the end of the
+        # object afterwards if possible
+        if not fp.seekable():
+            return self._create_unpacker(fp).unpack()
+
+        start = fp.tell()
+        unpacker = self._create_unpacker(fp)
+        obj = unpacker.unpack()
+        fp.seek(start + unpacker.tell())
+        return obj
+
+    def load_all(self, fp: IO[bytes]) -> Iterator[Any]:
+        """
+        Deserialize consecutive objects read from the given file until its end.
+
+        The objects are deserialized one at a time as the returned iterator is
+        consumed.
+
+        :param fp: a file-like object opened in binary mode
+        :return: an iterator yielding the deserialized objects
+
+        """
+        return iter(self._create_unpacker(fp))
+
+    async def load_async(self, stream: ByteReceiveStream) -> Any:
+        unpacker = self._create_unpacker()
+        async for chunk in stream:
+            unpacker.feed(chunk)
+
+        return unpacker.unpack()
 
     @property
     def mimetype(self) -> str:
         return "application/msgpack"
+
+
+class MsgpackIncrementalDecoder:
+    """
+    Decodes msgpack objects from a byte stream that arrives in arbitrary chunks.
+
+    Feed the received chunks to :meth:`feed` and iterate over the decoder to get the
+    objects that have been completely received so far. Any incomplete trailing data is
+    kept until more data arrives. Custom types are unmarshalled using the codec of the
+    given serializer.
+
+    This is built on :class:`msgpack.Unpacker` which keeps its parsing state between
+    calls, so incomplete objects are not parsed again from the start. Feeding more data
+    than fits in its buffer (``max_buffer_size`` bytes, including the data not yet
+    consumed) raises :exc:`msgpack.BufferFull`, which guards against peers sending
+    objects too large to handle.
+
+    :param serializer: the serializer whose unpacker options to use
+    :param max_buffer_size: maximum size of the internal buffer (in bytes)
+    """
+
+    __slots__ = "_unpacker"
+
+    def __init__(self, serializer: MsgpackSerializer, max_buffer_size: int = 104857600):
+        self._unpacker = serializer._create_unpacker(max_buffer_size=max_buffer_size)
+
+    def feed(self, data: BytesLike) -> None:
+        """
+        Add more data to the internal buffer.
+
+        :param data: the next chunk of the byte stream
+
+        """
+        self._unpacker.feed(data)
+
+    def __iter__(self) -> Iterator[Any]:
+        return self
+
+    def __next__(self) -> Any:
+        return next(self._unpacker)
@@ -0,0 +1,319 @@
+from __future__ import annotations
+
+import asyncio
+from collections.abc import Iterable, Sequence
+from concurrent.futures import Executor, ThreadPoolExecutor
+from copy import deepcopy
+from mmap import mmap
+from threading import local
+from typing import IO, TYPE_CHECKING, Any, Tuple
+from uuid import uuid4
+
+from ..api import BytesLike, CustomizableSerializer, Serializer
+
+if TYPE_CHECKING:
+    from anyio.abc import ByteReceiveStream, ByteSendStream
+
+#: class, marshaller, unmarshaller, typename and wrap_state of a custom type
+_CustomType = Tuple[type, Any, Any, str, bool]
+
+#: serializers created by the worker threads and processes
+_worker_serializers = local()
+
+
+def _run_in_worker(
+    key: str,
+    serializer_class: type[Serializer],
+    options: dict[str, Any],
+    custom_types: tuple[_CustomType, ...],
+    type_ids: tuple[tuple[str, int], ...],
+    method: str,
+    arg: Any,
+) -> Any:
+    # Each worker thread (or process) builds its own serializer, which is rebuilt if
+    # the custom types registered on the original serializer have changed
+    serializers = _worker_serializers.__dict__
+    try:
+        serializer_custom_types, serializer = serializers[key]
+    except KeyError:
+        serializer_custom_types = serializer = None
+
+    if serializer is None or serializer_custom_types != (custom_types, type_ids):
+        serializer = serializer_class(**deepcopy(options))
+        if isinstance(serializer, CustomizableSerializer):
+            serializer.register_type_ids(dict(type_ids))
+            for cls, marshaller, unmarshaller, typename, wrap_state in custom_types:
+                serializer.register_custom_type(
+                    cls,
+                    marshaller,
+                    unmarshaller,
+                    typename=typename,
+                    wrap_state=wrap_state,
+                )
+
+        serializers[key] = (custom_types, type_ids), serializer
+
+    return getattr(serializer, method)(arg)
+
+
+def _exceeds_threshold(obj: Any, threshold: int) -> bool:
+    # Every visited object counts for at least 8 bytes, so this stops after a bounded
+    # number of steps even with circular references
+    size = 0
+    stack = [obj]
+    while stack:
+        obj = stack.pop()
+        if isinstance(obj, (str, bytes, bytearray)):
+            size += len(obj) + 8
+        elif isinstance(obj, memoryview):
+            size += obj.nbytes + 8
+        elif isinstance(obj, dict):
+            stack.extend(obj.keys())
+            stack.extend(obj.values())
+            size += 8
+        elif isinstance(obj, (list, tuple, set, frozenset)):
+            stack.extend(obj)
+            size += 8
+        elif hasattr(obj, "__dict__"):
+            stack.extend(obj.__dict__.values())
+            size += 8
+        else:
+            size += 8
+
+        if size >= threshold:
+            return True
+
+    return False
+
+
+class OffloadingSerializer(Serializer):
+    """
+    Wraps another serializer, offloading large payloads to a thread or process pool.
+
+    The synchronous methods are delegated directly to the wrapped serializer. The
+    asynchronous :meth:`serialize_async` and :meth:`deserialize_async` methods run the
+    operation in the executor if the payload is at least ``threshold`` bytes long, so
+    that the event loop is not blocked by it. As the size of an object is not known
+    before it has been serialized, :meth:`serialize_async` uses a rough estimate of its
+    size instead.
+
+    Each worker thread or process uses a serializer of its own, created using the same
+    backend and options, and with the same custom types registered as on
+    :attr:`serializer`. This means that with process pools, the options, custom types,
+    and marshaller/unmarshaller callbacks must be picklable, as must the objects being
+    serialized or deserialized. Payloads given as memory views or memory-mapped files
+    are copied into :class:`bytes` before being sent to a process.
+
+    Custom types should be registered on :attr:`serializer`.
+
+    :param backend: the name of the wrapped serializer backend, a ``module:varname``
+        reference to its class, or the class itself
+    :param options: keyword arguments passed to the wrapped serializer backend class
+    :param executor: ``thread`` to use a thread pool, ``process`` to use a process pool,
+        or an existing executor
+    :param max_workers: maximum number of worker threads or processes (ignored if an
+        existing executor was given)
+    :param threshold: minimum payload size (in bytes) for offloading to the executor
+    """
+
+    __slots__ = (
+        "serializer",
+        "options",
+        "threshold",
+        "max_workers",
+        "_serializer_class",
+        "_executor",
+        "_executor_type",
+        "_key",
+    )
+
+    def __init__(
+        self,
+        backend: str | type[Serializer],
+        options: dict[str, Any] | None = None,
+        executor: str | Executor = "thread",
+        max_workers: int | None = None,
+        threshold: int = 1048576,
+    ):
+        if isinstance(executor, str) and executor not in ("thread", "process"):
+            raise ValueError(
+                f'executor must be "thread", "process" or an Executor, not {executor!r}'
+            )
+
+        from ..component import serializer_types
+
+        self.options: dict[str, Any] = deepcopy(options or {})
+        self.serializer: Serializer = serializer_types.create_object(
+            backend, **deepcopy(self.options)
+        )
+        self.threshold = threshold
+        self.max_workers = max_workers
+        self._serializer_class = type(self.serializer)
+        self._executor: Executor | None = None
+        self._executor_type = executor
+        if isinstance(executor, Executor):
+            self._executor = executor
+
+        self._key = uuid4().hex
+
+    def _get_executor(self) -> Executor:
+        if self._executor is None:
+            if self._executor_type == "process":
+                from concurrent.futures import ProcessPoolExecutor
+
+                self._executor = ProcessPoolExecutor(self.max_workers)
+            else:
+                self._executor = ThreadPoolExecutor(self.max_workers)
+
+        return self._executor
+
+    def _get_custom_types(self) -> tuple[_CustomType, ...]:
+        serializer = self.serializer
+        if not isinstance(serializer, CustomizableSerializer):
+            return ()
+
+        # The marshallers may refer to the custom types by their type IDs
+        typenames_by_id = {
+            type_id: typename for typename, type_id in serializer.type_ids.items()
+        }
+        custom_types: list[_CustomType] = []
+        for cls, (type_key, marshaller, wrap_state) in serializer.marshallers.items():
+            if isinstance(type_key, str):
+                typename = type_key
+            else:
+                typename = typenames_by_id[type_key]
+
+            unmarshaller = serializer.unmarshallers.get(typename, (None, None))[1]
+            custom_types.append((cls, marshaller, unmarshaller, typename, wrap_state))
+
+        typenames = {custom_type[3] for custom_type in custom_types}
+        # Unmarshallers registered under type IDs are covered by the ones above
+        for key, (target_cls, unmarshaller) in serializer.unmarshallers.items():
+            if isinstance(key, str) and key not in typenames:
+                custom_types.append(
+                    (target_cls or object, None, unmarshaller, key, True)
+                )
+
+        return tuple(custom_types)
+
+    def _get_type_ids(self) -> tuple[tuple[str, int], ...]:
+        if isinstance(self.serializer, CustomizableSerializer):
+            return tuple(self.serializer.type_ids.items())
+        else:
+            return ()
+
+    async def _run(self, method: str, arg: Any) -> Any:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self._get_executor(),
+            _run_in_worker,
+            self._key,
+            self._serializer_class,
+            self.options,
+            self._get_custom_types(),
+            self._get_type_ids(),
+            method,
+            arg,
+        )
+
+    async def serialize_async(self, obj: Any, offload: bool | None = None) -> bytes:
+        """
+        Serialize a Python object into bytes without blocking the event loop.
+
+        :param obj: the object to serialize
+        :param offload: ``True`` to always run the serialization in the executor,
+            ``False`` to never do so, or ``None`` to decide based on the estimated size
+            of the object
+        :return: the serialized payload
+
+        """
+        if offload is None:
+            offload = _exceeds_threshold(obj, self.threshold)
+
+        if offload:
+            return await self._run("serialize", obj)  # type: ignore[no-any-return]
+        else:
+            return self.serializer.serialize(obj)
+
+    async def deserialize_async(
+        self, payload: BytesLike, offload: bool | None = None
+    ) -> Any:
+        """
+        Deserialize bytes into a Python object without blocking the event loop.
+
+        :param payload: the payload to deserialize
+        :param offload: ``True`` to always run the deserialization in the executor,
+            ``False`` to never do so, or ``None`` to decide based on the size of the
+            payload
+        :return: the deserialized object
+
+        """
+        if offload is None:
+            size = payload.nbytes if isinstance(payload, memoryview) else len(payload)
+            offload = size >= self.threshold
+
+        if offload:
+            # Memory views and memory-mapped files can't be pickled, as is done when
+            # passing them to a process pool
+            if isinstance(payload, (memoryview, mmap)) and not isinstance(
+                self._get_executor(), ThreadPoolExecutor
+            ):
+                payload = bytes(payload)
+
+            return await self._run("deserialize", payload)
+        else:
+            return self.serializer.deserialize(payload)
+
+    def shutdown(self) -> None:
+        """
+        Shut down the executor, if it was created by this serializer.
+
+        A new executor is created if more work is offloaded afterwards.
+
+        """
+        if isinstance(self._executor_type, str) and self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+
+    def serialize(self, obj: Any) -> bytes:
+        return self.serializer.serialize(obj)
+
+    def deserialize(self, payload: BytesLike) -> Any:
+        return self.serializer.deserialize(payload)
+
+    def serialize_into(self, obj: Any, out: bytearray | memoryview) -> int:
+        return self.serializer.serialize_into(obj, out)
+
+    def serialize_many(self, objs: Iterable[Any]) -> list[bytes]:
+        return self.serializer.serialize_many(objs)
+
+    def deserialize_many(self, payloads: Iterable[BytesLike]) -> list[Any]:
+        return self.serializer.deserialize_many(payloads)
+
+    def serialize_batch(self, objs: Iterable[Any]) -> bytes:
+        return self.serializer.serialize_batch(objs)
+
+    def deserialize_batch(self, payload: BytesLike) -> list[Any]:
+        return self.serializer.deserialize_batch(payload)
+
+    def serialize_parts(self, obj: Any) -> list[bytes | bytearray | memoryview]:
+        return self.serializer.serialize_parts(obj)
+
+    def deserialize_parts(self, parts: Sequence[Any]) -> Any:
+        return self.serializer.deserialize_parts(parts)
+
+    def dump(self, obj: Any, fp: IO[bytes]) -> None:
+        self.serializer.dump(obj, fp)
+
+    def load(self, fp: IO[bytes]) -> Any:
+        return self.serializer.load(fp)
+
+    async def dump_async(self, obj: Any, stream: ByteSendStream) -> None:
+        await self.serializer.dump_async(obj, stream)
+
+    async def load_async(self, stream: ByteReceiveStream) -> Any:
+        return await self.serializer.load_async(stream)
+
+    @property
+    def mimetype(self) -> str:
+        return self.serializer.mimetype
@@ -1,9 +1,71 @@
 from __future__ import annotations
 
 import pickle
-from typing import Any
+from _compat_pickle import IMPORT_MAPPING, NAME_MAPPING
+from collections.abc import Iterable, Sequence
+from io import BytesIO
+from typing import IO, Any
 
-from ..api import Serializer
+from ..api import BytesLike, Serializer
+
+#: globals the unpickler may load in restricted mode, in addition to the allowed types
+DEFAULT_ALLOWED_GLOBALS = frozenset(
+    [
+        ("_codecs", "encode"),
+        ("builtins", "bytearray"),
+        ("builtins", "bytes"),
+        ("builtins", "complex"),
+        ("builtins", "frozenset"),
+        ("builtins", "memoryview"),
+        ("builtins", "range"),
+        ("builtins", "set"),
+        ("builtins", "slice"),
+        ("collections", "OrderedDict"),
+        ("collections", "deque"),
+        ("copyreg", "_reconstructor"),
+        ("datetime", "date"),
+        ("datetime", "datetime"),
+        ("datetime", "time"),
+        ("datetime", "timedelta"),
+        ("datetime", "timezone"),
+        ("decimal", "Decimal"),
+        ("fractions", "Fraction"),
+        ("uuid", "UUID"),
+    ]
+)
+
+
+class _RestrictedUnpickler(pickle.Unpickler):
+    def __init__(
+        self,
+        file: IO[bytes],
+        allowed: set[tuple[str, str]],
+        buffers: Iterable[Any] | None = None,
+    ):
+        super().__init__(file, buffers=buffers)
+        self.allowed = allowed
+
+    def find_class(self, module: str, name: str) -> Any:
+        # Protocols 0-2 use Python 2 names, which the unpickler maps to Python 3 ones
+        if (module, name) in NAME_MAPPING:
+            module, name = NAME_MAPPING[(module, name)]
+        elif module in IMPORT_MAPPING:
+            module = IMPORT_MAPPING[module]
+
+        if (module, name) in self.allowed:
+            return super().find_class(module, name)
+
+        raise pickle.UnpicklingError(f'global "{module}:{name}" is not allowed')
+
+
+class _OutOfBandPickler(pickle.Pickler):
+    def reducer_override(self, obj: Any) -> Any:
+        # Memoryviews are not normally picklable, but they can be sent out-of-band by
+        # wrapping them in PickleBuffers
+        if obj.__class__ is memoryview and obj.contiguous:
+            return memoryview, (pickle.PickleBuffer(obj),)
+
+        return NotImplemented
 
 
 class PickleSerializer(Serializer):
@@ -13,23 +75,149 @@ class PickleSerializer(Serializer):
     .. warning:: This serializer is insecure because it allows execution of arbitrary
         code when deserializing. Avoid using this if at all possible.
 
+    In restricted mode, deserializing is limited to payloads that only refer to the
+    classes (and other globals) in :data:`DEFAULT_ALLOWED_GLOBALS` and the allowed
+    types, raising :exc:`pickle.UnpicklingError` for anything else. This prevents the
+    unpickler from importing arbitrary modules or calling arbitrary functions, but the
+    allowed types must still be trusted to restore their state safely.
+
+    Allowed types can be given as classes or functions, or as ``module:qualname``
+    references (which are not imported, so this can be used for the reconstructor
+    functions of third party libraries, like
+    ``numpy.core.multiarray:_reconstruct``). The references must match the module and
+    qualified name that pickle writes into the payload.
+
+    With protocol 5 (the default), :meth:`serialize_parts` keeps large buffers out of
+    the pickle stream (see :pep:`574`). Objects that support out-of-band pickling (like
+    NumPy arrays and :class:`pickle.PickleBuffer`) and contiguous :class:`memoryview`
+    objects are then returned as separate parts without copying them. Pickle always
+    copies :class:`bytes` and :class:`bytearray` objects into the pickle stream, so to
+    send them out-of-band, wrap them in :class:`~pickle.PickleBuffer` (they're then
+    deserialized as the buffers passed to :meth:`deserialize_parts`, or read-only
+    :class:`memoryview` objects of them in the case of :class:`bytes`). Unlike with the
+    other serializers, the parts must be passed to :meth:`deserialize_parts` as
+    separate buffers. With older protocols, the whole pickle stream is returned as the
+    only part.
+
     :param protocol: pickle protocol level to use (defaults to the highest possible)
+    :param restricted: ``True`` to only allow deserializing the allowed types and the
+        default allowed globals
+    :param allowed_types: classes or functions (or ``module:qualname`` references to
+        them) to allow in restricted mode
+    :param buffer_threshold: minimum size (in bytes) of the buffers to be returned as
+        separate parts by :meth:`serialize_parts`
     """
 
-    __slots__ = "protocol"
+    __slots__ = "protocol", "restricted", "buffer_threshold", "_allowed_globals"
 
-    def __init__(self, protocol: int = pickle.HIGHEST_PROTOCOL):
+    def __init__(
+        self,
+        protocol: int = pickle.HIGHEST_PROTOCOL,
+        restricted: bool = False,
+        allowed_types: Iterable[type | str] = (),
+        buffer_threshold: int = 65536,
+    ):
         assert (
             0 <= protocol <= pickle.HIGHEST_PROTOCOL
         ), f'"protocol" must be between 0 and {pickle.HIGHEST_PROTOCOL}'
 
         self.protocol: int = protocol
+        self.restricted = restricted
+        self.buffer_threshold = buffer_threshold
+        self._allowed_globals: set[tuple[str, str]] = set(DEFAULT_ALLOWED_GLOBALS)
+        for allowed_type in allowed_types:
+            self.register_allowed_type(allowed_type)
+
+    def register_allowed_type(self, obj: Any) -> None:
+        """
+        Allow the given class or function to be loaded in restricted mode.
+
+        :param obj: a class or function, or a ``module:qualname`` reference to one
+
+        """
+        if isinstance(obj, str):
+            module, _, name = obj.partition(":")
+            if not module or not name:
+                raise ValueError(f'expected a "module:qualname" reference, got {obj!r}')
+        else:
+            module, name = obj.__module__, obj.__qualname__
+
+        self._allowed_globals.add((module, name))
+
+    def _loads(self, payload: Any, buffers: Iterable[Any] | None = None) -> Any:
+        if not self.restricted:
+            return pickle.loads(payload, buffers=buffers)
+
+        file = BytesIO(payload)
+        return _RestrictedUnpickler(file, self._allowed_globals, buffers).load()
 
     def serialize(self, obj: Any) -> bytes:
         return pickle.dumps(obj, protocol=self.protocol)
 
-    def deserialize(self, payload: bytes) -> Any:
-        return pickle.loads(payload)
+    def deserialize(self, payload: BytesLike) -> Any:
+        return self._loads(payload)
+
+    def serialize_parts(self, obj: Any) -> list[bytes | bytearray | memoryview]:
+        """
+        Serialize a Python object into a list of buffers.
+
+        The first buffer is the pickle stream, and the rest are the buffers at least
+        ``buffer_threshold`` bytes in size that were left out of it, in the order
+        they're needed by :meth:`deserialize_parts`. The buffers are views to the
+        memory of the serialized objects, so they must not be modified until the
+        buffers have been sent.
+
+        With pickle protocols lower than 5, the pickle stream is the only buffer.
+
+        :param obj: the object to serialize
+        :return: a list of bytes-like objects
+
+        """
+        if self.protocol < 5:
+            return super().serialize_parts(obj)
+
+        threshold = self.buffer_threshold
+        parts: list[bytes | bytearray | memoryview] = []
+
+        def buffer_callback(buffer: pickle.PickleBuffer) -> bool:
+            # Small buffers are serialized in-band (by returning True)
+            raw = buffer.raw()
+            if raw.nbytes < threshold:
+                return True
+
+            parts.append(raw)
+            return False
+
+        file = BytesIO()
+        pickler = _OutOfBandPickler(
+            file, self.protocol, buffer_callback=buffer_callback
+        )
+        pickler.dump(obj)
+        parts.insert(0, file.getvalue())
+        return parts
+
+    def deserialize_parts(self, parts: Sequence[Any]) -> Any:
+        """
+        Deserialize a Python object from a list of buffers produced by
+        :meth:`serialize_parts`.
+
+        The out-of-band buffers are not copied, so the deserialized objects may refer
+        to their memory.
+
+        :param parts: a sequence of bytes-like objects
+        :return: the deserialized object
+
+        """
+        return self._loads(parts[0], parts[1:])
+
+    def dump(self, obj: Any, fp: IO[bytes]) -> None:
+        pickle.dump(obj, fp, protocol=self.protocol)
+
+    def load(self, fp: IO[bytes]) -> Any:
+        if not self.restricted:
+            return pickle.load(fp)
+
+        return _RestrictedUnpickler(fp, self._allowed_globals).load()
 
     @property
     def mimetype(self) -> str:
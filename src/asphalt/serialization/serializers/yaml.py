@@ -1,14 +1,190 @@
 from __future__ import annotations
 
-from io import StringIO
-from typing import Any
+import warnings
+from collections.abc import Callable, Iterable, Iterator
+from functools import partial
+from io import BytesIO
+from typing import IO, TYPE_CHECKING, Any
 
-from ruamel.yaml import YAML
+from ..api import (
+    BytesLike,
+    CustomizableSerializer,
+    CustomTypeCodec,
+    MarshallCallback,
+    UnmarshallCallback,
+)
 
-from ..api import Serializer
+if TYPE_CHECKING:
+    import yaml
 
 
-class YAMLSerializer(Serializer):
+def _import_pyyaml() -> bool:
+    # PyYAML is imported when the first serializer using it is created, rather than
+    # when this module is imported
+    global yaml
+    try:
+        import yaml
+    except ImportError:
+        return False
+
+    return True
+
+
+def _construct_state(constructor: Any, node: Any) -> Any:
+    # Constructs the marshalled state from a node as if it had no explicit tag
+    if node.id == "mapping":
+        return constructor.construct_mapping(node, deep=True)
+    elif node.id == "sequence":
+        return constructor.construct_sequence(node, deep=True)
+    elif node.style:
+        return constructor.construct_scalar(node)
+
+    # Plain scalars are resolved to the type implied by their value (ruamel.yaml
+    # constructors have a separate resolver, while PyYAML loaders are resolvers)
+    resolver = getattr(constructor, "resolver", constructor)
+    tag = resolver.resolve(node.__class__, node.value, (True, False))
+    untagged = node.__class__(tag, node.value, node.start_mark, node.end_mark)
+    return constructor.construct_object(untagged, deep=True)
+
+
+class YAMLTypeCodec(CustomTypeCodec["YAMLSerializer"]):
+    """
+    Default custom type codec implementation for :class:`~.YAMLSerializer`.
+
+    Wraps marshalled state in YAML nodes tagged with the local tag ``!<typename>`` (or
+    ``!<type ID>``), like ``!myapp.models.User {name: joe}``. A representer and a
+    constructor are registered for each custom type when the type is registered on the
+    serializer, so (de)serializing custom type objects works in safe mode too.
+
+    Marshalled states must be dicts, lists, tuples (which are deserialized as lists) or
+    scalars that YAML can represent without an explicit tag (strings, numbers, booleans,
+    ``None`` and dates), as the tag of the node is replaced with the custom one.
+
+    :ivar YAMLSerializer serializer: the associated serializer
+
+    :param tag_prefix: prefix for the tags of wrapped marshalled states
+    :param resolve_subclasses: ``True`` to marshal instances of subclasses of registered
+        classes using the marshallers of the latter
+    """
+
+    serializer: YAMLSerializer
+
+    def __init__(self, tag_prefix: str = "!", resolve_subclasses: bool = False):
+        self.tag_prefix = tag_prefix
+        self.resolve_subclasses = resolve_subclasses
+        self._representers: dict[type, tuple[str | int, MarshallCallback, bool]] = {}
+        self._constructors: dict[
+            str, tuple[type[object] | None, UnmarshallCallback]
+        ] = {}
+
+    def _bind(self, serializer: YAMLSerializer) -> None:
+        # The registrations are only cached for the serializer they were made on
+        if getattr(self, "serializer", None) is not serializer:
+            self.serializer = serializer
+            self._representers.clear()
+            self._constructors.clear()
+            serializer._constructor.add_constructor(None, self._construct_unregistered)
+            if serializer.safe:
+                # In unsafe mode, other objects are represented with Python tags
+                serializer._representer.add_representer(
+                    None, self._represent_unregistered
+                )
+
+    @staticmethod
+    def _represent_unregistered(representer: Any, obj: Any) -> Any:
+        from asphalt.core import qualified_name
+
+        raise LookupError(
+            f'no marshaller found for type "{qualified_name(obj.__class__)}"'
+        )
+
+    def _construct_unregistered(self, constructor: Any, node: Any) -> Any:
+        if node.tag.startswith(self.tag_prefix):
+            typename = node.tag[len(self.tag_prefix) :]
+            raise LookupError(f'no unmarshaller found for type "{typename}"')
+
+        return constructor.construct_undefined(node)
+
+    def register_object_encoder_hook(self, serializer: YAMLSerializer) -> None:
+        self._bind(serializer)
+        representer = serializer._representer
+        add_representer = (
+            representer.add_multi_representer
+            if self.resolve_subclasses
+            else representer.add_representer
+        )
+        for cls, entry in serializer.marshallers.items():
+            if self._representers.get(cls) != entry:
+                typename, marshaller, wrap_state = entry
+                tag = f"{self.tag_prefix}{typename}" if wrap_state else None
+                add_representer(cls, self._create_representer(tag, marshaller))
+                self._representers[cls] = entry
+
+    def register_object_decoder_hook(self, serializer: YAMLSerializer) -> None:
+        self._bind(serializer)
+        constructor = serializer._constructor
+        for typename, entry in serializer.unmarshallers.items():
+            tag = f"{self.tag_prefix}{typename}"
+            if self._constructors.get(tag) != entry:
+                cls, unmarshaller = entry
+                constructor.add_constructor(
+                    tag, self._create_constructor(cls, unmarshaller)
+                )
+                self._constructors[tag] = entry
+
+    @staticmethod
+    def _create_representer(
+        tag: str | None, marshaller: MarshallCallback
+    ) -> Callable[[Any, Any], Any]:
+        if tag is None:
+            return lambda representer, obj: representer.represent_data(marshaller(obj))
+
+        def represent(representer: Any, obj: Any) -> Any:
+            state = marshaller(obj)
+            if isinstance(state, dict):
+                return representer.represent_mapping(tag, state)
+            elif isinstance(state, (list, tuple)):
+                return representer.represent_sequence(tag, state)
+            elif isinstance(state, str):
+                # Quoted, so that the string is not resolved to another type on loading
+                return representer.represent_scalar(tag, state, style='"')
+
+            node = representer.represent_data(state)
+            if node.id != "scalar" or node.style:
+                from asphalt.core import qualified_name
+
+                raise TypeError(
+                    f"cannot represent the marshalled state of type "
+                    f'"{qualified_name(state.__class__)}" in a tagged YAML node'
+                )
+
+            return representer.represent_scalar(tag, node.value)
+
+        return represent
+
+    @staticmethod
+    def _create_constructor(
+        cls: type[object] | None, unmarshaller: UnmarshallCallback
+    ) -> Callable[[Any, Any], Any]:
+        callback: Any = unmarshaller
+        if cls is None:
+            return lambda constructor, node: callback(
+                _construct_state(constructor, node)
+            )
+
+        target: type[object] = cls
+
+        def construct(constructor: Any, node: Any) -> Iterator[Any]:
+            # The instance is yielded before its state is constructed so that the
+            # state can contain references back to the instance
+            instance = target.__new__(target)
+            yield instance
+            callback(instance, _construct_state(constructor, node))
+
+        return construct
+
+
+class YAMLSerializer(CustomizableSerializer):
     """
     Serializes objects to and from YAML format.
 
@@ -20,27 +196,163 @@ class YAMLSerializer(Serializer):
 
         $ pip install asphalt-serialization[yaml]
 
+    With ``engine="pyyaml"``, the PyYAML_ library is used instead. If PyYAML has been
+    built with LibYAML support, its C based loader and dumper are used, which are
+    considerably faster than the pure Python implementation in ruamel.yaml (unless the
+    ``ruamel.yaml.clib`` C extension is installed). The output is otherwise equivalent,
+    but not identical to that of ruamel.yaml (for example, nested collections are
+    always written in block style). If PyYAML is not installed, a warning is emitted
+    and ruamel.yaml is used instead. The library can be installed with the ``pyyaml``
+    extra:
+
+    .. code-block:: shell
+
+        $ pip install asphalt-serialization[pyyaml]
+
+    Custom types can be registered with :meth:`register_custom_type` in both safe and
+    unsafe mode. Their marshalled states are written as YAML nodes with custom tags (see
+    :class:`YAMLTypeCodec`).
+
+    :meth:`load` reads the whole stream, which must contain a single document. Use
+    :meth:`load_all` to read streams containing several documents.
+
     .. warning:: This serializer is insecure in unsafe mode because it allows execution
       of arbitrary code when deserializing.
 
     .. seealso:: `ruamel.yaml documentation <https://yaml.readthedocs.io/en/latest/>`_
 
+    .. _PyYAML: https://pyyaml.org/
+
     :param safe: ``True`` to (de)serialize in safe mode, ``False`` to enable extended
         tags
+    :param engine: the YAML implementation to use (``ruamel`` or ``pyyaml``)
+    :param custom_type_codec: wrapper to use to wrap custom types after marshalling
     """
 
-    __slots__ = "_yaml"
+    __slots__ = (
+        "engine",
+        "_safe",
+        "_yaml",
+        "_representer",
+        "_constructor",
+        "_dump",
+        "_dump_all",
+    )
+
+    def __init__(
+        self,
+        safe: bool = True,
+        engine: str = "ruamel",
+        custom_type_codec: YAMLTypeCodec | str | None = None,
+    ):
+        from asphalt.core import resolve_reference
+
+        super().__init__(resolve_reference(custom_type_codec) or YAMLTypeCodec())
+        if engine == "pyyaml":
+            if not _import_pyyaml():
+                warnings.warn(
+                    "PyYAML is not installed; falling back to ruamel.yaml",
+                    RuntimeWarning,
+                    stacklevel=2,
+                )
+                engine = "ruamel"
+        elif engine != "ruamel":
+            raise ValueError(f"unknown YAML engine: {engine!r}")
+
+        self.engine = engine
+        self._safe = safe
+        self._yaml: Any = None
+        self._representer: Any
+        self._constructor: Any
+        self._dump: Callable[..., Any]
+        self._dump_all: Callable[..., Any]
+
+        # The representer and constructor classes are subclassed so that the custom
+        # types are only registered for this serializer
+        if engine == "ruamel":
+            from ruamel.yaml import YAML
 
-    def __init__(self, safe: bool = True):
-        self._yaml = YAML(typ="safe" if safe else "unsafe")
+            self._yaml = YAML(typ="safe" if safe else "unsafe")
+            self._representer = self._yaml.Representer = type(
+                "Representer", (self._yaml.Representer,), {}
+            )
+            self._constructor = self._yaml.Constructor = type(
+                "Constructor", (self._yaml.Constructor,), {}
+            )
+            self._dump = self._yaml.dump
+            self._dump_all = self._yaml.dump_all
+        else:
+            loader: type[Any]
+            dumper: type[Any]
+            if yaml.__with_libyaml__:
+                loader = yaml.CSafeLoader if safe else yaml.CUnsafeLoader
+                dumper = yaml.CSafeDumper if safe else yaml.CDumper
+            else:
+                loader = yaml.SafeLoader if safe else yaml.UnsafeLoader
+                dumper = yaml.SafeDumper if safe else yaml.Dumper
+
+            self._constructor = type("Loader", (loader,), {})
+            self._representer = type("Dumper", (dumper,), {})
+            options = dict(
+                Dumper=self._representer, encoding="utf-8", allow_unicode=True
+            )
+            self._dump = partial(yaml.dump, **options)
+            self._dump_all = partial(yaml.dump_all, **options)
 
     def serialize(self, obj: Any) -> bytes:
-        buffer = StringIO()
-        self._yaml.dump(obj, buffer)
-        return buffer.getvalue().encode("utf-8")
+        if self._yaml is None:
+            return self._dump(obj)  # type: ignore[no-any-return]
+
+        # ruamel.yaml writes the UTF-8 encoded document straight to a binary stream
+        buffer = BytesIO()
+        self._dump(obj, buffer)
+        return buffer.getvalue()
+
+    def deserialize(self, payload: BytesLike, into: Any = None) -> Any:
+        # Other bytes-like objects would be treated as streams, or rejected
+        document = payload if isinstance(payload, bytes) else str(payload, "utf-8")
+        if self._yaml is None:
+            obj = yaml.load(document, Loader=self._constructor)
+        else:
+            obj = self._yaml.load(document)
+
+        return obj if into is None else self.unmarshal_into(obj, into)
+
+    def dump(self, obj: Any, fp: IO[bytes]) -> None:
+        self._dump(obj, fp)
+
+    def load(self, fp: IO[bytes]) -> Any:
+        if self._yaml is None:
+            return yaml.load(fp, Loader=self._constructor)
+
+        return self._yaml.load(fp)
+
+    def dump_all(self, objs: Iterable[Any], fp: IO[bytes]) -> None:
+        """
+        Serialize each of the given objects as a separate document in a single YAML
+        stream written to the given file.
+
+        :param objs: the objects to serialize
+        :param fp: a file-like object opened in binary mode
+
+        """
+        self._dump_all(objs, fp)
+
+    def load_all(self, fp: IO[bytes]) -> Iterator[Any]:
+        """
+        Deserialize the documents in a YAML stream read from the given file.
+
+        The documents are deserialized one at a time as the returned iterator is
+        consumed.
+
+        :param fp: a file-like object opened in binary mode
+        :return: an iterator yielding the deserialized documents
+
+        """
+        if self._yaml is None:
+            return yaml.load_all(fp, Loader=self._constructor)
 
-    def deserialize(self, payload: bytes) -> Any:
-        return self._yaml.load(payload)
+        return self._yaml.load_all(fp)  # type: ignore[no-any-return]
 
     @property
     def mimetype(self) -> str:
@@ -49,4 +361,4 @@ class YAMLSerializer(Serializer):
     @property
     def safe(self) -> bool:
         """Returns ``True`` if the safe mode is being used with (de)serialization."""
-        return "safe" in self._yaml.typ
+        return self._safe
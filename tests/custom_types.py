@@ -0,0 +1,15 @@
+from __future__ import annotations
+
+from typing import Any
+
+
+class SimpleType:
+    def __init__(self, value_a: Any, value_b: Any):
+        self.value_a = value_a
+        self.value_b = value_b
+
+    def __eq__(self, other: Any) -> bool:
+        if isinstance(other, SimpleType):
+            return bool(other.value_a == self.value_a and other.value_b == self.value_b)
+
+        return NotImplemented
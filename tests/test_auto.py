@@ -0,0 +1,106 @@
+from __future__ import annotations
+
+import logging
+
+import pytest
+from asphalt.core.context import Context
+from custom_types import SimpleType
+
+from asphalt.serialization.api import Serializer
+from asphalt.serialization.component import SerializationComponent
+from asphalt.serialization.serializers.auto import WRAPPER_BACKENDS, AutoSerializer
+from asphalt.serialization.serializers.cbor import CBORSerializer
+from asphalt.serialization.serializers.msgpack import MsgpackSerializer
+
+SAMPLE = {"id": 1, "name": "widget", "tags": ["a", "b"], "price": 4.95}
+
+
+def test_select(caplog: pytest.LogCaptureFixture) -> None:
+    caplog.set_level(logging.INFO, "asphalt.serialization.serializers.auto")
+    serializer = AutoSerializer(SAMPLE, ["json", "msgpack", "cbor"], min_time=0.001)
+    assert serializer.backend in ("json", "msgpack", "cbor")
+    assert serializer.measurements.keys() == {"json", "msgpack", "cbor"}
+    for measurement in serializer.measurements.values():
+        assert isinstance(measurement, dict)
+        assert measurement["serialize"] > 0
+        assert measurement["deserialize"] > 0
+        assert measurement["size"] > 0
+
+    assert serializer.mimetype == serializer.serializer.mimetype
+    assert serializer.deserialize(serializer.serialize(SAMPLE)) == SAMPLE
+    assert serializer.deserialize_batch(serializer.serialize_batch([1, 2])) == [1, 2]
+    assert serializer.deserialize_parts(serializer.serialize_parts([1, 2])) == [1, 2]
+    assert caplog.messages[-1] == (
+        f"Selected the {serializer.backend} serializer backend"
+    )
+
+
+def test_default_candidates() -> None:
+    serializer = AutoSerializer(SAMPLE, min_time=0.001)
+    assert "pickle" not in serializer.measurements
+    assert serializer.measurements.keys().isdisjoint(WRAPPER_BACKENDS)
+    assert isinstance(serializer.measurements["json"], dict)
+
+
+def test_explicit_wrapper_candidate() -> None:
+    serializer = AutoSerializer(SAMPLE, ["compress", "json"], min_time=0.001)
+    assert serializer.backend == "json"
+    assert isinstance(serializer.measurements["compress"], str)
+
+
+def test_reject_lossy() -> None:
+    serializer = AutoSerializer({"data": b"\x00\xff"}, ["json", "cbor"], min_time=0.001)
+    assert serializer.backend == "cbor"
+    assert isinstance(serializer.serializer, CBORSerializer)
+    assert isinstance(serializer.measurements["json"], str)
+
+
+def test_reject_not_equal() -> None:
+    serializer = AutoSerializer(
+        {"point": (1, 2)},
+        ["json", "msgpack"],
+        options={"msgpack": {"unpacker_options": {"use_list": False}}},
+        min_time=0.001,
+    )
+    assert serializer.measurements["json"] == (
+        "the sample did not round-trip correctly"
+    )
+    assert serializer.backend == "msgpack"
+
+
+def test_custom_types() -> None:
+    sample = SimpleType(1, [2, "x"])
+    serializer = AutoSerializer(
+        sample,
+        ["cbor", "msgpack"],
+        custom_types=["custom_types:SimpleType"],
+        min_time=0.001,
+    )
+    assert all(isinstance(value, dict) for value in serializer.measurements.values())
+    assert serializer.deserialize(serializer.serialize(sample)) == sample
+
+
+def test_no_candidates_work() -> None:
+    with pytest.raises(
+        ValueError,
+        match="none of the candidate backends could round-trip the sample",
+    ):
+        AutoSerializer(SimpleType(1, 2), ["json", "yaml"], min_time=0.001)
+
+
+@pytest.mark.asyncio
+async def test_component() -> None:
+    component = SerializationComponent(
+        backend="auto",
+        options={
+            "sample": f"{__name__}:SAMPLE",
+            "candidates": ["msgpack"],
+            "min_time": 0.001,
+        },
+    )
+    async with Context() as ctx:
+        await component.start(ctx)
+
+        resource = ctx.require_resource(Serializer)
+        assert isinstance(resource, AutoSerializer)
+        assert isinstance(resource.serializer, MsgpackSerializer)
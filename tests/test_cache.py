@@ -0,0 +1,233 @@
+from __future__ import annotations
+
+import weakref
+from dataclasses import dataclass
+from enum import Enum
+from sys import getsizeof
+from typing import Any
+
+import pytest
+from asphalt.core.context import Context
+
+from asphalt.serialization.api import CustomizableSerializer, Serializer
+from asphalt.serialization.component import SerializationComponent
+from asphalt.serialization.serializers.cache import CachingSerializer
+from asphalt.serialization.serializers.msgpack import MsgpackSerializer
+
+
+class Color(Enum):
+    red = 1
+    green = 2
+
+
+@dataclass(frozen=True)
+class Item:
+    sku: str
+    price: float
+    tags: tuple[str, ...] = ()
+
+
+@dataclass
+class MutableItem:
+    sku: str
+
+
+class Snapshot:
+    def __init__(self, data: dict[str, Any]):
+        self.data = data
+        self.version = 1
+
+    def __getstate__(self) -> dict[str, Any]:
+        return self.data
+
+    def __setstate__(self, state: dict[str, Any]) -> None:
+        self.data = state
+
+
+@pytest.fixture
+def serializer() -> CachingSerializer:
+    serializer = CachingSerializer(
+        MsgpackSerializer,
+        options={"unpacker_options": {"use_list": False}},
+        version_attribute="version",
+    )
+    assert isinstance(serializer.serializer, CustomizableSerializer)
+    serializer.serializer.register_custom_type(Item, compiled=True)
+    return serializer
+
+
+@pytest.mark.parametrize(
+    "obj",
+    [
+        pytest.param("åäö", id="str"),
+        pytest.param(b"\x00\x01", id="bytes"),
+        pytest.param(None, id="none"),
+        pytest.param(5, id="int"),
+        pytest.param(5.06, id="float"),
+        pytest.param(("a", (1, True)), id="tuple"),
+        pytest.param(Item("x", 1.5, ("a",)), id="frozen_dataclass"),
+    ],
+)
+def test_serialize_immutable(serializer: CachingSerializer, obj: Any) -> None:
+    payload = serializer.serialize(obj)
+    assert serializer.serialize(obj) is payload
+    assert serializer.serialize_hits == 1
+    assert serializer.serialize_misses == 1
+    assert serializer.size == len(payload)
+
+
+def test_serialize_equal_values_of_different_types(
+    serializer: CachingSerializer,
+) -> None:
+    assert serializer.serialize((1, 0.0)) != serializer.serialize((1.0, 0))
+    assert serializer.serialize((True,)) != serializer.serialize((1,))
+    assert serializer.serialize(-0.0) != serializer.serialize(0.0)
+    assert serializer.serialize("a") != serializer.serialize(b"a")
+    assert serializer.serialize_hits == 0
+
+
+def test_serialize_frozenset() -> None:
+    serializer = CachingSerializer("pickle")
+    payload = serializer.serialize(frozenset([("a", 1), ("b", 2)]))
+    assert serializer.serialize(frozenset([("b", 2), ("a", 1)])) == payload
+    assert serializer.serialize_hits == 1
+
+
+def test_serialize_object_not_kept(serializer: CachingSerializer) -> None:
+    item = Item("x" * 1000, 1.5)
+    ref = weakref.ref(item)
+    serializer.serialize(item)
+    del item
+    assert ref() is None
+    assert serializer.serialize(Item("x" * 1000, 1.5))
+    assert serializer.serialize_hits == 1
+
+
+@pytest.mark.parametrize(
+    "obj",
+    [
+        pytest.param([1, 2], id="list"),
+        pytest.param({"a": 1}, id="dict"),
+        pytest.param(("a", [1]), id="tuple_with_list"),
+        pytest.param(MutableItem("x"), id="dataclass"),
+    ],
+)
+def test_serialize_mutable(serializer: CachingSerializer, obj: Any) -> None:
+    if isinstance(obj, MutableItem):
+        assert isinstance(serializer.serializer, CustomizableSerializer)
+        serializer.serializer.register_custom_type(MutableItem)
+
+    assert serializer.serialize(obj) is not serializer.serialize(obj)
+    assert serializer.serialize_hits == serializer.serialize_misses == 0
+    assert serializer.size == 0
+
+
+def test_serialize_enum() -> None:
+    serializer = CachingSerializer("pickle")
+    payload = serializer.serialize(Color.red)
+    assert serializer.serialize(Color.red) is payload
+    assert serializer.serialize(Color.green) != payload
+
+
+def test_serialize_versioned(serializer: CachingSerializer) -> None:
+    assert isinstance(serializer.serializer, CustomizableSerializer)
+    serializer.serializer.register_custom_type(Snapshot)
+    snapshot = Snapshot({"a": 1})
+    payload = serializer.serialize(snapshot)
+    assert serializer.serialize(snapshot) is payload
+
+    snapshot.data["a"] = 2
+    snapshot.version = 2
+    assert serializer.deserialize(serializer.serialize(snapshot)).data == {"a": 2}
+
+    other = Snapshot({"a": 1})
+    serializer.serialize(other)
+    assert serializer.serialize_hits == 1
+    assert serializer.serialize_misses == 3
+
+
+def test_deserialize(serializer: CachingSerializer) -> None:
+    payload = serializer.serialize(("a", Item("x", 1.5)))
+    obj = serializer.deserialize(payload)
+    assert obj == ("a", Item("x", 1.5))
+    assert serializer.deserialize(memoryview(payload)) is obj
+    assert serializer.deserialize_hits == serializer.deserialize_misses == 1
+
+
+def test_deserialize_size() -> None:
+    serializer = CachingSerializer("msgpack", {"unpacker_options": {"use_list": False}})
+    payload = serializer.serializer.serialize(("a" * 1000, b"x"))
+    obj = serializer.deserialize(payload)
+    assert serializer.size == getsizeof(obj) + getsizeof(obj[0]) + getsizeof(obj[1])
+
+    serializer.clear()
+    serializer.max_size = 500
+    serializer.deserialize(payload)
+    assert serializer.size == 0
+
+
+def test_deserialize_mutable() -> None:
+    serializer = CachingSerializer("msgpack")
+    payload = serializer.serialize((1, 2))
+    obj = serializer.deserialize(payload)
+    assert obj == [1, 2]
+    assert serializer.deserialize(payload) is not obj
+    assert serializer.deserialize_hits == 0
+    assert serializer.deserialize_misses == 2
+
+
+def test_deserialize_disabled() -> None:
+    serializer = CachingSerializer("msgpack", cache_deserialize=False)
+    serializer.deserialize(serializer.serialize("x"))
+    serializer.deserialize(serializer.serialize("x"))
+    assert serializer.deserialize_hits == serializer.deserialize_misses == 0
+
+
+def test_eviction(serializer: CachingSerializer) -> None:
+    serializer.max_size = 25
+    payload_a = serializer.serialize("a" * 10)
+    serializer.serialize("b" * 10)
+    serializer.serialize("a" * 10)
+    serializer.serialize("c" * 10)
+    assert serializer.size == 22
+    assert serializer.serialize("a" * 10) is payload_a
+    assert serializer.serialize_hits == 2
+
+    serializer.serialize("b" * 10)
+    assert serializer.serialize_misses == 4
+    serializer.serialize("d" * 100)
+    assert serializer.size == 22
+
+
+def test_register_custom_type_invalidates(serializer: CachingSerializer) -> None:
+    item = Item("x", 1.5)
+    payload = serializer.serialize(item)
+    assert isinstance(serializer.serializer, CustomizableSerializer)
+    serializer.serializer.register_custom_type(
+        Item, lambda item: item.sku, lambda state: Item(state, 0)
+    )
+    assert serializer.serialize(item) != payload
+    assert serializer.deserialize(serializer.serialize(item)) == Item("x", 0)
+
+
+def test_clear(serializer: CachingSerializer) -> None:
+    serializer.serialize("x")
+    serializer.clear()
+    assert serializer.size == 0
+    serializer.serialize("x")
+    assert serializer.serialize_misses == 2
+
+
+@pytest.mark.asyncio
+async def test_component() -> None:
+    component = SerializationComponent(
+        backend="cache", options={"backend": "json", "max_size": 1000}
+    )
+    async with Context() as ctx:
+        await component.start(ctx)
+
+        resource = ctx.require_resource(Serializer)
+        assert isinstance(resource, CachingSerializer)
+        assert resource.max_size == 1000
+        assert resource.mimetype == "application/json"
+        assert resource.deserialize(resource.serialize("x")) == "x"
@@ -0,0 +1,151 @@
+from __future__ import annotations
+
+import os
+from pathlib import Path
+from typing import Any
+
+import pytest
+from _pytest.fixtures import SubRequest
+from asphalt.core.context import Context
+from custom_types import SimpleType
+
+from asphalt.serialization.api import CustomizableSerializer, Serializer
+from asphalt.serialization.component import SerializationComponent
+from asphalt.serialization.serializers.compression import (
+    HEADER_LZMA,
+    HEADER_UNCOMPRESSED,
+    HEADER_ZLIB,
+    HEADER_ZSTD,
+    CompressingSerializer,
+)
+from asphalt.serialization.serializers.msgpack import MsgpackSerializer
+
+
+def make_records(count: int) -> list[dict[str, Any]]:
+    return [
+        {"id": i, "name": f"user-{i}", "email": f"user-{i}@example.org", "active": True}
+        for i in range(count)
+    ]
+
+
+@pytest.fixture(params=["zlib", "lzma", "zstd"])
+def codec(request: SubRequest) -> str:
+    return request.param  # type: ignore[no-any-return]
+
+
+@pytest.fixture
+def serializer(codec: str) -> CompressingSerializer:
+    return CompressingSerializer("json", codec=codec, threshold=100)
+
+
+def test_roundtrip_small(serializer: CompressingSerializer) -> None:
+    obj = {"x": "åäö", "y": [1, 5.06, None]}
+    payload = serializer.serialize(obj)
+    assert payload[0] == HEADER_UNCOMPRESSED
+    assert payload[1:] == serializer.serializer.serialize(obj)
+    assert serializer.deserialize(payload) == obj
+
+
+def test_roundtrip_large(serializer: CompressingSerializer) -> None:
+    obj = make_records(100)
+    payload = serializer.serialize(obj)
+    headers = {"zlib": HEADER_ZLIB, "lzma": HEADER_LZMA, "zstd": HEADER_ZSTD}
+    assert payload[0] == headers[serializer.codec]
+    assert len(payload) < len(serializer.serializer.serialize(obj)) / 3
+    assert serializer.deserialize(payload) == obj
+    assert serializer.deserialize(memoryview(payload)) == obj
+
+
+def test_incompressible(codec: str) -> None:
+    serializer = CompressingSerializer("msgpack", codec=codec, threshold=100)
+    obj = os.urandom(1000)
+    payload = serializer.serialize(obj)
+    assert payload[0] == HEADER_UNCOMPRESSED
+    assert serializer.deserialize(payload) == obj
+
+
+def test_deserialize_other_codec(codec: str) -> None:
+    obj = make_records(100)
+    payload = CompressingSerializer("json", codec=codec, threshold=0).serialize(obj)
+    for other_codec in ("zlib", "lzma", "zstd"):
+        serializer = CompressingSerializer("json", codec=other_codec)
+        assert serializer.deserialize(payload) == obj
+
+
+def test_custom_types(serializer: CompressingSerializer) -> None:
+    assert isinstance(serializer.serializer, CustomizableSerializer)
+    serializer.serializer.register_custom_type(SimpleType)
+    obj = [SimpleType(i, SimpleType("x", [2, 3])) for i in range(50)]
+    assert serializer.deserialize(serializer.serialize(obj)) == obj
+
+
+@pytest.mark.parametrize("as_path", [False, True], ids=["bytes", "path"])
+def test_zstd_dictionary(tmp_path: Path, as_path: bool) -> None:
+    zstandard = pytest.importorskip("zstandard")
+    backend = MsgpackSerializer()
+    samples = [backend.serialize(record) for record in make_records(1000)]
+    dictionary = zstandard.train_dictionary(4096, samples).as_bytes()
+    if as_path:
+        path = tmp_path / "dictionary"
+        path.write_bytes(dictionary)
+        serializer = CompressingSerializer(
+            "msgpack", codec="zstd", threshold=0, dictionary=path
+        )
+    else:
+        serializer = CompressingSerializer(
+            "msgpack", codec="zstd", threshold=0, dictionary=dictionary
+        )
+
+    plain = CompressingSerializer("msgpack", codec="zstd", threshold=0)
+    obj = {
+        "id": 5000,
+        "name": "user-5000",
+        "email": "user-5000@example.org",
+        "active": False,
+    }
+    payload = serializer.serialize(obj)
+    assert payload[0] == HEADER_ZSTD
+    assert len(payload) < len(backend.serialize(obj)) * 0.75
+    assert plain.serialize(obj)[0] == HEADER_UNCOMPRESSED
+    assert serializer.deserialize(payload) == obj
+
+
+def test_invalid_codec() -> None:
+    with pytest.raises(ValueError, match='codec must be "zlib", "lzma" or "zstd"'):
+        CompressingSerializer("json", codec="foo")
+
+
+def test_dictionary_without_zstd() -> None:
+    with pytest.raises(ValueError, match="a dictionary can only be used with zstd"):
+        CompressingSerializer("json", codec="zlib", dictionary=b"foo")
+
+
+def test_empty_payload() -> None:
+    serializer = CompressingSerializer("json")
+    with pytest.raises(ValueError, match="the payload is empty"):
+        serializer.deserialize(b"")
+
+
+def test_unknown_header() -> None:
+    serializer = CompressingSerializer("json")
+    with pytest.raises(ValueError, match="unknown compression header: 0x7b"):
+        serializer.deserialize(b'{"x": 1}')
+
+
+@pytest.mark.asyncio
+async def test_component() -> None:
+    component = SerializationComponent(
+        backend="compress",
+        options={"backend": "msgpack", "codec": "zstd", "threshold": 10},
+    )
+    async with Context() as ctx:
+        await component.start(ctx)
+
+        resource = ctx.require_resource(Serializer)
+        assert isinstance(resource, CompressingSerializer)
+        assert isinstance(resource.serializer, MsgpackSerializer)
+        assert resource.mimetype == "application/octet-stream"
+
+        payload = resource.serialize({"x": "a" * 20})
+        assert payload[0] == HEADER_ZSTD
+        assert resource.deserialize(payload) == {"x": "a" * 20}
@@ -0,0 +1,71 @@
+from __future__ import annotations
+
+import subprocess
+import sys
+
+import pytest
+
+SERIALIZER_MODULES = [
+    "auto",
+    "cache",
+    "cbor",
+    "compression",
+    "json",
+    "msgpack",
+    "offload",
+    "pickle",
+    "yaml",
+]
+DEFERRED_MODULES = [
+    "asphalt.core",
+    "cbor2",
+    "msgpack",
+    "orjson",
+    "ruamel.yaml",
+    "yaml",
+]
+
+
+def run_script(script: str) -> str:
+    process = subprocess.run(
+        [sys.executable, "-c", script], capture_output=True, check=True, text=True
+    )
+    return process.stdout.strip()
+
+
+@pytest.mark.parametrize("module", SERIALIZER_MODULES)
+def test_deferred_imports(module: str) -> None:
+    imported = run_script(
+        f"import sys\n"
+        f"import asphalt.serialization.serializers.{module}\n"
+        f"print([name for name in {DEFERRED_MODULES!r} if name in sys.modules])"
+    )
+    assert imported == "[]"
+
+
+def test_backend_library_imported_on_construction() -> None:
+    imported = run_script(
+        "import sys\n"
+        "from asphalt.serialization.serializers.cbor import CBORSerializer\n"
+        "assert CBORSerializer().deserialize(CBORSerializer().serialize([1])) == [1]\n"
+        "print('cbor2' in sys.modules)"
+    )
+    assert imported == "True"
+
+
+def test_lazy_serializer_types() -> None:
+    output = run_script(
+        "from asphalt.serialization import component\n"
+        "print('serializer_types' in vars(component))\n"
+        "from asphalt.serialization.component import serializer_types\n"
+        "print(component.serializer_types is serializer_types)\n"
+        "print(serializer_types.resolve('json').__name__)"
+    )
+    assert output.split() == ["False", "True", "JSONSerializer"]
+
+
+def test_component_module_getattr() -> None:
+    from asphalt.serialization import component
+
+    with pytest.raises(AttributeError, match="has no attribute 'foo'"):
+        component.foo
@@ -0,0 +1,190 @@
+from __future__ import annotations
+
+from io import BytesIO
+
+import pytest
+from asphalt.core.context import Context
+from custom_types import SimpleType
+
+from asphalt.serialization.api import CustomizableSerializer, Serializer
+from asphalt.serialization.component import SerializationComponent
+from asphalt.serialization.metrics import (
+    Histogram,
+    InMemoryMetrics,
+    InstrumentedSerializer,
+    MetricsSink,
+)
+from asphalt.serialization.serializers.json import JSONSerializer
+from asphalt.serialization.serializers.offload import OffloadingSerializer
+from asphalt.serialization.serializers.pickle import PickleSerializer
+from asphalt.serialization.serializers.yaml import YAMLSerializer
+
+
+class RecordingSink(MetricsSink):
+    def __init__(self) -> None:
+        self.calls: list[tuple[str, int]] = []
+        self.custom_type_calls: list[tuple[str, str | int]] = []
+
+    def record_call(self, operation: str, duration: float, size: int) -> None:
+        assert duration >= 0
+        self.calls.append((operation, size))
+
+    def record_custom_type(
+        self, operation: str, typename: str | int, duration: float
+    ) -> None:
+        assert duration >= 0
+        self.custom_type_calls.append((operation, typename))
+
+
+def test_calls() -> None:
+    sink = RecordingSink()
+    serializer = InstrumentedSerializer(JSONSerializer(), sink)
+    payload = serializer.serialize({"a": 1})
+    assert serializer.deserialize(payload) == {"a": 1}
+    payloads = serializer.serialize_many([1, "x"])
+    assert serializer.deserialize_many(iter(payloads)) == [1, "x"]
+    batch = serializer.serialize_batch([1, "x"])
+    assert serializer.deserialize_batch(batch) == [1, "x"]
+    parts = serializer.serialize_parts([1])
+    assert serializer.deserialize_parts(parts) == [1]
+    out = bytearray()
+    assert serializer.serialize_into([1], out) == 3
+    buffer = BytesIO()
+    serializer.dump([2], buffer)
+    buffer.seek(0)
+    assert serializer.load(buffer) == [2]
+    assert sink.calls == [
+        ("serialize", len(payload)),
+        ("deserialize", len(payload)),
+        ("serialize_many", 4),
+        ("deserialize_many", 4),
+        ("serialize_batch", len(batch)),
+        ("deserialize_batch", len(batch)),
+        ("serialize_parts", 3),
+        ("deserialize_parts", 3),
+        ("serialize_into", 3),
+        ("dump", -1),
+        ("load", -1),
+    ]
+    assert serializer.mimetype == "application/json"
+
+
+def test_custom_types() -> None:
+    sink = RecordingSink()
+    backend = JSONSerializer()
+    backend.register_custom_type(SimpleType, typename="simple")
+    serializer = InstrumentedSerializer(backend, sink)
+    backend.register_custom_type(
+        complex, lambda c: [c.real, c.imag], lambda state: complex(*state)
+    )
+    obj = SimpleType(1, complex(1, 2))
+    assert serializer.deserialize(serializer.serialize(obj)) == obj
+    assert sink.custom_type_calls == [
+        ("marshal", "simple"),
+        ("marshal", "complex"),
+        ("unmarshal", "complex"),
+        ("unmarshal", "simple"),
+    ]
+
+
+def test_custom_types_bound_by_codec() -> None:
+    sink = RecordingSink()
+    backend = YAMLSerializer()
+    backend.register_custom_type(SimpleType, typename="simple")
+    serializer = InstrumentedSerializer(backend, sink)
+    obj = SimpleType(1, 2)
+    assert serializer.deserialize(serializer.serialize(obj)) == obj
+    assert sink.custom_type_calls == [("marshal", "simple"), ("unmarshal", "simple")]
+
+
+@pytest.mark.asyncio
+async def test_offloaded_custom_types() -> None:
+    # The worker inspects the signatures of the timed unmarshallers when it registers
+    # them on its own serializer
+    sink = RecordingSink()
+    offloading = OffloadingSerializer("json")
+    offloading.serializer.register_custom_type(SimpleType)
+    InstrumentedSerializer(offloading.serializer, sink)
+    obj = SimpleType(1, SimpleType("x", [2, 3]))
+    try:
+        payload = await offloading.serialize_async(obj, offload=True)
+        assert await offloading.deserialize_async(payload, offload=True) == obj
+    finally:
+        offloading.shutdown()
+
+
+def test_instrument_twice() -> None:
+    backend = JSONSerializer()
+    backend.register_custom_type(SimpleType)
+    sink1, sink2 = RecordingSink(), RecordingSink()
+    InstrumentedSerializer(backend, sink1)
+    serializer = InstrumentedSerializer(backend, sink2)
+    serializer.serialize(SimpleType(1, 2))
+    assert len(sink1.custom_type_calls) == 1
+    assert sink2.custom_type_calls == []
+
+
+def test_histogram() -> None:
+    histogram = Histogram([1, 10, 100])
+    assert histogram.quantile(0.5) == 0
+    for value in (0.5, 1, 5, 5, 50, 500):
+        histogram.add(value)
+
+    assert histogram.counts == [2, 2, 1, 1]
+    assert histogram.count == 6
+    assert histogram.total == 561.5
+    assert histogram.quantile(0.5) == 10
+    assert histogram.quantile(0.8) == 100
+    assert histogram.quantile(1) == float("inf")
+
+
+def test_in_memory_metrics() -> None:
+    metrics = InMemoryMetrics()
+    serializer = InstrumentedSerializer(PickleSerializer(), metrics)
+    serializer.deserialize(serializer.serialize("x" * 100))
+    metrics.record_custom_type("marshal", "foo", 0.5)
+    metrics.record_custom_type("marshal", "foo", 0.25)
+    snapshot = metrics.snapshot()
+    assert snapshot["calls"].keys() == {"serialize", "deserialize"}
+    assert snapshot["calls"]["serialize"]["count"] == 1
+    assert snapshot["calls"]["serialize"]["total_bytes"] > 100
+    assert snapshot["custom_types"] == {"marshal:foo": {"count": 2, "total_time": 0.75}}
+
+    metrics.reset()
+    assert metrics.snapshot() == {"calls": {}, "custom_types": {}}
+
+
+@pytest.mark.asyncio
+async def test_component() -> None:
+    component = SerializationComponent(backend="json", metrics=True)
+    async with Context() as ctx:
+        await component.start(ctx)
+
+        resource = ctx.require_resource(Serializer)
+        assert isinstance(resource, InstrumentedSerializer)
+        assert ctx.require_resource(InstrumentedSerializer) is resource
+
+        backend = ctx.require_resource(CustomizableSerializer)
+        assert isinstance(backend, JSONSerializer)
+        assert resource.serializer is backend
+        assert ctx.require_resource(JSONSerializer) is backend
+
+        metrics = ctx.require_resource(MetricsSink)
+        assert isinstance(metrics, InMemoryMetrics)
+        assert ctx.require_resource(InMemoryMetrics) is metrics
+
+        backend.register_custom_type(SimpleType)
+        resource.serialize(SimpleType(1, 2))
+        snapshot = metrics.snapshot()
+        assert snapshot["calls"]["serialize"]["count"] == 1
+        assert snapshot["custom_types"]["marshal:custom_types.SimpleType"]["count"] == 1
+
+
+@pytest.mark.asyncio
+async def test_component_disabled() -> None:
+    component = SerializationComponent(backend="json")
+    async with Context() as ctx:
+        await component.start(ctx)
+
+        assert isinstance(ctx.require_resource(Serializer), JSONSerializer)
+        assert ctx.get_resource(MetricsSink) is None
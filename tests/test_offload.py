@@ -0,0 +1,146 @@
+from __future__ import annotations
+
+from collections.abc import Iterator
+from concurrent.futures import Future, ThreadPoolExecutor
+from mmap import mmap
+from typing import Any
+
+import pytest
+from _pytest.fixtures import SubRequest
+from asphalt.core.context import Context
+from custom_types import SimpleType
+
+from asphalt.serialization.api import Serializer
+from asphalt.serialization.component import SerializationComponent
+from asphalt.serialization.serializers.json import JSONSerializer
+from asphalt.serialization.serializers.offload import OffloadingSerializer
+from asphalt.serialization.serializers.yaml import YAMLSerializer
+
+
+@pytest.fixture(params=["thread", "process"])
+def serializer(request: SubRequest) -> Iterator[OffloadingSerializer]:
+    serializer = OffloadingSerializer(
+        "json", {"encoder_options": {"sort_keys": True}}, executor=request.param
+    )
+    yield serializer
+    serializer.shutdown()
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("offload", [True, False, None])
+async def test_roundtrip(
+    serializer: OffloadingSerializer, offload: bool | None
+) -> None:
+    obj = {"b": [1, 5.06, None], "a": "åäö"}
+    payload = await serializer.serialize_async(obj, offload)
+    assert payload == serializer.serialize(obj)
+    assert await serializer.deserialize_async(payload, offload) == obj
+
+
+@pytest.mark.asyncio
+async def test_custom_types(serializer: OffloadingSerializer) -> None:
+    assert isinstance(serializer.serializer, JSONSerializer)
+    obj = SimpleType(1, SimpleType("x", [2, 3]))
+    serializer.serializer.register_custom_type(SimpleType)
+    payload = await serializer.serialize_async(obj, offload=True)
+    assert payload == serializer.serialize(obj)
+    assert await serializer.deserialize_async(payload, offload=True) == obj
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("payload_type", ["memoryview", "mmap"])
+async def test_deserialize_buffer(
+    serializer: OffloadingSerializer, payload_type: str
+) -> None:
+    obj = {"b": [1, 5.06, None], "a": "åäö"}
+    payload = serializer.serialize(obj)
+    if payload_type == "memoryview":
+        assert await serializer.deserialize_async(memoryview(payload), True) == obj
+    else:
+        with mmap(-1, len(payload)) as mapped:
+            mapped.write(payload)
+            assert await serializer.deserialize_async(mapped, True) == obj
+
+
+@pytest.mark.asyncio
+async def test_type_ids(serializer: OffloadingSerializer) -> None:
+    assert isinstance(serializer.serializer, JSONSerializer)
+    obj = SimpleType(1, SimpleType("x", [2, 3]))
+    serializer.serializer.register_type_ids({"simple": 7})
+    serializer.serializer.register_custom_type(SimpleType, typename="simple")
+    payload = await serializer.serialize_async(obj, offload=True)
+    assert payload == serializer.serialize(obj)
+    assert await serializer.deserialize_async(payload, offload=True) == obj
+
+
+class CountingExecutor(ThreadPoolExecutor):
+    def __init__(self) -> None:
+        super().__init__(1)
+        self.submitted = 0
+
+    def submit(self, *args: Any, **kwargs: Any) -> Future[Any]:
+        self.submitted += 1
+        return super().submit(*args, **kwargs)
+
+
+@pytest.mark.asyncio
+async def test_threshold() -> None:
+    with CountingExecutor() as executor:
+        serializer = OffloadingSerializer("json", executor=executor, threshold=100)
+        small = await serializer.serialize_async(["x" * 10, {"y": 1}])
+        assert await serializer.deserialize_async(small) == ["x" * 10, {"y": 1}]
+        assert executor.submitted == 0
+
+        obj = ["x" * 10, {"y": "z" * 100}]
+        large = await serializer.serialize_async(obj)
+        assert executor.submitted == 1
+        assert await serializer.deserialize_async(large) == obj
+        assert executor.submitted == 2
+
+
+@pytest.mark.asyncio
+async def test_threshold_memoryview() -> None:
+    with CountingExecutor() as executor:
+        serializer = OffloadingSerializer("msgpack", executor=executor, threshold=100)
+        view = memoryview(bytes(200)).cast("Q")
+        payload = await serializer.serialize_async([view])
+        assert executor.submitted == 1
+        assert await serializer.deserialize_async(payload) == [bytes(200)]
+        assert executor.submitted == 2
+
+
+@pytest.mark.asyncio
+async def test_circular_reference_estimate() -> None:
+    with CountingExecutor() as executor:
+        serializer = OffloadingSerializer(
+            "cbor",
+            {"encoder_options": {"value_sharing": True}},
+            executor=executor,
+            threshold=100,
+        )
+        obj: list[Any] = [1]
+        obj.append(obj)
+        await serializer.serialize_async(obj)
+        assert executor.submitted == 1
+
+
+def test_invalid_executor() -> None:
+    with pytest.raises(ValueError, match='executor must be "thread", "process"'):
+        OffloadingSerializer("json", executor="foo")
+
+
+@pytest.mark.asyncio
+async def test_component() -> None:
+    component = SerializationComponent(
+        backend="offload", options={"backend": "yaml", "threshold": 10}
+    )
+    async with Context() as ctx:
+        await component.start(ctx)
+
+        resource = ctx.require_resource(Serializer)
+        assert isinstance(resource, OffloadingSerializer)
+        assert isinstance(resource.serializer, YAMLSerializer)
+        assert resource.mimetype == "text/yaml"
+
+        payload = await resource.serialize_async({"x": "a" * 20})
+        assert await resource.deserialize_async(payload) == {"x": "a" * 20}
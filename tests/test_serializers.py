@@ -1,38 +1,41 @@
 from __future__ import annotations
 
+import mmap
+import pickle
 import re
 import sys
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
 from datetime import datetime, timezone
 from functools import partial
+from io import BytesIO
+from pathlib import Path
 from types import SimpleNamespace
-from typing import Any, cast
+from typing import Any, Dict, FrozenSet, List, Optional, Tuple, TypedDict, cast
 
 import pytest
 from _pytest.fixtures import SubRequest
-from cbor2 import CBORTag
-from msgpack import ExtType
+from anyio import create_memory_object_stream
+from asphalt.core import qualified_name
+from cbor2 import CBORDecodeValueError, CBORTag, dumps
+from custom_types import SimpleType
+from msgpack import BufferFull, ExtType
 
 from asphalt.serialization.api import CustomizableSerializer
-from asphalt.serialization.serializers.cbor import CBORSerializer, CBORTypeCodec
-from asphalt.serialization.serializers.json import JSONSerializer
+from asphalt.serialization.object_codec import DefaultCustomTypeCodec
+from asphalt.serialization.serializers.cbor import (
+    CBORIncrementalDecoder,
+    CBORSerializer,
+    CBORTypeCodec,
+)
+from asphalt.serialization.serializers.json import JSONSerializer, JSONTypeCodec
 from asphalt.serialization.serializers.msgpack import (
+    MsgpackIncrementalDecoder,
     MsgpackSerializer,
     MsgpackTypeCodec,
 )
 from asphalt.serialization.serializers.pickle import PickleSerializer
-from asphalt.serialization.serializers.yaml import YAMLSerializer
-
-
-class SimpleType:
-    def __init__(self, value_a: Any, value_b: Any):
-        self.value_a = value_a
-        self.value_b = value_b
-
-    def __eq__(self, other: Any) -> bool:
-        if isinstance(other, SimpleType):
-            return bool(other.value_a == self.value_a and other.value_b == self.value_b)
-
-        return NotImplemented
+from asphalt.serialization.serializers.yaml import YAMLSerializer, YAMLTypeCodec
 
 
 class SlottedSimpleType:
@@ -80,7 +83,18 @@ def unmarshal_datetime(state: float) -> datetime:
     return datetime.fromtimestamp(state, timezone.utc)
 
 
-@pytest.fixture(params=["cbor", "json", "msgpack", "pickle", "yaml"])
+@pytest.fixture(
+    params=[
+        "cbor",
+        "cbor_cached",
+        "json",
+        "json_orjson",
+        "msgpack",
+        "pickle",
+        "yaml",
+        "yaml_pyyaml",
+    ]
+)
 def serializer_type(request: SubRequest) -> str:
     return cast(str, request.param)
 
@@ -90,10 +104,15 @@ def serializer(request: SubRequest, serializer_type: str) -> CustomizableSeriali
     kwargs = getattr(request, "param", {})
     return {
         "cbor": partial(CBORSerializer, encoder_options=dict(value_sharing=True)),
+        "cbor_cached": partial(
+            CBORSerializer, encoder_options=dict(value_sharing=True), cache_codecs=True
+        ),
         "json": JSONSerializer,
+        "json_orjson": partial(JSONSerializer, engine="orjson"),
         "msgpack": MsgpackSerializer,
         "pickle": PickleSerializer,
         "yaml": YAMLSerializer,
+        "yaml_pyyaml": partial(YAMLSerializer, engine="pyyaml"),
     }[serializer_type](**kwargs)
 
 
@@ -115,7 +134,143 @@ def test_basic_types_roundtrip(serializer: CustomizableSerializer, input: Any) -
     assert deserialized == input
 
 
-@pytest.mark.parametrize("serializer_type", ["cbor", "pickle", "yaml"])
+def test_dump_load(serializer: CustomizableSerializer) -> None:
+    obj = {"x": "åäö", "y": [1, 5.06, {"z": None}], "big": ["a" * 100] * 1000}
+    buffer = BytesIO()
+    serializer.dump(obj, buffer)
+    assert buffer.getvalue() == serializer.serialize(obj)
+
+    buffer.seek(0)
+    assert serializer.load(buffer) == obj
+
+
+class NonSeekableBytesIO(BytesIO):
+    def seekable(self) -> bool:
+        return False
+
+
+@pytest.mark.parametrize(
+    "serializer_type, seekable",
+    [
+        pytest.param("cbor", True, id="cbor-seekable"),
+        pytest.param("cbor", False, id="cbor-nonseekable"),
+        pytest.param("cbor_cached", True, id="cbor_cached-seekable"),
+        pytest.param("cbor_cached", False, id="cbor_cached-nonseekable"),
+        pytest.param("msgpack", True, id="msgpack-seekable"),
+        pytest.param("pickle", True, id="pickle-seekable"),
+        pytest.param("pickle", False, id="pickle-nonseekable"),
+    ],
+)
+def test_load_consecutive(serializer: CustomizableSerializer, seekable: bool) -> None:
+    objs = [{"x": "åäö", "big": ["a" * 100] * 1000}, [1, 5.06], "foo"]
+    buffer = BytesIO()
+    for obj in objs:
+        serializer.dump(obj, buffer)
+
+    payload = buffer.getvalue()
+    buffer = BytesIO(payload) if seekable else NonSeekableBytesIO(payload)
+    assert [serializer.load(buffer) for _ in objs] == objs
+    assert buffer.read() == b""
+
+
+@pytest.mark.parametrize("seekable", [True, False], ids=["seekable", "nonseekable"])
+def test_msgpack_load_all(seekable: bool) -> None:
+    serializer = MsgpackSerializer()
+    objs = [{"x": "åäö", "big": ["a" * 100] * 1000}, [1, 5.06], "foo"]
+    buffer = BytesIO()
+    for obj in objs:
+        serializer.dump(obj, buffer)
+
+    payload = buffer.getvalue()
+    buffer = BytesIO(payload) if seekable else NonSeekableBytesIO(payload)
+    assert list(serializer.load_all(buffer)) == objs
+
+
+@pytest.mark.asyncio
+async def test_dump_load_async(serializer: CustomizableSerializer) -> None:
+    obj = {"x": "åäö", "y": [1, 5.06, {"z": None}], "big": ["a" * 100] * 1000}
+    send_stream, receive_stream = create_memory_object_stream[bytes](100)
+    async with send_stream:
+        await serializer.dump_async(obj, send_stream)
+
+    async with receive_stream:
+        assert await serializer.load_async(receive_stream) == obj
+
+
+@pytest.mark.parametrize("buffer_type", ["bytearray", "memoryview", "mmap"])
+def test_deserialize_buffer(
+    serializer: CustomizableSerializer, buffer_type: str, tmp_path: Path
+) -> None:
+    obj = {"x": "åäö", "y": [1, 5.06, {"z": None}]}
+    payload = serializer.serialize(obj)
+    if buffer_type == "bytearray":
+        assert serializer.deserialize(bytearray(payload)) == obj
+    elif buffer_type == "memoryview":
+        assert serializer.deserialize(memoryview(b"xx" + payload)[2:]) == obj
+    else:
+        path = tmp_path / "payload"
+        path.write_bytes(payload)
+        with path.open("rb") as f:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as m:
+                assert serializer.deserialize(m) == obj
+                assert serializer.deserialize(m) == obj
+
+
+@pytest.mark.parametrize(
+    "serializer_type",
+    ["cbor", "cbor_cached", "json", "json_orjson", "msgpack", "yaml", "yaml_pyyaml"],
+)
+def test_deserialize_buffer_custom_types(serializer: CustomizableSerializer) -> None:
+    serializer.register_custom_type(SimpleType)
+    obj = SimpleType(1, SimpleType("b", [2]))
+    payload = serializer.serialize(obj)
+    assert serializer.deserialize(memoryview(payload)) == obj
+
+
+def test_serialize_into(serializer: CustomizableSerializer) -> None:
+    obj = {"x": "åäö", "y": [1, 5.06, {"z": None}]}
+    payload = serializer.serialize(obj)
+    out = bytearray(b"prefix")
+    assert serializer.serialize_into(obj, out) == len(payload)
+    assert serializer.serialize_into(obj, out) == len(payload)
+    assert out == b"prefix" + payload + payload
+
+    buffer = bytearray(len(payload) + 10)
+    assert serializer.serialize_into(obj, memoryview(buffer)[5:]) == len(payload)
+    assert buffer == bytes(5) + payload + bytes(5)
+
+
+def test_serialize_into_too_small(serializer: CustomizableSerializer) -> None:
+    obj = {"x": "åäö", "y": [1, 5.06, {"z": None}]}
+    with pytest.raises(ValueError, match="the buffer is too small"):
+        serializer.serialize_into(obj, memoryview(bytearray(3)))
+
+    assert serializer.deserialize(serializer.serialize(obj)) == obj
+
+
+def test_serialize_many(serializer: CustomizableSerializer) -> None:
+    objs = [{"x": "åäö"}, [1, 5.06, None], "foo", 123]
+    payloads = serializer.serialize_many(iter(objs))
+    assert payloads == [serializer.serialize(obj) for obj in objs]
+    assert serializer.deserialize_many(iter(payloads)) == objs
+
+
+def test_serialize_batch(serializer: CustomizableSerializer) -> None:
+    objs = [{"x": "åäö"}, [1, 5.06, None], "foo", 123]
+    payload = serializer.serialize_batch(iter(objs))
+    assert serializer.deserialize_batch(payload) == objs
+    assert serializer.deserialize_batch(serializer.serialize_batch([])) == []
+
+
+def test_deserialize_batch_truncated(serializer: CustomizableSerializer) -> None:
+    payload = serializer.serialize_batch([{"x": 1}, "foo"])
+    with pytest.raises(ValueError, match="truncated batch payload"):
+        serializer.deserialize_batch(payload[:-1])
+
+
+@pytest.mark.parametrize(
+    "serializer_type", ["cbor", "cbor_cached", "pickle", "yaml", "yaml_pyyaml"]
+)
 def test_circular_reference(serializer: CustomizableSerializer) -> None:
     a: dict[str, Any] = {"foo": 1}
     b = {"a": a}
@@ -130,7 +285,10 @@ def test_circular_reference(serializer: CustomizableSerializer) -> None:
     assert other_b["a"] is other_a
 
 
-@pytest.mark.parametrize("serializer_type", ["cbor", "msgpack", "json"])
+@pytest.mark.parametrize(
+    "serializer_type",
+    ["cbor", "cbor_cached", "msgpack", "json", "json_orjson", "yaml", "yaml_pyyaml"],
+)
 class TestCustomTypes:
     @pytest.mark.parametrize(
         "cls",
@@ -214,7 +372,7 @@ class TestCustomTypes:
         serializer.register_custom_type(SlottedSimpleType)
         testval = SimpleType(1, "a")
         exc = pytest.raises(Exception, serializer.serialize, testval)
-        exc.match('no marshaller found for type "test_serializers.SimpleType"')
+        exc.match('no marshaller found for type "custom_types.SimpleType"')
 
     def test_missing_unmarshaller(self, serializer: CustomizableSerializer) -> None:
         serializer.register_custom_type(SlottedSimpleType)
@@ -222,7 +380,7 @@ class TestCustomTypes:
         testval = SimpleType(1, "a")
         serialized = serializer.serialize(testval)
         exc = pytest.raises(Exception, serializer.deserialize, serialized)
-        exc.match('no unmarshaller found for type "test_serializers.SimpleType"')
+        exc.match('no unmarshaller found for type "custom_types.SimpleType"')
 
     def test_nowrap(self, serializer: CustomizableSerializer) -> None:
         serializer.register_custom_type(SimpleType, wrap_state=False)
@@ -239,8 +397,9 @@ def test_mime_types(serializer: CustomizableSerializer) -> None:
 @pytest.mark.parametrize(
     "safe", [pytest.param(True, id="safe"), pytest.param(False, id="unsafe")]
 )
-def test_yaml_safe_attribute(safe: bool) -> None:
-    serializer = YAMLSerializer(safe=safe)
+@pytest.mark.parametrize("engine", ["ruamel", "pyyaml"])
+def test_yaml_safe_attribute(safe: bool, engine: str) -> None:
+    serializer = YAMLSerializer(safe=safe, engine=engine)
     assert serializer.safe is safe
 
 
@@ -255,7 +414,36 @@ def test_msgpack_exttype_passthrough(serializer: CustomizableSerializer) -> None
     assert obj.data == b"somedata"
 
 
-@pytest.mark.parametrize("serializer_type", ["cbor"])
+@pytest.mark.parametrize("serializer_type", ["cbor_cached", "msgpack"])
+def test_register_after_use(serializer: CustomizableSerializer) -> None:
+    serializer.deserialize(serializer.serialize({"a": 1}))
+    serializer.register_custom_type(SimpleType)
+    testval = SimpleType(1, SimpleType(2, "b"))
+    assert serializer.deserialize(serializer.serialize(testval)) == testval
+
+
+@pytest.mark.parametrize(
+    "serializer_type",
+    ["cbor", "cbor_cached", "json", "json_orjson", "msgpack", "yaml", "yaml_pyyaml"],
+)
+def test_serialize_batch_custom_types(serializer: CustomizableSerializer) -> None:
+    serializer.register_custom_type(SimpleType)
+    objs = [SimpleType(1, SimpleType(2, "b")), {"a": SimpleType([3], None)}]
+    assert serializer.deserialize_batch(serializer.serialize_batch(objs)) == objs
+
+
+@pytest.mark.parametrize("serializer_type", ["cbor_cached", "msgpack"])
+def test_codec_cache_threads(serializer: CustomizableSerializer) -> None:
+    serializer.register_custom_type(SimpleType)
+    testval = SimpleType(1, SimpleType(2, [3, 4]))
+    expected = serializer.serialize(testval)
+    with ThreadPoolExecutor(4) as executor:
+        results = list(executor.map(serializer.serialize, [testval] * 100))
+
+    assert results == [expected] * 100
+
+
+@pytest.mark.parametrize("serializer_type", ["cbor", "cbor_cached"])
 def test_cbor_self_referential_objects(serializer: CustomizableSerializer) -> None:
     value1 = SimpleNamespace()
     value1.val = 1
@@ -271,6 +459,17 @@ def test_cbor_self_referential_objects(serializer: CustomizableSerializer) -> No
     assert obj.next.previous is obj
 
 
+@pytest.mark.parametrize("serializer_type", ["cbor", "cbor_cached"])
+def test_cbor_shared_values_across_objects(serializer: CustomizableSerializer) -> None:
+    first, second = [1], [2]
+    objs = [[first, first], [second, second], [first, first]]
+    payloads = serializer.serialize_many(objs)
+    assert payloads == [dumps(obj, value_sharing=True) for obj in objs]
+    assert [serializer.serialize(obj) for obj in objs] == payloads
+    assert [serializer.deserialize(payload) for payload in payloads] == objs
+    assert serializer.deserialize_many(payloads) == objs
+
+
 @pytest.mark.parametrize("serializer_type", ["cbor"])
 def test_cbor_oneshot_unmarshal(serializer: CustomizableSerializer) -> None:
     def unmarshal_simple(state: dict[str, Any]) -> SimpleType:
@@ -294,6 +493,474 @@ def test_cbor_raw_tag(serializer: CustomizableSerializer) -> None:
     assert tag.value == "Hello"
 
 
+@pytest.mark.parametrize("serializer_type", ["cbor", "msgpack"])
+def test_incremental_decoder(serializer: CustomizableSerializer) -> None:
+    serializer.register_custom_type(SimpleType)
+    objects = [{"a": [1, SimpleType(2, "b")]}, "x" * 300, 5, SimpleType(None, 1.5)]
+    data = b"".join(serializer.serialize(obj) for obj in objects)
+    decoder: CBORIncrementalDecoder | MsgpackIncrementalDecoder
+    if isinstance(serializer, CBORSerializer):
+        decoder = CBORIncrementalDecoder(serializer, compact_threshold=16)
+    else:
+        decoder = MsgpackIncrementalDecoder(cast(MsgpackSerializer, serializer))
+
+    decoded: list[Any] = []
+    for i in range(0, len(data), 7):
+        decoder.feed(data[i : i + 7])
+        decoded.extend(decoder)
+
+    assert decoded == objects
+    assert list(decoder) == []
+
+
+@pytest.mark.parametrize(
+    "data, expected",
+    [
+        pytest.param(b"\x9f\x01\x9f\xff\xff", [1, []], id="array"),
+        pytest.param(b"\xbf\x61a\x01\xff", {"a": 1}, id="map"),
+        pytest.param(b"\x5f\x42ab\x41c\xff", b"abc", id="bytes"),
+        pytest.param(b"\x7f\x61a\x61b\xff", "ab", id="text"),
+        pytest.param(
+            b"\xc0\x742013-03-21T20:04:00Z",
+            datetime(2013, 3, 21, 20, 4, tzinfo=timezone.utc),
+            id="tag",
+        ),
+    ],
+)
+def test_cbor_incremental_decoder_items(data: bytes, expected: Any) -> None:
+    decoder = CBORIncrementalDecoder(CBORSerializer())
+    decoded: list[Any] = []
+    for byte in data * 2:
+        decoder.feed(bytes([byte]))
+        decoded.extend(decoder)
+
+    assert decoded == [expected, expected]
+
+
+def test_cbor_incremental_decoder_decodes_once() -> None:
+    def unmarshal_simple(state: dict[str, Any]) -> SimpleType:
+        unmarshalled.append(state)
+        return SimpleType(**state)
+
+    unmarshalled: list[Any] = []
+    serializer = CBORSerializer()
+    serializer.register_custom_type(SimpleType, unmarshaller=unmarshal_simple)
+    data = serializer.serialize([SimpleType(1, SimpleType(2, "b"))] * 3)
+    decoder = CBORIncrementalDecoder(serializer)
+    decoded: list[Any] = []
+    for i in range(len(data)):
+        decoder.feed(data[i : i + 1])
+        decoded.extend(decoder)
+
+    assert decoded == [[SimpleType(1, SimpleType(2, "b"))] * 3]
+    assert len(unmarshalled) == 6
+
+
+def test_cbor_incremental_decoder_invalid_data() -> None:
+    decoder = CBORIncrementalDecoder(CBORSerializer())
+    decoder.feed(b"\x01\xff")
+    assert next(decoder) == 1
+    with pytest.raises(CBORDecodeValueError, match="invalid initial byte"):
+        next(decoder)
+
+
+def test_msgpack_incremental_decoder_buffer_limit() -> None:
+    serializer = MsgpackSerializer()
+    decoder = MsgpackIncrementalDecoder(serializer, max_buffer_size=100)
+    decoder.feed(serializer.serialize("x" * 90))
+    with pytest.raises(BufferFull):
+        decoder.feed(b"\x00" * 20)
+
+    assert list(decoder) == ["x" * 90]
+
+
+@dataclass(frozen=True)
+class FrozenDataclass:
+    value_a: Any
+    value_b: Any
+
+
+class SlottedSubType(SlottedSimpleType):
+    __slots__ = ("__value_c",)
+
+    def __init__(self, value_a: Any, value_b: Any, value_c: Any):
+        super().__init__(value_a, value_b)
+        self.__value_c = value_c
+
+    def __eq__(self, other: Any) -> bool:
+        if isinstance(other, SlottedSubType):
+            return super().__eq__(other) and self.__value_c == other.__value_c
+
+        return NotImplemented
+
+
+class Address(TypedDict, total=False):
+    street: str
+    location: Point
+
+
+@dataclass
+class Point:
+    x: float
+    y: float
+
+
+# The typing module's generics are used so that get_type_hints() works on Python 3.8
+@dataclass
+class Shape:
+    name: str
+    points: List[Point]  # noqa: UP006
+    center: Optional[Point] = None  # noqa: UP007
+    tags: FrozenSet[str] = frozenset()  # noqa: UP006
+    bounds: Optional[Tuple[Point, Point]] = None  # noqa: UP006,UP007
+    named_points: Dict[str, Point] = field(default_factory=dict)  # noqa: UP006
+    children: Tuple[Shape, ...] = ()  # noqa: UP006
+    address: Optional[Address] = None  # noqa: UP007
+    extra: Any = None
+
+
+@pytest.mark.parametrize(
+    "serializer_type",
+    ["cbor", "cbor_cached", "json", "json_orjson", "msgpack", "yaml", "yaml_pyyaml"],
+)
+class TestSchema:
+    def test_roundtrip(self, serializer: CustomizableSerializer) -> None:
+        serializer.register_custom_type(Shape, schema=True)
+        serializer.register_custom_type(SimpleType)
+        child = Shape("child", [Point(0, 0)], extra=SimpleType(1, "a"))
+        shape = Shape(
+            "square",
+            [Point(0, 0), Point(0, 1), Point(1, 1), Point(1, 0)],
+            center=Point(0.5, 0.5),
+            tags=frozenset(["a", "b"]),
+            bounds=(Point(0, 0), Point(1, 1)),
+            named_points={"origin": Point(0, 0)},
+            children=(child,),
+            address={"street": "Main St", "location": Point(3, 4)},
+        )
+        deserialized = serializer.deserialize(serializer.serialize([shape]))
+        assert deserialized == [shape]
+        assert isinstance(deserialized[0].children, tuple)
+        assert isinstance(deserialized[0].address["location"], Point)
+
+    def test_nested_not_wrapped(self, serializer: CustomizableSerializer) -> None:
+        serializer.register_custom_type(Shape, schema=True)
+        payload = serializer.serialize(Shape("x", [Point(1, 2)]))
+        assert payload.count(b"Shape") == 1
+        assert b"Point" not in payload
+
+    def test_not_dataclass(self, serializer: CustomizableSerializer) -> None:
+        with pytest.raises(TypeError, match="cannot compile schema marshallers for"):
+            serializer.register_custom_type(SimpleType, schema=True)
+
+
+@pytest.mark.parametrize(
+    "serializer_type",
+    ["cbor", "cbor_cached", "json", "json_orjson", "msgpack", "yaml", "yaml_pyyaml"],
+)
+class TestCompiledMarshallers:
+    @pytest.mark.parametrize(
+        "obj",
+        [
+            pytest.param(FrozenDataclass(1, [2, "x"]), id="dataclass"),
+            pytest.param(SlottedSubType(1, "x", 3.5), id="slots"),
+        ],
+    )
+    def test_roundtrip(self, serializer: CustomizableSerializer, obj: Any) -> None:
+        serializer.register_custom_type(type(obj), compiled=True)
+        payload = serializer.serialize({"obj": obj})
+        assert serializer.deserialize(payload) == {"obj": obj}
+
+    def test_attrs_class(self, serializer: CustomizableSerializer) -> None:
+        attr = pytest.importorskip("attr")
+
+        @attr.s(frozen=True, slots=True)
+        class AttrsType:
+            value_a = attr.ib()
+            value_b = attr.ib()
+
+        serializer.register_custom_type(AttrsType, compiled=True)
+        obj = AttrsType(1, {"b": None})
+        assert serializer.deserialize(serializer.serialize(obj)) == obj
+
+    def test_compact_state(self, serializer: CustomizableSerializer) -> None:
+        serializer.register_custom_type(SimpleType)
+        uncompiled_payload = serializer.serialize(SimpleType(1, 2))
+        serializer.register_custom_type(FrozenDataclass, compiled=True)
+        compiled_payload = serializer.serialize(FrozenDataclass(1, 2))
+        assert len(compiled_payload) < len(uncompiled_payload)
+
+    def test_custom_unmarshaller(self, serializer: CustomizableSerializer) -> None:
+        def unmarshal(state: list[Any]) -> FrozenDataclass:
+            return FrozenDataclass(*reversed(state))
+
+        serializer.register_custom_type(
+            FrozenDataclass, unmarshaller=unmarshal, compiled=True
+        )
+        payload = serializer.serialize(FrozenDataclass(1, 2))
+        assert serializer.deserialize(payload) == FrozenDataclass(2, 1)
+
+    def test_unsupported_class(self, serializer: CustomizableSerializer) -> None:
+        with pytest.raises(TypeError, match="cannot compile marshallers for"):
+            serializer.register_custom_type(SimpleType, compiled=True)
+
+
+@pytest.mark.parametrize(
+    "serializer_type",
+    ["cbor", "cbor_cached", "json", "json_orjson", "msgpack", "yaml", "yaml_pyyaml"],
+)
+class TestDeserializeInto:
+    def test_registered_type(self, serializer: CustomizableSerializer) -> None:
+        serializer.register_custom_type(SimpleType, wrap_state=False)
+        obj = SimpleType(1, "a")
+        payload = serializer.serialize(obj)
+        assert b"SimpleType" not in payload
+        assert serializer.deserialize(payload, into=SimpleType) == obj
+
+    def test_containers(self, serializer: CustomizableSerializer) -> None:
+        serializer.register_custom_type(SimpleType, wrap_state=False)
+        obj = {"a": [SimpleType(1, "x"), SimpleType(2, None)], "b": None}
+        payload = serializer.serialize(obj)
+        deserialized = serializer.deserialize(
+            payload, into=Dict[str, Optional[List[SimpleType]]]
+        )
+        assert deserialized == obj
+
+    def test_compiled(self, serializer: CustomizableSerializer) -> None:
+        serializer.register_custom_type(
+            FrozenDataclass, wrap_state=False, compiled=True
+        )
+        obj = (FrozenDataclass(1, [2]), FrozenDataclass("x", {"y": 3}))
+        payload = serializer.serialize(obj)
+        deserialized = serializer.deserialize(payload, into=Tuple[FrozenDataclass, ...])
+        assert deserialized == obj
+
+    def test_schema(self, serializer: CustomizableSerializer) -> None:
+        serializer.register_custom_type(Shape, wrap_state=False, schema=True)
+        shapes = [
+            Shape("a", [Point(0, 0)], center=Point(1, 2)),
+            Shape("b", [], children=(Shape("c", [Point(3, 4)]),)),
+        ]
+        payload = serializer.serialize(shapes)
+        assert b"Shape" not in payload
+        assert serializer.deserialize(payload, into=List[Shape]) == shapes
+
+    def test_unregistered_dataclass(self, serializer: CustomizableSerializer) -> None:
+        payload = serializer.serialize([[1.5, 2.5], [3, 4]])
+        assert serializer.deserialize(payload, into=List[Point]) == [
+            Point(1.5, 2.5),
+            Point(3, 4),
+        ]
+
+    def test_one_argument_unmarshaller(
+        self, serializer: CustomizableSerializer
+    ) -> None:
+        serializer.register_custom_type(
+            datetime, marshal_datetime, unmarshal_datetime, wrap_state=False
+        )
+        obj = datetime(2020, 1, 2, 3, 4, 5, tzinfo=timezone.utc)
+        payload = serializer.serialize({"when": obj})
+        assert serializer.deserialize(payload, into=Dict[str, datetime]) == {
+            "when": obj
+        }
+
+    def test_wrapped_state(self, serializer: CustomizableSerializer) -> None:
+        serializer.register_custom_type(SimpleType)
+        obj = [SimpleType(1, "a")]
+        payload = serializer.serialize(obj)
+        assert serializer.deserialize(payload, into=List[SimpleType]) == obj
+
+    def test_passthrough(self, serializer: CustomizableSerializer) -> None:
+        payload = serializer.serialize({"a": [1, 2]})
+        assert serializer.deserialize(payload, into=Dict[str, List[int]]) == {
+            "a": [1, 2]
+        }
+        assert serializer.deserialize(payload, into=Any) == {"a": [1, 2]}
+
+    def test_register_after_use(self, serializer: CustomizableSerializer) -> None:
+        state = {"value_a": 1, "value_b": 2}
+        assert serializer.unmarshal_into(state, SimpleType) == state
+        serializer.register_custom_type(SimpleType, wrap_state=False)
+        assert serializer.unmarshal_into(state, SimpleType) == SimpleType(1, 2)
+
+
+@pytest.mark.parametrize(
+    "serializer_type",
+    ["cbor", "cbor_cached", "json", "json_orjson", "msgpack", "yaml", "yaml_pyyaml"],
+)
+class TestTypeIDs:
+    def test_explicit_type_id(self, serializer: CustomizableSerializer) -> None:
+        serializer.register_custom_type(SimpleType, typename="simple", type_id=3)
+        testval = SimpleType(1, SimpleType("b", [2]))
+        payload = serializer.serialize(testval)
+        assert b"simple" not in payload
+        assert serializer.deserialize(payload) == testval
+
+    @pytest.mark.parametrize("type_id", [0, 127, 128, 65536, 2**40])
+    def test_manifest(self, serializer: CustomizableSerializer, type_id: int) -> None:
+        serializer.register_custom_type(SimpleType)
+        named_payload = serializer.serialize(SimpleType(1, 2))
+        serializer.register_type_ids({qualified_name(SimpleType): type_id})
+        serializer.register_custom_type(SlottedSimpleType)
+        serializer.register_type_ids({qualified_name(SlottedSimpleType): 1})
+        testval = [SimpleType(1, 2), SlottedSimpleType(3, 4)]
+        payload = serializer.serialize(testval)
+        assert len(payload) < 2 * len(named_payload)
+        assert serializer.deserialize(payload) == testval
+
+        # Payloads using type names must still be deserializable
+        assert serializer.deserialize(named_payload) == SimpleType(1, 2)
+
+    def test_manifest_before_registration(
+        self, serializer: CustomizableSerializer
+    ) -> None:
+        serializer.register_type_ids({"simple": 5})
+        serializer.register_custom_type(SimpleType, typename="simple")
+        assert serializer.marshallers[SimpleType][0] == 5
+        payload = serializer.serialize(SimpleType(1, 2))
+        assert serializer.deserialize(payload) == SimpleType(1, 2)
+
+    @pytest.mark.parametrize("type_id", [-1, True, "1"])
+    def test_invalid_type_id(
+        self, serializer: CustomizableSerializer, type_id: Any
+    ) -> None:
+        with pytest.raises(ValueError, match="type ID must be a non-negative integer"):
+            serializer.register_custom_type(SimpleType, type_id=type_id)
+
+    def test_duplicate_type_id(self, serializer: CustomizableSerializer) -> None:
+        serializer.register_custom_type(SimpleType, typename="simple", type_id=1)
+        with pytest.raises(ValueError, match="type ID 1 is already in use by type"):
+            serializer.register_custom_type(SlottedSimpleType, type_id=1)
+
+    def test_conflicting_type_id(self, serializer: CustomizableSerializer) -> None:
+        serializer.register_custom_type(SimpleType, typename="simple", type_id=1)
+        with pytest.raises(ValueError, match='type "simple" already has the type ID'):
+            serializer.register_type_ids({"simple": 2})
+
+
+class TestInlineState:
+    @pytest.fixture(params=["cbor", "cbor_cached", "msgpack"])
+    def serializer(self, request: SubRequest) -> CustomizableSerializer:
+        if request.param == "msgpack":
+            return MsgpackSerializer(
+                custom_type_codec=MsgpackTypeCodec(inline_state=True)
+            )
+        else:
+            return CBORSerializer(
+                custom_type_codec=CBORTypeCodec(inline_state=True),
+                cache_codecs=request.param == "cbor_cached",
+            )
+
+    @staticmethod
+    def make_nested(depth: int) -> SimpleType:
+        obj = SimpleType(0, None)
+        for i in range(1, depth):
+            obj = SimpleType(i, [obj, "x" * 10])
+
+        return obj
+
+    def test_nested(self, serializer: CustomizableSerializer) -> None:
+        serializer.register_custom_type(SimpleType)
+        testval = {"a": [self.make_nested(10)], "b": [1, 2], "c": [SimpleType(1, 2)]}
+        assert serializer.deserialize(serializer.serialize(testval)) == testval
+
+    def test_type_ids(self, serializer: CustomizableSerializer) -> None:
+        serializer.register_custom_type(SimpleType, type_id=1)
+        serializer.register_custom_type(SlottedSimpleType)
+        testval = [SimpleType(1, SlottedSimpleType(2, 3)), SlottedSimpleType(4, 5)]
+        assert serializer.deserialize(serializer.serialize(testval)) == testval
+
+    def test_decode_wrapped_state(self, serializer: CustomizableSerializer) -> None:
+        if not isinstance(serializer, CBORSerializer):
+            pytest.skip("only the CBOR codec accepts both formats")
+
+        wrapping_serializer = CBORSerializer()
+        wrapping_serializer.register_custom_type(SimpleType)
+        serializer.register_custom_type(SimpleType)
+        testval = self.make_nested(20)
+        wrapped_payload = wrapping_serializer.serialize(testval)
+        assert len(serializer.serialize(testval)) < len(wrapped_payload)
+        assert serializer.deserialize(wrapped_payload) == testval
+
+    def test_passthrough(self, serializer: CustomizableSerializer) -> None:
+        serializer.register_custom_type(SimpleType)
+        testval = [[1, 2], ["a", None], []]
+        assert serializer.deserialize(serializer.serialize(testval)) == testval
+
+
+class TestResolveSubclasses:
+    @pytest.fixture(params=["cbor", "json", "msgpack"])
+    def serializer(self, request: SubRequest) -> CustomizableSerializer:
+        if request.param == "cbor":
+            return CBORSerializer(
+                custom_type_codec=CBORTypeCodec(resolve_subclasses=True)
+            )
+        elif request.param == "json":
+            return JSONSerializer(
+                custom_type_codec=JSONTypeCodec(resolve_subclasses=True)
+            )
+        else:
+            return MsgpackSerializer(
+                custom_type_codec=MsgpackTypeCodec(resolve_subclasses=True)
+            )
+
+    def test_subclass(self, serializer: CustomizableSerializer) -> None:
+        serializer.register_custom_type(SimpleType, unmarshaller=None)
+        serializer.register_custom_type(
+            CustomStateSimpleType,
+            CustomStateSimpleType.marshal,
+            CustomStateSimpleType.unmarshal,
+        )
+        serializer.register_custom_type(SimpleType, marshaller=None)
+
+        class SubType(SimpleType):
+            pass
+
+        class SubSubType(CustomStateSimpleType):
+            pass
+
+        deserialized = serializer.deserialize(serializer.serialize(SubType(1, 2)))
+        assert type(deserialized) is SimpleType
+        assert deserialized == SimpleType(1, 2)
+
+        deserialized = serializer.deserialize(serializer.serialize(SubSubType(3, 4)))
+        assert type(deserialized) is CustomStateSimpleType
+        assert deserialized == SimpleType(3, 4)
+
+    def test_cache_invalidation(self, serializer: CustomizableSerializer) -> None:
+        class SubType(SimpleType):
+            pass
+
+        serializer.register_custom_type(SimpleType)
+        serializer.serialize(SubType(1, 2))
+        serializer.register_custom_type(SubType)
+        deserialized = serializer.deserialize(serializer.serialize(SubType(1, 2)))
+        assert type(deserialized) is SubType
+
+    def test_cache_size(self, serializer: CustomizableSerializer) -> None:
+        codec = cast(DefaultCustomTypeCodec[Any], serializer.custom_type_codec)
+        codec.marshaller_cache_size = 2
+        serializer.register_custom_type(SimpleType)
+        subclasses = [type(f"SubType{i}", (SimpleType,), {}) for i in range(5)]
+        for cls in subclasses:
+            serializer.serialize(cls(1, 2))
+            assert len(codec._marshaller_cache) <= 2
+
+    def test_missing_marshaller(self, serializer: CustomizableSerializer) -> None:
+        serializer.register_custom_type(SimpleType)
+        exc = pytest.raises(LookupError, serializer.serialize, SlottedSimpleType(1, 2))
+        exc.match('no marshaller found for type ".*SlottedSimpleType"')
+
+    def test_exact_type_only(self) -> None:
+        class SubType(SimpleType):
+            pass
+
+        serializer = JSONSerializer()
+        serializer.register_custom_type(SimpleType)
+        exc = pytest.raises(LookupError, serializer.serialize, SubType(1, 2))
+        exc.match('no marshaller found for type ".*SubType"')
+
+
 class TestObjectHook:
     @pytest.fixture(params=["msgpack", "cbor"])
     def serializer(self, request: SubRequest) -> CustomizableSerializer:
@@ -315,3 +982,396 @@ class TestObjectHook:
         obj = serializer.deserialize(data)
         assert obj.val == 1
         assert obj.next.val == 2
+
+
+class TestOrjsonEngine:
+    def test_object_hook(self) -> None:
+        serializer = JSONSerializer(
+            decoder_options={"object_hook": lambda obj: sorted(obj.items())},
+            engine="orjson",
+        )
+        payload = b'{"b": [{"y": 1, "x": 2}], "a": {"z": 3}}'
+        assert serializer.deserialize(payload) == [
+            ("a", [("z", 3)]),
+            ("b", [[("x", 2), ("y", 1)]]),
+        ]
+
+    def test_object_pairs_hook(self) -> None:
+        serializer = JSONSerializer(
+            decoder_options={"object_pairs_hook": tuple}, engine="orjson"
+        )
+        assert serializer.deserialize(b'[{"a": {"b": 1}}, 2]') == [
+            (("a", (("b", 1),)),),
+            2,
+        ]
+
+    def test_escaped_type_key(self) -> None:
+        serializer = JSONSerializer(engine="orjson")
+        serializer.register_custom_type(SimpleType)
+        payload = (
+            b'[{"\\u005f_type__": "custom_types.SimpleType", '
+            b'"state": {"value_a": 1, "value_b": "a"}}]'
+        )
+        assert serializer.deserialize(payload) == [SimpleType(1, "a")]
+
+    def test_option(self) -> None:
+        orjson = pytest.importorskip("orjson")
+        serializer = JSONSerializer(
+            encoder_options={"option": orjson.OPT_SORT_KEYS}, engine="orjson"
+        )
+        assert serializer.serialize({"b": 1, "a": 2}) == b'{"a":2,"b":1}'
+
+    def test_unsupported_encoder_option(self) -> None:
+        with pytest.raises(
+            ValueError,
+            match="unsupported encoder options for the orjson engine: indent",
+        ):
+            JSONSerializer(encoder_options={"indent": 2}, engine="orjson")
+
+    def test_unsupported_decoder_option(self) -> None:
+        with pytest.raises(
+            ValueError,
+            match="unsupported decoder options for the orjson engine: parse_float",
+        ):
+            JSONSerializer(decoder_options={"parse_float": str}, engine="orjson")
+
+    def test_unsupported_encoding(self) -> None:
+        with pytest.raises(
+            ValueError, match="the orjson engine only supports the UTF-8 encoding"
+        ):
+            JSONSerializer(encoding="utf-16", engine="orjson")
+
+    def test_unknown_engine(self) -> None:
+        with pytest.raises(ValueError, match="unknown JSON engine: 'foo'"):
+            JSONSerializer(engine="foo")
+
+    def test_orjson_missing(self, monkeypatch: pytest.MonkeyPatch) -> None:
+        monkeypatch.setitem(sys.modules, "orjson", None)
+        with pytest.warns(RuntimeWarning, match="orjson is not installed"):
+            serializer = JSONSerializer(engine="orjson")
+
+        assert serializer.engine == "stdlib"
+        assert serializer.serialize({"a": 1}) == b'{"a": 1}'
+
+
+@pytest.mark.parametrize("engine", ["ruamel", "pyyaml"])
+class TestYAMLEngines:
+    def test_dump_load_all(self, engine: str) -> None:
+        serializer = YAMLSerializer(engine=engine)
+        docs = [{"x": "åäö"}, [1, 5.06, None], "foo"]
+        buffer = BytesIO()
+        serializer.dump_all(docs, buffer)
+        assert buffer.getvalue().count(b"---") == 2
+
+        buffer.seek(0)
+        loaded = serializer.load_all(buffer)
+        assert next(loaded) == {"x": "åäö"}
+        assert list(loaded) == docs[1:]
+
+    def test_unsafe(self, engine: str) -> None:
+        serializer = YAMLSerializer(safe=False, engine=engine)
+        obj = {"point": (1, 2), "tags": {"a"}}
+        assert serializer.deserialize(serializer.serialize(obj)) == obj
+
+    def test_safe_rejects_python_tags(self, engine: str) -> None:
+        serializer = YAMLSerializer(engine=engine)
+        with pytest.raises(Exception, match="python/tuple"):
+            serializer.deserialize(b"!!python/tuple [1, 2]")
+
+    def test_interoperable(self, engine: str) -> None:
+        serializer = YAMLSerializer(engine=engine)
+        other = YAMLSerializer(engine="pyyaml" if engine == "ruamel" else "ruamel")
+        obj = {"b": [1, {"c": "åäö"}], "a": None}
+        payload = serializer.serialize(obj)
+        assert payload.decode("utf-8")
+        assert other.deserialize(payload) == obj
+        assert list(other.deserialize(payload)) == ["a", "b"]
+
+    def test_custom_type_tags(self, engine: str) -> None:
+        serializer = YAMLSerializer(engine=engine)
+        serializer.register_custom_type(SimpleType)
+        serializer.register_custom_type(
+            CustomStateSimpleType,
+            lambda obj: obj.value_a,
+            lambda state: CustomStateSimpleType(state, None),
+            typename="custom",
+        )
+        obj = [SimpleType(1, "a"), CustomStateSimpleType("5", 0)]
+        payload = serializer.serialize(obj)
+        assert b"!custom_types.SimpleType" in payload
+        assert b'!custom "5"' in payload
+        assert serializer.deserialize(payload) == [
+            SimpleType(1, "a"),
+            CustomStateSimpleType("5", None),
+        ]
+
+    def test_scalar_states(self, engine: str) -> None:
+        serializer = YAMLSerializer(engine=engine)
+        serializer.register_custom_type(
+            SimpleType, lambda obj: obj.value_a, lambda state: SimpleType(state, None)
+        )
+        for state in ["5", 5, 5.06, True, None, datetime(2016, 9, 9, 7, 21, 16)]:
+            obj = serializer.deserialize(serializer.serialize(SimpleType(state, None)))
+            assert type(obj.value_a) is type(state)
+            assert obj.value_a == state
+
+    def test_unsupported_state(self, engine: str) -> None:
+        serializer = YAMLSerializer(engine=engine)
+        serializer.register_custom_type(SimpleType, lambda obj: b"\x00")
+        with pytest.raises(
+            TypeError,
+            match='cannot represent the marshalled state of type "bytes" in a tagged '
+            "YAML node",
+        ):
+            serializer.serialize(SimpleType(1, 2))
+
+    def test_registrations_isolated(self, engine: str) -> None:
+        serializer = YAMLSerializer(engine=engine)
+        serializer.register_custom_type(SimpleType)
+        payload = serializer.serialize(SimpleType(1, 2))
+
+        other = YAMLSerializer(engine=engine)
+        with pytest.raises(Exception, match="cannot represent an object"):
+            other.serialize(SimpleType(1, 2))
+        with pytest.raises(Exception, match="custom_types.SimpleType"):
+            other.deserialize(payload)
+
+    def test_unknown_tag(self, engine: str) -> None:
+        serializer = YAMLSerializer(engine=engine)
+        serializer.register_custom_type(SimpleType)
+        with pytest.raises(Exception, match="tag:yaml.org,2002:foo"):
+            serializer.deserialize(b"!!foo 1")
+
+    def test_tag_prefix(self, engine: str) -> None:
+        serializer = YAMLSerializer(
+            engine=engine, custom_type_codec=YAMLTypeCodec(tag_prefix="!type:")
+        )
+        serializer.register_custom_type(SimpleType, typename="simple")
+        payload = serializer.serialize(SimpleType(1, 2))
+        assert payload.startswith(b"!type:simple")
+        assert serializer.deserialize(payload) == SimpleType(1, 2)
+
+    def test_resolve_subclasses(self, engine: str) -> None:
+        serializer = YAMLSerializer(
+            engine=engine, custom_type_codec=YAMLTypeCodec(resolve_subclasses=True)
+        )
+        serializer.register_custom_type(SimpleType)
+        payload = serializer.serialize(CustomStateSimpleType(1, 2))
+        assert serializer.deserialize(payload) == SimpleType(1, 2)
+
+    def test_unsafe_custom_types(self, engine: str) -> None:
+        serializer = YAMLSerializer(safe=False, engine=engine)
+        serializer.register_custom_type(SimpleType, typename="simple")
+        payload = serializer.serialize([SimpleType(1, 2), (3, 4)])
+        assert payload.count(b"!simple") == 1
+        assert serializer.deserialize(payload) == [SimpleType(1, 2), (3, 4)]
+
+
+def test_yaml_unknown_engine() -> None:
+    with pytest.raises(ValueError, match="unknown YAML engine: 'foo'"):
+        YAMLSerializer(engine="foo")
+
+
+def test_yaml_pyyaml_missing(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setitem(sys.modules, "yaml", None)
+    with pytest.warns(RuntimeWarning, match="PyYAML is not installed"):
+        serializer = YAMLSerializer(engine="pyyaml")
+
+    assert serializer.engine == "ruamel"
+    assert serializer.deserialize(serializer.serialize({"a": 1})) == {"a": 1}
+
+
+class TestRestrictedPickle:
+    @pytest.mark.parametrize("protocol", range(pickle.HIGHEST_PROTOCOL + 1))
+    def test_default_globals(self, protocol: int) -> None:
+        serializer = PickleSerializer(protocol=protocol, restricted=True)
+        obj = [
+            b"x",
+            {1},
+            frozenset([2]),
+            bytearray(b"y"),
+            1j,
+            datetime(2016, 9, 9, 7, 21, 16, tzinfo=timezone.utc),
+        ]
+        assert serializer.deserialize(serializer.serialize(obj)) == obj
+
+    def test_forbidden_global(self) -> None:
+        serializer = PickleSerializer(restricted=True)
+        payload = pickle.dumps(SimpleType(1, 2))
+        with pytest.raises(
+            pickle.UnpicklingError,
+            match='global "custom_types:SimpleType" is not allowed',
+        ):
+            serializer.deserialize(payload)
+
+        with pytest.raises(pickle.UnpicklingError, match="builtins:eval"):
+            serializer.load(BytesIO(pickle.dumps(eval)))
+
+    @pytest.mark.parametrize(
+        "allowed_type",
+        [
+            pytest.param(SimpleType, id="class"),
+            pytest.param("custom_types:SimpleType", id="reference"),
+        ],
+    )
+    def test_allowed_type(self, allowed_type: Any) -> None:
+        serializer = PickleSerializer(restricted=True, allowed_types=[allowed_type])
+        payload = serializer.serialize(SimpleType(1, 2))
+        assert serializer.deserialize(payload) == SimpleType(1, 2)
+        assert serializer.load(BytesIO(payload)) == SimpleType(1, 2)
+
+    def test_register_allowed_type(self) -> None:
+        serializer = PickleSerializer(restricted=True)
+        payload = serializer.serialize(SimpleType(1, 2))
+        serializer.register_allowed_type(SimpleType)
+        assert serializer.deserialize(payload) == SimpleType(1, 2)
+
+    def test_invalid_reference(self) -> None:
+        with pytest.raises(ValueError, match='expected a "module:qualname" reference'):
+            PickleSerializer(allowed_types=["SimpleType"])
+
+    def test_unrestricted(self) -> None:
+        serializer = PickleSerializer()
+        payload = serializer.serialize(SimpleType(1, 2))
+        assert serializer.deserialize(payload) == SimpleType(1, 2)
+
+
+class TestPickleParts:
+    def test_out_of_band(self) -> None:
+        serializer = PickleSerializer(restricted=True, buffer_threshold=100)
+        writable = bytearray(b"a" * 100)
+        readonly = b"b" * 200
+        obj = {
+            "writable": pickle.PickleBuffer(writable),
+            "readonly": pickle.PickleBuffer(readonly),
+            "view": memoryview(readonly)[:150],
+            "small": pickle.PickleBuffer(b"c" * 99),
+            "inline": readonly,
+        }
+        parts = serializer.serialize_parts(obj)
+        assert len(parts) == 4
+        assert len(parts[0]) < 500
+        assert parts[1].obj is writable  # type: ignore[union-attr]
+        assert parts[2].obj is readonly  # type: ignore[union-attr]
+
+        received = [parts[0], bytearray(parts[1]), parts[2], parts[3]]
+        loaded = serializer.deserialize_parts(received)
+        assert loaded["writable"] is received[1]
+        assert loaded["readonly"] == readonly
+        assert loaded["readonly"].obj is readonly
+        assert loaded["view"] == readonly[:150]
+        assert loaded["small"] == b"c" * 99
+        assert loaded["inline"] == readonly
+
+    def test_no_buffers(self) -> None:
+        serializer = PickleSerializer()
+        parts = serializer.serialize_parts([1, "foo"])
+        assert parts == [serializer.serialize([1, "foo"])]
+        assert serializer.deserialize_parts(parts) == [1, "foo"]
+
+    def test_old_protocol(self) -> None:
+        serializer = PickleSerializer(protocol=4, buffer_threshold=1)
+        parts = serializer.serialize_parts(b"foo")
+        assert parts == [serializer.serialize(b"foo")]
+        assert serializer.deserialize_parts(parts) == b"foo"
+
+
+def test_serialize_parts(serializer: CustomizableSerializer) -> None:
+    obj = {"x": "åäö", "y": [1, 5.06, {"z": None}], "data": b"a" * 70000}
+    if isinstance(serializer, (JSONSerializer, YAMLSerializer)):
+        del obj["data"]
+
+    parts = serializer.serialize_parts(obj)
+    assert serializer.deserialize_parts(parts) == obj
+    if not isinstance(serializer, PickleSerializer):
+        assert b"".join(parts) == serializer.serialize(obj)
+
+
+@pytest.mark.parametrize(
+    "serializer",
+    [
+        pytest.param(MsgpackSerializer(buffer_threshold=4), id="msgpack"),
+        pytest.param(CBORSerializer(buffer_threshold=4), id="cbor"),
+        pytest.param(
+            CBORSerializer(buffer_threshold=4, cache_codecs=True), id="cbor_cached"
+        ),
+    ],
+)
+class TestNativeParts:
+    def test_large_fields(self, serializer: CustomizableSerializer) -> None:
+        first = b"a" * 300
+        second = bytearray(b"b" * 70000)
+        obj = {"x": first, "y": [1, {"z": (second, b"c" * 3)}], "w": "foo"}
+        parts = serializer.serialize_parts(obj)
+        assert len(parts) == 5
+        assert parts[1] is first
+        assert parts[3] is second
+        assert b"".join(parts) == serializer.serialize(obj)
+
+        loaded = serializer.deserialize_parts(parts)
+        assert loaded == {"x": first, "y": [1, {"z": [second, b"c" * 3]}], "w": "foo"}
+
+    def test_top_level_field(self, serializer: CustomizableSerializer) -> None:
+        blob = b"a" * 100
+        parts = serializer.serialize_parts(blob)
+        assert len(parts) == 2
+        assert parts[1] is blob
+        assert serializer.deserialize_parts(parts) == blob
+
+    def test_no_large_fields(self, serializer: CustomizableSerializer) -> None:
+        obj = {"x": [b"abc", "defgh"]}
+        parts = serializer.serialize_parts(obj)
+        assert parts == [serializer.serialize(obj)]
+        assert serializer.deserialize_parts(parts) == obj
+
+    def test_shared_references(self, serializer: CustomizableSerializer) -> None:
+        blob = b"a" * 100
+        shared = {"x": blob}
+        parts = serializer.serialize_parts([shared, shared])
+        assert len(parts) == 4
+        assert parts[1] is parts[3] is blob
+        assert b"".join(parts) == serializer.serialize([shared, shared])
+
+    def test_reference_cycle(self, serializer: CustomizableSerializer) -> None:
+        obj: list[Any] = [b"a" * 100]
+        obj.append({"x": obj})
+        with pytest.raises(ValueError) as exc:
+            serializer.serialize(obj)
+
+        with pytest.raises(exc.type, match=re.escape(str(exc.value))):
+            serializer.serialize_parts(obj)
+
+    def test_custom_types(self, serializer: CustomizableSerializer) -> None:
+        serializer.register_custom_type(SimpleType)
+        obj = [SimpleType(b"a" * 100, 1), b"b" * 100]
+        parts = serializer.serialize_parts(obj)
+        assert len(parts) == 2
+        assert parts[1] is obj[1]
+        assert serializer.deserialize_parts(parts) == obj
+
+
+def test_msgpack_parts_memoryview() -> None:
+    serializer = MsgpackSerializer(buffer_threshold=4)
+    array = memoryview(bytearray(512)).cast("I")
+    obj = [array, memoryview(b"abc")]
+    parts = serializer.serialize_parts(obj)
+    assert len(parts) == 3
+    assert parts[1] is array
+    assert b"".join(parts) == serializer.serialize(obj)
+    assert serializer.deserialize_parts(parts) == [bytes(512), b"abc"]
+
+
+@pytest.mark.parametrize(
+    "serializer",
+    [
+        pytest.param(
+            MsgpackSerializer({"use_bin_type": False}, buffer_threshold=4), id="msgpack"
+        ),
+        pytest.param(
+            CBORSerializer({"value_sharing": True}, buffer_threshold=4), id="cbor"
+        ),
+    ],
+)
+def test_parts_unsupported_options(serializer: CustomizableSerializer) -> None:
+    obj = [b"a" * 100, "foo"]
+    assert serializer.serialize_parts(obj) == [serializer.serialize(obj)]